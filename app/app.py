@@ -1,4 +1,9 @@
 import streamlit as st
+from engine.cache import enable_copy_on_write
+from engine.instrument import sidebar_panel
+enable_copy_on_write()  # DataFrames de la caché compartida entre sesiones
 st.set_page_config(page_title='BasePlate I3', layout='wide')
 st.title('Base Plate & Anchor Bolts – I3 (AISC 360-22 / ACI 318-25)')
 st.caption('Loads → Geometry → Anchors → Methods → Results → Report | ELASTIC shear distribution is ON by default.')
+
+sidebar_panel()
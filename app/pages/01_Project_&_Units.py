@@ -1,5 +1,9 @@
+import os
+import tempfile
 import streamlit as st
 from engine.utils import save_project_json, load_project_json
+from engine.project import project_bytes, open_project
+from engine.instrument import sidebar_panel
 
 if 'cfg' not in st.session_state: st.session_state['cfg']={}
 st.title('01 · Project & Units')
@@ -13,8 +17,27 @@ with cl:
     st.session_state['cfg']['omega0'] = st.number_input('Ω₀ (seismic overstrength)', value=2.5, step=0.1)
 with cr:
     st.download_button('💾 Save project (.json)', data=save_project_json(st.session_state), file_name='project_i3.json', mime='application/json')
-    up = st.file_uploader('⬆️ Load project (.json)', type=['json'])
-    if up:
+    # Proyecto completo: tabla SAP, resultados e imágenes (se arma sólo al pedirlo)
+    if st.button('📦 Prepare full project (.bpz)'):
+        st.session_state['__bpz__'] = project_bytes(st.session_state)
+    if st.session_state.get('__bpz__'):
+        st.download_button('💾 Save full project (.bpz)', data=st.session_state.pop('__bpz__'), file_name='project_i3.bpz',
+                           mime='application/zip')
+    up = st.file_uploader('⬆️ Load project (.json / .bpz)', type=['json', 'bpz'])
+    if up and up.name.lower().endswith('.bpz'):
+        src = getattr(up, 'file_id', None) or (up.name, getattr(up, 'size', None))
+        if st.session_state.get('__bpz_src__') != src:
+            # las tablas se leen con memory-map desde disco al usarlas: el temporal se borra al
+            # leerse la última (o al liberarse el estado que las referencia)
+            fd, path = tempfile.mkstemp(suffix='.bpz', prefix='baseplate_')
+            with os.fdopen(fd, 'wb') as f:
+                for block in iter(lambda: up.read(1 << 24), b''): f.write(block)
+            st.session_state.update(open_project(path, remove=True))
+            st.session_state['__bpz_src__'] = src
+        st.success('Project loaded into session (tables are read when a page uses them).')
+    elif up:
         data = load_project_json(up.read())
         st.session_state.update(data)
-        st.success('Project loaded into session.')
\ No newline at end of file
+        st.success('Project loaded into session.')
+
+sidebar_panel()
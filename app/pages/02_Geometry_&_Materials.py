@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from engine.instrument import sidebar_panel
 
 if 'geom' not in st.session_state: st.session_state['geom']={}
 if 'mat' not in st.session_state: st.session_state['mat']={}
@@ -45,4 +46,6 @@ else:
         try:
             df = pd.read_csv(up); st.dataframe(df.head())
         except Exception as e:
-            st.error(f'CSV error: {e}')
\ No newline at end of file
+            st.error(f'CSV error: {e}')
+
+sidebar_panel()
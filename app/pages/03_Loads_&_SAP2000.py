@@ -1,48 +1,155 @@
 import streamlit as st
 import pandas as pd
-from engine.io_sap import read_sap_table
+from engine.io_sap import read_sap_csv_envelope, classify_cases, CaseIndex
+from engine.cache import read_sap_table_cached, default_cache, shared_cache, enable_copy_on_write
+from engine.steps import read_sap_concurrent, concurrent_envelope
+from engine.revision import case_hashes, diff_hashes, diff_summary, diff_table
+from engine.combos import TEMPLATES, template_factors, read_factor_table, iter_combinations, combination_rows, COMBO_WARN_ROWS, COMBO_MAX_ROWS, COMBO_ROW_BYTES
+from engine.jobs import default_manager, poll_job
+from engine.instrument import sidebar_panel
 
+enable_copy_on_write()  # la página puede abrirse sin pasar por app.py
 if 'sap' not in st.session_state: st.session_state['sap']={}
 st.title('03 · Loads & SAP2000')
 
-up = st.file_uploader("Upload SAP2000 'Joint Reactions' (XLS/XLSX/CSV)", type=['xls','xlsx','csv'])
+up = st.file_uploader("Upload SAP2000 'Joint Reactions' (XLS/XLSX/XLSM/CSV)", type=['xls','xlsx','xlsm','csv'])
+READ_MODES = ['Full table',
+              'Multi-step: stream and keep the concurrent envelope (rows from actual steps)',
+              'Large CSV: stream and keep the per-component envelope (Max/Min, not concurrent)']
+mode = st.selectbox('Import', READ_MODES, index=0,
+                    help='Time-history / moving-load cases: the concurrent envelope keeps, per joint and case, the full '
+                         'F1..M3 set of the step where each component (and |V|, |M|) peaks; the history is never held in memory.')
+def read_job(job, up, mode, prev):
+    """Lectura + índice + revisión en segundo plano (la página sigue respondiendo)."""
+    job.stage('Reading')
+    if mode == READ_MODES[1]:
+        df = read_sap_concurrent(up)
+    elif mode == READ_MODES[2] and up.name.lower().endswith('.csv'):
+        df = read_sap_csv_envelope(up)
+    else:
+        df = read_sap_table_cached(up)
+    job.stage('Indexing')
+    # revisión: comparación con la tabla anterior por hash de cada (Joint, OutputCase)
+    hashes = case_hashes(df)
+    rev = diff_hashes(prev, hashes) if prev is not None else None
+    return dict(df=df, index=CaseIndex(df), hashes=hashes, revision=diff_summary(rev) if rev else None,
+                revision_table=diff_table(rev) if rev else None)
+
 if up:
-    df = read_sap_table(up); st.session_state['sap']['df'] = df
+    # sólo se relee (e indexa) cuando cambia el archivo, no en cada rerun
+    src = (getattr(up, 'file_id', None) or (up.name, getattr(up, 'size', None)), mode)
+    if st.session_state['sap'].get('src') != src and st.session_state.get('__job_read_src__') != src:
+        default_manager().cancel(st.session_state.get('__job_read__'))
+        st.session_state['__job_read__'] = default_manager().submit(f'Reading {up.name}', read_job, up, mode,
+                                                                     st.session_state['sap'].get('hashes'),
+                                                                     stages=('Reading', 'Indexing'))
+        st.session_state['__job_read_src__'] = src
+    job = poll_job('__job_read__', 'Import')
+    if job is not None and job.status == 'done':  # si falló o se canceló, no se reintenta hasta cambiar de archivo/modo
+        st.session_state['sap'].update(**job.result, src=st.session_state.pop('__job_read_src__'))
+    if '__job_read__' in st.session_state: st.stop()
+    ci = default_cache().info()
+    st.caption(f"Parsed-table cache: {ci['hits']} hits / {ci['misses']} misses, {ci['entries']} entries, {ci['bytes']/1024**2:.1f} MB")
+    sc = shared_cache().info(); tot = sc.pop('total')
+    st.caption('Shared cache (all sessions): ' + ', '.join(f"{ns} {s['hit_rate']:.0%} hits ({s['entries']})" for ns, s in sc.items())
+               + f" · {tot['bytes']/1024**2:.1f} / {tot['max_bytes']/1024**2:.0f} MB")
 
 if 'df' not in st.session_state.get('sap',{}):
     st.info('Upload a SAP2000 reactions file to continue.'); st.stop()
 
 df = st.session_state['sap']['df']
+idx = st.session_state['sap'].get('index')
+if idx is None or idx.n != len(df):
+    idx = st.session_state['sap']['index'] = CaseIndex(df)
+su = df.attrs.get('source_units')
+if df.attrs.get('rows_in'):
+    st.caption(f"{df.attrs['rows_in']:,} rows reduced to {len(df):,} concurrent load sets.")
+if df.attrs.get('non_concurrent'):
+    st.warning(f"{df.attrs['non_concurrent']:,} joint/case pairs only have SAP Max/Min envelope rows: their values come "
+               "from different steps (rows marked 'envelope, not concurrent'). Export the step-by-step history for concurrent sets.")
+if su is not None:
+    src = ', '.join(f'{k}: {v}' for k,v in su.items()) if su else 'no units row (assumed kN, kN·m)'
+    st.caption(f'Source units — {src}. Forces in kN and moments in kN·m from here on.')
+rev = st.session_state['sap'].get('revision')
+if rev:
+    st.caption(f"Revision vs previous upload: {rev['changed']} changed, {rev['added']} added, {rev['removed']} removed "
+               f"(Joint, OutputCase) pairs — {rev['joints_redesign']} of {rev['joints_total']} joints to re-design"
+               + (f", {rev['joints_removed']} joints removed." if rev['joints_removed'] else '.'))
+    if len(st.session_state['sap'].get('revision_table', [])):
+        with st.expander('Changed load cases'):
+            st.dataframe(st.session_state['sap']['revision_table'], hide_index=True)
 st.dataframe(df.head(30), width='stretch')
 
 st.subheader('Case classification')
 st.write('Detected ULS/SLS from OutputCase name; you can override below if needed.')
 if 'ULS_SLS' in df.columns:
-    st.dataframe(df[['OutputCase','ULS_SLS']].drop_duplicates().reset_index(drop=True))
+    st.dataframe(pd.DataFrame({'OutputCase': idx.cases, 'ULS_SLS': list(classify_cases(idx.cases))}))
+with st.expander('Build factored combinations from basic load cases'):
+    basic = idx.cases
+    src = st.radio('Factors', ['Template','Upload CSV (combo, case1, case2, …)'], horizontal=True)
+    factors = None
+    if src=='Template':
+        tpl = st.selectbox('Template', list(TEMPLATES))
+        types = sorted({t for _,fac in TEMPLATES[tpl] for t in fac})
+        case_types = {t: st.multiselect(f'Cases of type {t}', basic, key=f'ctype_{t}') for t in types}
+        if any(case_types.values()): factors = template_factors(tpl, case_types)
+    else:
+        fup = st.file_uploader('Factor table CSV', type=['csv'], key='factors_csv')
+        if fup: factors = read_factor_table(fup)
+    if factors is not None and len(factors):
+        st.dataframe(factors)
+        n_rows = combination_rows(df, factors)
+        mb = n_rows*COMBO_ROW_BYTES/1024**2
+        if n_rows > COMBO_MAX_ROWS:
+            st.error(f'{n_rows:,} combination rows (≈{mb:,.0f} MB) exceed the limit of {COMBO_MAX_ROWS:,} '
+                     '(BASEPLATE_COMBO_MAX_ROWS). Select fewer joints/cases or combinations.')
+        elif n_rows > COMBO_WARN_ROWS:
+            st.warning(f'{n_rows:,} combination rows (≈{mb:,.0f} MB, plus the design results) will be kept in memory.')
+        if n_rows <= COMBO_MAX_ROWS and st.button(f'Generate {len(factors)} combinations and use them as loads'):
+            try:
+                st.session_state['sap']['basic_df'] = df
+                df = pd.concat(iter_combinations(df, factors), ignore_index=True)
+                idx = CaseIndex(df)
+                st.session_state['sap'].update(df=df, index=idx, hashes=case_hashes(df))
+                st.success(f'{len(df)} combination rows generated.')
+            except ValueError as e:
+                st.error(str(e))
+
 st.session_state['sap']['override'] = st.selectbox('Use cases classified as', ['ULS (recommended)','SLS','All'], index=0)
 
 # pick joint & case
 joint_col = st.selectbox('Joint column', [c for c in df.columns if 'Joint' in str(c)], index=0)
 case_col  = st.selectbox('OutputCase column', [c for c in df.columns if 'OutputCase' in str(c)], index=0)
 
-joints = sorted(df[joint_col].astype(str).unique())
-cases  = sorted(df[case_col].astype(str).unique())
-J = st.selectbox('Joint', joints, index=0)
-C = st.selectbox('OutputCase', cases, index=0)
-rows = df[(df[joint_col].astype(str)==str(J)) & (df[case_col].astype(str)==str(C))]
+sel = idx if (joint_col, case_col) == ('Joint', 'OutputCase') else CaseIndex(df, joint_col, case_col)
+J = st.selectbox('Joint', sel.joints, index=0)
+C = st.selectbox('OutputCase', sel.cases_of(J), index=0)
+rows = df.iloc[sel.rows(J, C)]
 
 num = rows[['F1','F2','F3','M1','M2']].apply(pd.to_numeric, errors='coerce').dropna()
 if num.empty:
     st.warning('No numeric F*/M* columns found after selection.')
 else:
-    agg = st.radio('If multiple rows:', ['Average','Max |value|'], index=1, horizontal=True)
-    v = num.mean() if agg=='Average' else num.abs().max()
+    AGG = ['Concurrent (one step)', 'Average', 'Max |value| (mixes steps, conservative)']
+    if len(num) == 1:
+        v = num.iloc[0]
+    else:
+        agg = st.radio('If multiple rows:', AGG, index=0, horizontal=True)
+        if agg == AGG[0]:
+            env = concurrent_envelope(rows)
+            if env.attrs.get('non_concurrent'): st.warning('Only Max/Min envelope rows for this case: the values are not concurrent.')
+            drv = st.selectbox('Governing step for', env['StepType'].tolist(), index=0,
+                               help="e.g. 'F3 Max' = step of maximum F3, with the F1/F2/M1/M2 of that same step.")
+            v = env.loc[env['StepType'] == drv].iloc[0][['F1','F2','F3','M1','M2']].astype(float)
+        else:
+            v = num.mean() if agg == AGG[1] else num.abs().max()
     # Preset A: N←F3, Vx←F1, Vy←F2, Mx←M2, My←M1.
     N,Vx,Vy,Mx,My = v['F3'], v['F1'], v['F2'], v['M2'], v['M1']
     st.session_state['loads']={'N':float(N),'Vx':float(Vx),'Vy':float(Vy),'Mx':float(Mx),'My':float(My),'case':str(C),'joint':str(J)}
     st.success(f"Loaded → N={N:.3f} kN, Vx={Vx:.3f} kN, Vy={Vy:.3f} kN, Mx={Mx:.3f} kN·m, My={My:.3f} kN·m")
 
-    
+sidebar_panel()
+
 # import streamlit as st
 # import pandas as pd
 # from engine import sap2000
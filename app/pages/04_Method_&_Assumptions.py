@@ -1,4 +1,5 @@
 import streamlit as st
+from engine.instrument import sidebar_panel
 if 'ass' not in st.session_state: st.session_state['ass']={}
 st.title('04 · Method & Assumptions')
 
@@ -12,6 +13,11 @@ with right:
     st.subheader('Anchors & shear distribution')
     st.session_state['ass']['shear_mode'] = st.selectbox('Shear distribution mode (default: ELASTIC)',
         ['ELASTIC','CASE 1','CASE 2','CASE 3'], index=0)
+    st.session_state['ass']['tension_mode'] = st.selectbox('Anchor tension distribution (N + Mx + My)',
+        ['ELASTIC','PLASTIC','BEARING (neutral axis)'], index=0,
+        help='ELASTIC: rigid plate about the bolt-group centroid. PLASTIC: tension-side bolts share equally, compression at the opposite bolt line. '
+             'BEARING: neutral-axis solution with compression-only concrete and tension-only anchors.')
+    st.session_state['ass']['n_mod'] = st.number_input('Modular ratio n = Es/Ec (neutral-axis solver)', value=8.0, min_value=1.0, step=0.5)
     st.session_state['ass']['interact'] = st.selectbox('Tension–Shear interaction (steel)',
         ['Linear (default)','Exponent 1.5 (alt)','Quadratic (alt)'], index=0)
     st.session_state['ass']['prying'] = st.checkbox('Consider prying action (advanced)', value=False)
@@ -19,6 +25,7 @@ with right:
 st.subheader('Other')
 st.session_state['ass']['friction_mu'] = st.number_input('Friction μ (ignored by default)', value=0.0, min_value=0.0, max_value=1.0, step=0.05)
 
+sidebar_panel()
 
 # import streamlit as st
 # if 'assump' not in st.session_state: st.session_state['assump'] = {}
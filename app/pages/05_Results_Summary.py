@@ -1,12 +1,18 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from engine.baseplate import contact_pressures, plate_t_local, plate_t_full_section
-from engine.steel.welds import fillet_strength, required_fillet_size
-from engine.steel.bolts import steel_tension_capacity, steel_shear_capacity
-from engine.concrete.aci318_25 import tension_breakout_group, pullout, shear_breakout, pryout_from_tension
-from engine.anchors.distribute import tension_distribution, shear_distribution
-from engine.utils import round_to_5, apply_seismic_omega
-
+from engine.utils import round_to_5, to_arrow_compatible
+from engine.design import design_params, governing_by_mechanism, governing_by_joint, loads_from_table, LOAD_COLS
+from engine.optimize import optimize, default_space
+from engine.parallel import default_workers
+from engine.session import DesignSession, value_hash
+from engine.revision import case_hashes, design_incremental
+from engine.batch import run_design
+from engine.jobs import default_manager, poll_job
+from engine.cache import shared_cache, enable_copy_on_write
+from engine.instrument import sidebar_panel
+
+enable_copy_on_write()  # la página puede abrirse sin pasar por app.py
 st.title('05 · Results – Summary')
 geom = st.session_state.get('geom',{})
 mat  = st.session_state.get('mat',{})
@@ -20,21 +26,23 @@ if not geom or not mat or not loads or not anc:
 
 B,L,t = geom.get('B',0.0), geom.get('L',0.0), geom.get('t',0.0)
 d,bf,tf,tw = geom.get('d',0.0), geom.get('bf',0.0), geom.get('tf',0.0), geom.get('tw',0.0)
-N,Vx,Vy,Mx,My = loads.get('N',0.0), loads.get('Vx',0.0), loads.get('Vy',0.0), loads.get('Mx',0.0), loads.get('My',0.0)
 
-# Seismic Ω0
-seis = cfg.get('seismic_on', False); omega0 = cfg.get('omega0',2.5)
-Vx_dem = apply_seismic_omega(Vx, seis, omega0)
-Vy_dem = apply_seismic_omega(Vy, seis, omega0)
-N_dem  = N
+# Cadena de chequeos incremental: sólo se recalculan las etapas cuyas entradas cambiaron
+ds = st.session_state.get('__design_session__')
+if ds is None: ds = st.session_state['__design_session__'] = DesignSession()
+ds.update(loads={k: float(loads.get(k,0.0)) for k in LOAD_COLS}, geom=geom, mat=mat, anc=anc, ass=ass, cfg=cfg)
+
+group = ds.get('group')
 
 # Plate thickness
-press = contact_pressures(N_dem, Mx, My, B, L)
+plate = ds.get('plate')
+t_req = float(plate['t_req'][0])
 if ass.get('plate_method','Local (DG1-like)').startswith('Local'):
-    t_req, strips = plate_t_local(press, bf, tf, tw, B, L, mat.get('fy_plate',250.0), False, 0.0, 0.0, geom.get('t_min',10.0))
+    strips = [{'strip':'flange (B)','m_mm':plate['m1'],'q':float(plate['q'][0]),'t_req':float(plate['t1'][0])},
+              {'strip':'web (L)','m_mm':plate['m2'],'q':float(plate['q'][0]),'t_req':float(plate['t2'][0])}]
 else:
-    t_req, fs = plate_t_full_section(N_dem, Mx, My, B, L, mat.get('fy_plate',250.0), ass.get('bearing_fc',0.7*mat.get('fc',28.0)), geom.get('t_min',10.0))
-    strips=[{'strip':'full-section','m_mm':fs.get('a_mm',0),'q':fs.get('q_max',0),'t_req':t_req}]
+    strips=[{'strip':'full-section','m_mm':plate['a_mm'],'q':float(plate['q'][0]),'t_req':t_req,'A_comp_mm2':float(plate['A_comp'][0])}]
+    if not plate['converged'][0]: st.error('Plate is unstable under this load (uplift not resisted by anchors).')
 
 t_use = max(t_req, t) if t>0 else t_req
 if geom.get('round_5',True): t_use = round_to_5(t_use)
@@ -44,49 +52,25 @@ st.write(f"Required t = {t_req:.1f} mm; Using t = **{t_use:.1f} mm**")
 st.dataframe(pd.DataFrame(strips))
 
 # Welds
-phi_w, Rn_mm = fillet_strength(mat.get('FEXX',483.0))
-w_req = required_fillet_size(Vx_dem, Vy_dem, Mx, My, d, bf, phi_w, Rn_mm)
+w_req = float(ds.get('weld')[0])
 st.subheader('Welds (fillet, perimetral continua)')
 st.write(f"Suggested weld size: **{w_req:.1f} mm**")
 
 # Anchors steel (per bolt)
-D_mm = anc.get('D_mm',24.0); grade = anc.get('grade','F1554 Gr.55')
-Nsa = steel_tension_capacity(grade, D_mm)
-Vsa = steel_shear_capacity(grade, D_mm)
-
-bolts = anc.get('bolts', [])
-Ndist = tension_distribution(max(0.0,N_dem), Mx, My, [type('B',(),b) for b in bolts]) if bolts else {}
-Vmode = ass.get('shear_mode','ELASTIC')
-Vydist= shear_distribution(Vy_dem, [type('B',(),b) for b in bolts], mode=Vmode) if bolts else {}
-Vxdist= shear_distribution(Vx_dem, [type('B',(),b) for b in bolts], mode=Vmode) if bolts else {}
-
-rows = []
-for b in bolts:
-    Nb = Ndist.get(b['id'],0.0)
-    Vb = max(abs(Vydist.get(b['id'],0.0)), abs(Vxdist.get(b['id'],0.0)))
-    if ass.get('interact','Linear').startswith('Linear'):
-        util = (Nb/max(Nsa,1e-9)) + (Vb/max(Vsa,1e-9))
-    elif '1.5' in ass.get('interact',''):
-        util = (Nb/max(Nsa,1e-9))**1.5 + (Vb/max(Vsa,1e-9))**1.5
-    else:
-        util = (Nb/max(Nsa,1e-9))**2 + (Vb/max(Vsa,1e-9))**2
-    rows.append({'bolt_id':b['id'],'Nb_kN':Nb,'Vb_kN':Vb,'phiNsa_kN':Nsa,'phiVsa_kN':Vsa,'util_steel':util})
-steel_df = pd.DataFrame(rows)
+Nb = ds.get('tension')[0]; Vb = ds.get('shear')[0]
+util = ds.get('steel')['util'][0]
+steel_df = pd.DataFrame({'bolt_id':group.ids,'Nb_kN':Nb,'Vb_kN':Vb,'phiNsa_kN':group.phiNsa,'phiVsa_kN':group.phiVsa,'util_steel':util}) if group.n else pd.DataFrame()
 
 st.subheader('Anchors – Steel (per bolt)')
 st.dataframe(steel_df)
 util_steel_max = steel_df['util_steel'].max() if not steel_df.empty else 0.0
 
 # Concrete (group-level simplified)
-fc = mat.get('fc',28.0); hef=anc.get('hef_mm',400.0); c_edge=anc.get('c_edge_mm',150.0)
-Ncb = tension_breakout_group(fc, hef, c_edge, max(1,len(bolts)))
-Np  = pullout(fc, D_mm)
-Vcb = shear_breakout(fc, hef, c_edge)
-Vcp = pryout_from_tension(Ncb)
-
-conc_summary = {'phiN_cb_kN': round(Ncb,2), 'phiN_pullout_kN': round(Np,2), 'phiV_cb_kN': round(Vcb,2), 'phiV_cp_kN': round(Vcp,2)}
+cap = ds.get('capacities')
+conc_summary = {'phiN_cb_kN': round(cap['Ncb'],2), 'phiN_pullout_kN': round(cap['Np'],2), 'phiV_cb_kN': round(cap['Vcb'],2), 'phiV_cp_kN': round(cap['Vcp'],2)}
 st.subheader('Anchors – Concrete (ACI 318-25, draft props)')
 st.json(conc_summary)
+st.caption('Recomputed: ' + (', '.join(ds.last_run) or 'nothing (all stages cached)'))
 
 # Governing
 gov = {'plate_t_mm': float(t_use), 'weld_mm': float(w_req), 'anchors_steel_util_max': float(util_steel_max)}
@@ -94,6 +78,92 @@ st.session_state['__i3_gov__'] = gov
 st.session_state['__i3_tables__'] = {'steel_df': steel_df}
 st.success('Results computed. Proceed to Report for export and PDF.')
 
+# Batch: todas las filas Joint × OutputCase del archivo SAP
+st.divider()
+st.subheader('Batch – every Joint × OutputCase')
+sap_df = st.session_state.get('sap',{}).get('df')
+if sap_df is None:
+    st.info('Upload a SAP2000 reactions file (page 03) to run the batch design.')
+else:
+    prune = st.checkbox('Skip dominated load cases before checking', value=False,
+                        help='Pruning costs more than the vectorized checks on most tables; use it only when the '
+                             'checks are the slow part. Ignored for anchor layouts that are not symmetric.')
+
+def batch_job(job, df, p, classes, prune, key, hashes, prev):
+    """Diseño por lotes en segundo plano: bloques de Joints (pool de procesos si hay más de un núcleo)."""
+    if hashes is None:
+        job.stage('Hashing'); hashes = case_hashes(df)
+    def design():
+        run = lambda sub: run_design(sub, p, classes, prune=prune, jobs=default_workers(), progress=job.callback('Design'))
+        # mismos parámetros que el lote anterior: sólo se rediseñan los Joints que cambiaron
+        res = design_incremental(df, prev['res'], prev['hashes'], run, hashes=hashes) if prev else run(df)
+        job.stage('Governing')
+        return {'res': res, 'governing': governing_by_mechanism(res), 'by_joint': governing_by_joint(res), 'key': key, 'hashes': hashes}
+    # mismo archivo y parámetros en otra sesión: se reutiliza su lote
+    return shared_cache().get_or_compute('design', value_hash(key, hashes), design)
+
+running = '__job_batch__' in st.session_state
+if sap_df is not None and st.button('Run batch design', disabled=running):
+    ov = st.session_state['sap'].get('override','ULS (recommended)')
+    classes = None if ov=='All' else [ov.split()[0]]
+    p = design_params(geom, mat, anc, ass, cfg)
+    key = value_hash(p, classes, prune)
+    prev = st.session_state.get('__batch__')
+    prev = prev if prev and prev.get('key') == key and prev.get('hashes') is not None else None
+    hashes = st.session_state['sap'].get('hashes')
+    st.session_state['__job_batch__'] = default_manager().submit(
+        'Batch design', batch_job, sap_df, p, classes, prune, key, hashes, prev,
+        stages=(() if hashes is not None else ('Hashing',)) + ('Design', 'Governing'))
+job = poll_job('__job_batch__', 'Batch design')
+if job is not None and job.status == 'done':
+    st.session_state['__batch__'] = job.result
+    st.session_state['sap'].setdefault('hashes', job.result['hashes'])
+batch = st.session_state.get('__batch__')
+if batch:
+    pr = batch['res'].attrs.get('prune')
+    rv = batch['res'].attrs.get('revision')
+    st.write(f"{len(batch['res'])} rows checked." + (f" {pr['rows_removed']} dominated rows skipped." if pr else '')
+             + (f" Incremental: {rv['joints_redesign']} of {rv['joints_total']} joints re-designed, "
+                f"{rv['rows_reused']} rows reused." if rv else ''))
+    st.json(batch['governing'])
+    st.dataframe(to_arrow_compatible(batch['by_joint'].reset_index()))
+
+# Optimizador: placa + anclajes de menor masa que cumple todos los casos
+st.divider()
+st.subheader('Optimizer – lightest passing plate & anchors')
+with st.expander('Search B, L, t, D, grade and bolt grid'):
+    oc = st.columns(3)
+    with oc[0]: o_edge = st.number_input('Bolt edge distance (mm)', value=100.0, step=5.0)
+    with oc[1]: o_span = st.number_input('Search span over column (mm)', value=600.0, step=50.0)
+    with oc[2]: o_jobs = st.number_input('Workers', min_value=1, max_value=64, value=default_workers())
+    if st.button('Run optimizer'):
+        if sap_df is not None:
+            ov = st.session_state['sap'].get('override','ULS (recommended)')
+            sub = sap_df if ov=='All' or 'ULS_SLS' not in sap_df.columns else sap_df.loc[sap_df['ULS_SLS']==ov.split()[0]]
+            opt_loads = loads_from_table(sub)
+        else:
+            opt_loads = {k: np.array([float(loads.get(k,0.0))]) for k in LOAD_COLS}
+        sp = default_space(geom, anc)
+        space = {'B': (sp['B'][0], sp['B'][0] + o_span), 'L': (sp['L'][0], sp['L'][0] + o_span), 'edge_mm': o_edge}
+        try:
+            st.session_state['__opt__'] = optimize(opt_loads, geom, mat, anc, ass, cfg, space, workers=int(o_jobs))
+        except ValueError as e:
+            st.session_state['__opt__'] = None; st.error(str(e))
+    opt = st.session_state.get('__opt__')
+    if opt and not opt['ok']:
+        st.error('No candidate in the search space passes all cases.')
+    elif opt:
+        msg = (f"B×L×t = {opt['B']:.0f}×{opt['L']:.0f}×{opt['t']:.0f} mm · {opt['rows']}×{opt['cols']} bolts Ø{opt['D_mm']:.0f} "
+               f"{opt['grade']} · {opt['mass_kg']:.1f} kg (plate {opt['plate_kg']:.1f}, bolts {opt['bolts_kg']:.1f})")
+        (st.success if opt['verified'] else st.warning)(msg + ('' if opt['verified'] else ' – not verified with the selected methods'))
+        st.json({'util': opt['util'], 'weld_mm': opt['weld_mm'], 'stats': opt['stats']})
+        if st.button('Apply to inputs'):
+            geom.update({'B': opt['B'], 'L': opt['L'], 't': opt['t']})
+            anc.update({'bolts': opt['bolts'], 'D_mm': opt['D_mm'], 'grade': opt['grade']})
+            st.success('Geometry and anchors updated.')
+
+sidebar_panel()
+
 # import streamlit as st
 # from engine.baseplate import compute_contact_pressures, plate_local_method
 # from engine.welds import fillet_weld_strength, suggest_weld_size
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from engine.plot_plan import render_plan_png
+from engine.plot_plan import render_plan_svg
+from engine.instrument import sidebar_panel
 
 if 'anchors' not in st.session_state: st.session_state['anchors']={}
 st.title('06 · Anchors Layout (Parametric & CSV)')
@@ -42,9 +43,9 @@ else:
 
 if bolts:
     st.session_state['anchors']['bolts']=bolts
-    img = render_plan_png(B, L, bolts, st.session_state['geom'].get('d',0.0), st.session_state['geom'].get('bf',0.0))
-    st.image(img, caption='Anchor plan (auto-dim to axes & edges)')
-    st.session_state['__plan_png__']=img
+    svg = render_plan_svg(B, L, bolts, st.session_state['geom'].get('d',0.0), st.session_state['geom'].get('bf',0.0))
+    st.image(svg, caption='Anchor plan (auto-dim to axes & edges)')
+    st.session_state['__plan_svg__']=svg
     st.success(f'{len(bolts)} bolts loaded.')
 else:
     st.info('Provide an anchors set. The plan view will render here.')
@@ -63,4 +64,6 @@ if st.session_state['anchors']['shear_key']:
     with ck[1]: st.session_state['anchors']['key_h']  = st.number_input('key h (mm)', value=300.0)
     with ck[2]: st.session_state['anchors']['key_hsl']= st.number_input('key embed (hsl, mm)', value=250.0)
     with ck[3]: st.session_state['anchors']['key_eg'] = st.number_input('grout gap eg (mm)', value=50.0)
-    with ck[4]: st.session_state['anchors']['key_tw'] = st.number_input('key tw (mm)', value=16.0)
\ No newline at end of file
+    with ck[4]: st.session_state['anchors']['key_tw'] = st.number_input('key tw (mm)', value=16.0)
+
+sidebar_panel()
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
-from engine.report import build_pdf
-from io import BytesIO
-import pandas as pd
+import os
+import tempfile
+from engine.report import build_pdf, build_report, joint_sections
+from engine.parallel import default_workers
+from engine.export import export_table, export_bundle, FORMATS
+from engine.jobs import default_manager, poll_job
+from engine.instrument import sidebar_panel
 
 st.title('07 · Report & Export')
 
+plan_svg = st.session_state.get('__plan_svg__')
 plan_png = st.session_state.get('__plan_png__')
 project = {
  'code': st.session_state.get('cfg',{}).get('code','AISC/ACI (US)'),
@@ -30,19 +35,64 @@ with col[0]:
                            file_name='anchors_steel.csv', mime='text/csv')
 with col[1]:
     if steel_df is not None:
-        bio = BytesIO()
-        with pd.ExcelWriter(bio, engine='openpyxl') as xw:
-            steel_df.to_excel(xw, index=False, sheet_name='Anchors_Steel')
-        st.download_button('⬇️ Export all (Excel)', data=bio.getvalue(), file_name='results_i3.xlsx',
+        with tempfile.TemporaryDirectory() as tmp:
+            path = export_table(steel_df, os.path.join(tmp, 'results_i3.xlsx'), sheet='Anchors_Steel')['path']
+            with open(path, 'rb') as f: xlsx = f.read()
+        st.download_button('⬇️ Export all (Excel)', data=xlsx, file_name='results_i3.xlsx',
                            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
+# Resultados completos del lote (página 05): escritos a disco por bloques
+batch = st.session_state.get('__batch__')
+if batch and len(batch['res']):
+    st.subheader(f"Full-project results ({len(batch['res']):,} rows)")
+    ec = st.columns(2)
+    with ec[0]: fmts = st.multiselect('Formats', list(FORMATS), default=['csv'])
+    with ec[1]: as_zip = st.checkbox('Bundle as .zip', value=True)
+    if fmts and st.button('Export results'):
+        out = tempfile.mkdtemp(prefix='baseplate_export_')
+        tables = {'results': batch['res'], 'by_joint': batch['by_joint']}
+        if as_zip or len(fmts) > 1:
+            files = [export_bundle(tables, os.path.join(out, 'results_i3.zip'), fmts, index=True)['path']]
+        else:
+            files = [export_table(t, os.path.join(out, f'{n}.{fmts[0]}'), index=True, sheet=n)['path'] for n, t in tables.items()]
+        st.session_state['__export__'] = files
+    for path in st.session_state.get('__export__') or []:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                st.download_button(f'⬇️ {os.path.basename(path)}', data=f, file_name=os.path.basename(path), key=f'__dl_{path}')
+
 if st.button('Generate PDF (Extended)'):
-    images={'plan_png': plan_png}
+    images={'plan_svg': plan_svg, 'plan_png': plan_png}
     tables={'governing': governing, 'sheets': {'Anchors – Steel (per bolt)': steel_df} if steel_df is not None else {}}
     pdf = build_pdf(project, images, tables)
     st.download_button('Download BasePlate_I3.pdf', data=pdf, file_name='BasePlate_I3.pdf', mime='application/pdf')
 
-    
+# Informe por Joint a partir del diseño por lotes (página 05)
+if batch and len(batch['res']):
+    st.divider()
+    jc = st.columns(2)
+    with jc[0]: top = st.number_input('Load cases per joint (0 = all)', min_value=0, value=0, step=10)
+    with jc[1]: jobs = st.number_input('Workers', min_value=1, max_value=64, value=default_workers(), key='__rep_jobs__')
+    def report_job(job, project, res, n, top, jobs, plan_svg, plan_png):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'BasePlate_joints.pdf')
+            cb = job.callback('Sections')
+            build_report(project, joint_sections(res, plan_svg=plan_svg, plan_png=plan_png, top=top), path,
+                         workers=jobs, progress=lambda k, _: cb(k, n), total=n)
+            job.stage('Saving')
+            with open(path, 'rb') as f: return f.read()
+    if st.button(f"Generate report by joint ({len(batch['by_joint'])} joints)", disabled='__job_report__' in st.session_state):
+        st.session_state['__job_report__'] = default_manager().submit(
+            'Report by joint', report_job, project, batch['res'], len(batch['by_joint']), int(top) or None, int(jobs),
+            plan_svg, plan_png, stages=('Sections', 'Saving'))
+    job = poll_job('__job_report__', 'Report by joint')
+    if job is not None and job.status == 'done': st.session_state['__joint_pdf__'] = job.result
+    if st.session_state.get('__joint_pdf__'):
+        st.download_button('Download BasePlate_joints.pdf', data=st.session_state['__joint_pdf__'],
+                           file_name='BasePlate_joints.pdf', mime='application/pdf')
+
+sidebar_panel()
+
 # import streamlit as st
 # from engine.report.report_pdf import build_pdf
 # st.title("07 · Report (PDF)")
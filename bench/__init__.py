@@ -0,0 +1 @@
+"""Benchmarks (python -m bench.run) y generador de reacciones SAP2000 sintéticas (bench.synth)."""
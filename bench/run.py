@@ -0,0 +1,168 @@
+"""
+Benchmarks de importación y cálculo:
+
+    python -m bench.run --rows 1e3 1e5                 # compara con bench/baseline.json
+    python -m bench.run --rows 1e3 1e5 --save-baseline # actualiza la referencia
+
+Por benchmark: tiempo (mejor de --repeat), filas/s y pico de memoria (tracemalloc,
+en una pasada aparte para no distorsionar el tiempo). Sale con código 1 si alguno
+es más lento que la referencia en más de --tolerance.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import warnings
+import tracemalloc
+import numpy as np
+import pandas as pd
+from .synth import synth_file, XLSX_MAX_ROWS
+from engine.io_sap import read_sap_table, classify_cases, CaseIndex
+from engine.steps import concurrent_envelope
+from engine.design import LOAD_COLS, loads_from_table, anchor_tension
+from engine.utils import classify_case
+from engine.baseplate import contact_pressures, contact_pressures_vec
+from engine.anchors.distribute import Bolt, tension_distribution, shear_distribution, tension_distribution_arr, shear_distribution_arr
+from engine.anchors.group import AnchorGroup
+from engine.plot_plan import render_plan_png, render_plan_svg, clear_plan_cache
+from engine.report import build_pdf, build_report
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SCALAR_MAX = 100_000  # las funciones por caso (escalares) se miden sobre una muestra
+
+BOLTS = [{'id': f'B{i+1}', 'x': x, 'y': y, 'hole_d': 30.0}
+         for i,(x,y) in enumerate([(-150,-200),(0,-200),(150,-200),(-150,200),(0,200),(150,200)])]
+
+def measure(fn, repeat: int=3, memory: bool=True) -> dict:
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    out = {'time_s': best}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(); out['peak_mb'] = tracemalloc.get_traced_memory()[1]/1024**2
+        finally:
+            tracemalloc.stop()
+    return out
+
+def _read(path):
+    with open(path, 'rb') as f: return read_sap_table(f)
+
+def cases(n: int, workdir: str, formats=('csv','xlsx')) -> dict:
+    """Benchmarks para un tamaño: nombre -> (filas procesadas, función sin argumentos)."""
+    out = {}
+    df = None
+    for fmt in formats:
+        if fmt == 'xlsx' and n > XLSX_MAX_ROWS: continue
+        path = synth_file(n, fmt, workdir)
+        out[f'read_sap_table[{fmt}]'] = (None, lambda p=path: _read(p))
+        if df is None: df = _read(path)
+    rows = len(df)
+    for k,(_,fn) in list(out.items()): out[k] = (rows, fn)
+    oc = df['OutputCase'].astype(str)
+    out['classify_case'] = (rows, lambda: oc.map(classify_case))
+    out['classify_cases'] = (rows, lambda: classify_cases(df['OutputCase']))
+    out['CaseIndex'] = (rows, lambda: CaseIndex(df))
+    out['concurrent_envelope'] = (rows, lambda: concurrent_envelope(df))
+    # mismas entradas que el diseño: preset por defecto, N compresión + y tracción de anclajes = anchor_tension(N)
+    L = loads_from_table(df)
+    N, Vx, Vy, Mx, My = (L[k] for k in LOAD_COLS)
+    Nt = anchor_tension(N)
+    m = min(rows, SCALAR_MAX)
+    out['contact_pressures'] = (m, lambda: [contact_pressures(N[i], Mx[i], My[i], 400.0, 500.0) for i in range(m)])
+    out['contact_pressures_vec'] = (rows, lambda: contact_pressures_vec(N, Mx, My, 400.0, 500.0))
+    bl = [Bolt(b['id'], b['x'], b['y'], b['hole_d']) for b in BOLTS]
+    out['tension_distribution'] = (m, lambda: [tension_distribution(Nt[i], Mx[i], My[i], bl) for i in range(m)])
+    out['shear_distribution'] = (m, lambda: [shear_distribution(Vx[i], bl) for i in range(m)])
+    grp = AnchorGroup.from_bolts(BOLTS)
+    out['tension_distribution_arr'] = (rows, lambda: tension_distribution_arr(Nt, Mx, My, grp))
+    out['shear_distribution_arr'] = (rows, lambda: shear_distribution_arr(Vx, grp))
+    return out
+
+def fixed_cases() -> dict:
+    """Benchmarks de coste fijo (no dependen del tamaño del archivo)."""
+    png = render_plan_png(400.0, 500.0, BOLTS, 300.0, 200.0)
+    table = pd.DataFrame({'Joint': np.arange(2000).astype(str), 'util_max': np.linspace(0, 1, 2000)})
+    project = {'B': 400.0, 'L': 500.0, 't': 25.0, 'd': 300.0, 'bf': 200.0, 'D': 24.0, 'hef': 400.0, 'grade': 'F1554 Gr.55'}
+    def plan(fn):  # sin caché: mide el dibujo, no la búsqueda LRU
+        clear_plan_cache(); return fn(400.0, 500.0, BOLTS, 300.0, 200.0)
+    svg = render_plan_svg(400.0, 500.0, BOLTS, 300.0, 200.0)
+    rows = table.iloc[:20].assign(OutputCase=[f'ULS{i:02d}' for i in range(20)])
+    sections = [{'joint': str(j), 'governing': {'plate_t': (20.0, 'ULS01')}, 'table': rows, 'plan_svg': svg} for j in range(50)]
+    report = os.path.join(tempfile.gettempdir(), 'bench_report.pdf')
+    return {'render_plan_png': (1, lambda: plan(render_plan_png)),
+            'render_plan_svg': (1, lambda: plan(render_plan_svg)),
+            'build_pdf': (len(table), lambda: build_pdf(project, {'plan_png': png}, {'governing': {}, 'sheets': {'By joint': table}})),
+            'build_report': (len(sections), lambda: build_report(project, sections, report, workers=1))}
+
+def run(sizes, workdir: str, repeat: int=3, memory: bool=True, formats=('csv','xlsx'), only=None, log=print) -> dict:
+    results = {}
+    groups = [('fixed', fixed_cases())] + [(str(n), None) for n in sizes]
+    for tag, cs in groups:
+        if cs is None: cs = cases(int(tag), workdir, formats)
+        for name, (rows, fn) in cs.items():
+            if only and not any(o in name for o in only): continue
+            key = name if tag == 'fixed' else f'{name}@{tag}'
+            r = measure(fn, repeat, memory)
+            r['rows'] = rows; r['rows_per_s'] = rows/r['time_s'] if r['time_s'] > 0 else float('inf')
+            results[key] = r
+            log(f"{key:40s} {r['time_s']*1e3:10.1f} ms {r['rows_per_s']:14,.0f} rows/s" +
+                (f" {r['peak_mb']:9.1f} MB" if 'peak_mb' in r else ''))
+    return results
+
+MIN_DELTA_S = 0.005  # diferencias menores son ruido de medida (benchmarks sub-milisegundo)
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float=MIN_DELTA_S) -> list:
+    """Benchmarks más lentos que la referencia en más de `tolerance` (fracción) y en más de `min_delta` s."""
+    bad = []
+    for k, r in results.items():
+        b = baseline.get('results', {}).get(k)
+        if b and r['time_s'] > b['time_s']*(1.0 + tolerance) and r['time_s'] - b['time_s'] > min_delta:
+            bad.append((k, b['time_s'], r['time_s']))
+    return bad
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog='python -m bench.run', description='Benchmarks de lectura SAP y cálculo.')
+    ap.add_argument('--rows', nargs='+', type=float, default=[1e3, 1e5], help='tamaños (filas), 1e3 .. 1e7')
+    ap.add_argument('--formats', nargs='+', choices=('csv','xlsx'), default=['csv','xlsx'])
+    ap.add_argument('--only', nargs='+', help='sólo benchmarks cuyo nombre contenga alguno de estos textos')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--no-memory', action='store_true', help='sin pasada de tracemalloc')
+    ap.add_argument('--workdir', default=os.environ.get('BENCH_DATA', 'bench_data'), help='carpeta de archivos sintéticos')
+    ap.add_argument('--baseline', default=BASELINE)
+    ap.add_argument('--save-baseline', action='store_true')
+    ap.add_argument('--tolerance', type=float, default=0.25, help='regresión si tiempo > referencia × (1 + tol)')
+    ap.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_S*1e3,
+                    help='diferencia absoluta mínima para contar como regresión')
+    ap.add_argument('--json', help='guarda los resultados en este archivo')
+    args = ap.parse_args(argv)
+
+    sizes = [int(n) for n in args.rows]
+    warnings.simplefilter('ignore', pd.errors.DtypeWarning)  # columnas mixtas por la fila de unidades
+    results = run(sizes, args.workdir, args.repeat, not args.no_memory, args.formats, args.only)
+    meta = {'python': platform.python_version(), 'machine': platform.machine(), 'numpy': np.__version__,
+            'date': time.strftime('%Y-%m-%d')}
+    if args.json:
+        with open(args.json, 'w') as f: json.dump({'meta': meta, 'results': results}, f, indent=2)
+    if args.save_baseline:
+        base = {'meta': meta, 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f: base['results'] = json.load(f).get('results', {})
+        base['results'].update(results)
+        with open(args.baseline, 'w') as f: json.dump(base, f, indent=2, sort_keys=True)
+        print(f'Referencia guardada en {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print('Sin referencia (usar --save-baseline).'); return 0
+    with open(args.baseline) as f: baseline = json.load(f)
+    bad = compare(results, baseline, args.tolerance, args.min_delta_ms/1e3)
+    for k, b, r in bad:
+        print(f'REGRESIÓN {k}: {b*1e3:.1f} ms -> {r*1e3:.1f} ms ({r/b - 1:+.0%})', file=sys.stderr)
+    return 1 if bad else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
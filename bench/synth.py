@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pandas as pd
+
+HEADERS = ['Joint','OutputCase','CaseType','StepType','StepNum','F1','F2','F3','M1','M2','M3']
+UNITS   = ['Text','Text','Text','Text','Unitless','KN','KN','KN','KN-m','KN-m','KN-m']
+XLSX_MAX_ROWS = 1_048_576 - 2  # hoja de Excel menos títulos y unidades
+WRITE_CHUNK = 1_000_000
+
+def case_plan(n_combos: int=40, th_steps: int=100) -> pd.DataFrame:
+    """
+    Casos por Joint: combinaciones ULS/SLS con envolvente (StepType Max/Min) y un
+    tiempo-historia 'TH-X' con StepType 'Step' y StepNum 1..th_steps.
+    """
+    rows = []
+    for i in range(n_combos):
+        name = f"{'ULS' if i < 0.7*n_combos else 'SLS'}{i+1:02d}"
+        for st in ('Max','Min'): rows.append((name, 'Combination', st, np.nan))
+    for k in range(th_steps): rows.append(('TH-X', 'LinModHist', 'Step', float(k+1)))
+    return pd.DataFrame(rows, columns=['OutputCase','CaseType','StepType','StepNum'])
+
+def synth_reactions(n_rows: int, n_combos: int=40, th_steps: int=100, seed: int=0) -> pd.DataFrame:
+    """
+    Tabla Joint Reactions sintética de ~n_rows filas (Joints completos):
+    gravedad por Joint, combinaciones con factores aleatorios y un tiempo-historia
+    senoidal amortiguado sobre la gravedad.
+    """
+    rng = np.random.default_rng(seed)
+    plan = case_plan(n_combos, th_steps)
+    per = len(plan)
+    nj = max(1, int(round(n_rows/per)))
+    g = rng.normal(-300.0, 120.0, nj)                                    # F3 de gravedad por Joint (kN)
+    amp = np.abs(rng.normal(0.0, 1.0, (nj, 6)))*np.array([40, 40, 80, 25, 25, 5])
+    fac = rng.uniform(0.6, 1.6, per); sgn = np.where(plan['StepType'].to_numpy() == 'Min', -1.0, 1.0)
+    t = np.nan_to_num(plan['StepNum'].to_numpy(dtype=float))
+    th = np.where(plan['StepType'].to_numpy() == 'Step', np.sin(0.3*t)*np.exp(-t/(0.6*max(th_steps,1))), 0.0)
+    lat = np.where(th != 0.0, th, sgn*rng.uniform(0.1, 1.0, per))        # parte lateral por caso
+    base = np.zeros((nj, per, 6))
+    base[:,:,2] = g[:,None]*fac[None,:]
+    base += amp[:,None,:]*lat[None,:,None]*rng.uniform(0.8, 1.2, (1, per, 6))
+    n = nj*per
+    out = {'Joint': np.repeat(np.arange(1, nj+1).astype(str), per),
+           'OutputCase': np.tile(plan['OutputCase'].to_numpy(), nj),
+           'CaseType': np.tile(plan['CaseType'].to_numpy(), nj),
+           'StepType': np.tile(plan['StepType'].to_numpy(), nj),
+           'StepNum': np.tile(plan['StepNum'].to_numpy(), nj)}
+    flat = base.reshape(n, 6).round(3)
+    out.update({c: flat[:,i] for i,c in enumerate(HEADERS[5:])})
+    return pd.DataFrame(out, columns=HEADERS)
+
+def write_csv(df: pd.DataFrame, path: str):
+    """Formato de exportación SAP: títulos, unidades y datos."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(HEADERS) + '\n' + ','.join(UNITS) + '\n')
+        for a in range(0, len(df), WRITE_CHUNK):
+            df.iloc[a:a+WRITE_CHUNK].to_csv(f, header=False, index=False)
+
+def write_xlsx(df: pd.DataFrame, path: str, sheet: str='Joint Reactions'):
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f'{len(df)} filas no caben en una hoja de Excel (máx. {XLSX_MAX_ROWS}).')
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    ws.append(HEADERS); ws.append(UNITS)
+    cols = [df[c].to_numpy() for c in HEADERS]
+    for r in zip(*cols):
+        ws.append([None if (isinstance(v, float) and v != v) else (v.item() if hasattr(v, 'item') else v) for v in r])
+    wb.save(path)
+
+def synth_file(n_rows: int, fmt: str='csv', workdir: str='bench_data', seed: int=0, **kw) -> str:
+    """Genera (o reutiliza) synthetic_<n>_<seed>.<fmt> en workdir y devuelve la ruta."""
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, f'synthetic_{n_rows}_{seed}.{fmt}')
+    if not os.path.exists(path):
+        df = synth_reactions(n_rows, seed=seed, **kw)
+        tmp = path + '.tmp'
+        (write_xlsx if fmt == 'xlsx' else write_csv)(df, tmp)
+        os.replace(tmp, path)
+    return path
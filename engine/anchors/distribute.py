@@ -1,6 +1,8 @@
 import numpy as np
 from dataclasses import dataclass
 from typing import List, Dict
+from .group import AnchorGroup
+from ..instrument import timed
 
 @dataclass
 class Bolt:
@@ -9,17 +11,11 @@ class Bolt:
     y: float
     hole_d: float
 
-def tension_distribution(N_kN: float, Mx_kNm: float, My_kNm: float, bolts: List[Bolt]):
+def tension_distribution(N_kN: float, Mx_kNm: float, My_kNm: float, bolts: List[Bolt], method: str='ELASTIC'):
     if not bolts: return {}
-    A = len(bolts)
-    x = np.array([b.x for b in bolts]); y=np.array([b.y for b in bolts])
-    # Coeficientes lineales iniciales y recorte a tracción
-    c = N_kN / max(A,1)
-    n = c + 0.0*x + 0.0*y
-    n = np.maximum(0.0, n)
-    s = n.sum()
-    if s>1e-9 and N_kN>0: n = n * (N_kN/s)
-    return {bolts[i].id: float(n[i]) for i in range(A)}
+    group = AnchorGroup.from_bolts([{'id':b.id,'x':b.x,'y':b.y} for b in bolts])
+    n = tension_distribution_arr(N_kN, Mx_kNm, My_kNm, group, method)[0]
+    return {bolts[i].id: float(n[i]) for i in range(len(bolts))}
 
 def shear_distribution(V_kN: float, bolts: List[Bolt], mode: str='ELASTIC'):
     if not bolts: return {}
@@ -39,4 +35,41 @@ def shear_distribution(V_kN: float, bolts: List[Bolt], mode: str='ELASTIC'):
         out = {b.id: 0.0 for b in bolts}
         out[bolts[far].id] = float(V_kN)
         return out
-    return {b.id: float(V_kN/n) for b in bolts}
\ No newline at end of file
+    return {b.id: float(V_kN/n) for b in bolts}
+
+# --- Versiones por lotes sobre AnchorGroup: filas = casos, columnas = pernos del grupo ---
+@timed()
+def tension_distribution_arr(N_kN, Mx_kNm, My_kNm, group: AnchorGroup, method: str='ELASTIC'):
+    """
+    Tracción por perno para N (tracción +) + Mx + My en todos los casos a la vez:
+    (casos × 5) @ (5 × pernos) con las columnas N, Mx+, Mx−, My+, My−.
+    method: 'ELASTIC' (placa rígida, Σd²) o 'PLASTIC' (lado traccionado uniforme).
+    Los pernos comprimidos quedan en 0 (la compresión la toma el hormigón).
+    """
+    N = np.nan_to_num(np.asarray(N_kN, dtype=float)).reshape(-1)
+    Mx = np.broadcast_to(np.nan_to_num(np.asarray(Mx_kNm, dtype=float)), N.shape)
+    My = np.broadcast_to(np.nan_to_num(np.asarray(My_kNm, dtype=float)), N.shape)
+    if group.n==0: return np.zeros((N.size, 0))
+    C = group.plastic_tension_coeffs if method.upper().startswith('PLASTIC') else group.elastic_tension_coeffs
+    loads = np.column_stack([N, np.maximum(Mx,0.0), np.maximum(-Mx,0.0), np.maximum(My,0.0), np.maximum(-My,0.0)])
+    return np.maximum(loads @ C, 0.0)
+
+def shear_weights(group: AnchorGroup, mode: str='ELASTIC') -> np.ndarray:
+    """Fracción del cortante que toma cada perno según el modo (suma 1)."""
+    n = group.n
+    ys = group.y
+    if mode.upper().startswith('ELASTIC'):
+        w = np.abs(ys)
+        if w.sum()<1e-9: w = np.ones(n)
+        return w / w.sum()
+    if mode.endswith('2') or mode.endswith('3'):
+        far = np.argmax(np.abs(ys)) if mode.endswith('2') else np.argmin(np.abs(ys))
+        w = np.zeros(n); w[far] = 1.0
+        return w
+    return np.full(n, 1.0/n)
+
+@timed()
+def shear_distribution_arr(V_kN, group: AnchorGroup, mode: str='ELASTIC'):
+    V = np.nan_to_num(np.asarray(V_kN, dtype=float)).reshape(-1)
+    if group.n==0: return np.zeros((V.size, 0))
+    return V[:,None] * shear_weights(group, mode)[None,:]
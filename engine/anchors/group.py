@@ -0,0 +1,112 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+from ..steel.bolts import steel_tension_capacity, steel_shear_capacity
+
+@dataclass(eq=False)
+class AnchorGroup:
+    """
+    Grupo de anclajes como arrays contiguos (un elemento por perno, mismo orden
+    en todos). Las propiedades geométricas se calculan una sola vez.
+    """
+    ids: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    hole_d: np.ndarray
+    diameter: np.ndarray
+    grade: np.ndarray
+
+    @classmethod
+    def from_bolts(cls, bolts: list, D_mm: float=24.0, grade: str='F1554 Gr.55'):
+        """Desde la lista de dicts de la página 06 ({'id','x','y','hole_d'[, 'D', 'grade']})."""
+        get = lambda k, dflt: [b.get(k, dflt) for b in bolts]
+        return cls(ids=np.array(get('id',''), dtype=object),
+                   x=np.array(get('x',0.0), dtype=float),
+                   y=np.array(get('y',0.0), dtype=float),
+                   hole_d=np.array(get('hole_d',30.0), dtype=float),
+                   diameter=np.array(get('D',D_mm), dtype=float),
+                   grade=np.array(get('grade',grade), dtype=object))
+
+    @property
+    def n(self) -> int:
+        return len(self.x)
+
+    @cached_property
+    def centroid(self):
+        return (float(self.x.mean()), float(self.y.mean())) if self.n else (0.0, 0.0)
+
+    @cached_property
+    def dx(self) -> np.ndarray:
+        return self.x - self.centroid[0]
+
+    @cached_property
+    def dy(self) -> np.ndarray:
+        return self.y - self.centroid[1]
+
+    @cached_property
+    def Ix(self) -> float:
+        """Σ dy² (mm², por unidad de área de perno)."""
+        return float((self.dy**2).sum())
+
+    @cached_property
+    def Iy(self) -> float:
+        return float((self.dx**2).sum())
+
+    @cached_property
+    def Ip(self) -> float:
+        return self.Ix + self.Iy
+
+    @cached_property
+    def Sx(self) -> float:
+        """Módulo resistente del grupo para Mx (mm): Ix / max|dy|."""
+        c = np.abs(self.dy).max() if self.n else 0.0
+        return self.Ix/c if c > 0 else 0.0
+
+    @cached_property
+    def Sy(self) -> float:
+        c = np.abs(self.dx).max() if self.n else 0.0
+        return self.Iy/c if c > 0 else 0.0
+
+    @cached_property
+    def symmetric(self) -> bool:
+        """Simétrico respecto a los ejes x e y de la placa (al reflejar coinciden posición, D y grado)."""
+        key = lambda xs, ys: sorted(zip((np.round(xs, 6) + 0.0).tolist(), (np.round(ys, 6) + 0.0).tolist(),
+                                        self.diameter.tolist(), [str(g) for g in self.grade]))
+        k = key(self.x, self.y)
+        return k == key(-self.x, self.y) and k == key(self.x, -self.y)
+
+    # --- Coeficientes de tracción: filas (N, Mx+, Mx−, My+, My−) × pernos, en kN por kN o kN·m ---
+    @cached_property
+    def elastic_tension_coeffs(self) -> np.ndarray:
+        """Placa rígida girando alrededor del centroide del grupo: T = N/n + Mx·dy/Σdy² + My·dx/Σdx²."""
+        C = np.zeros((5, self.n))
+        if self.n == 0: return C
+        C[0] = 1.0/self.n
+        if self.Ix > 0: C[1] = 1e3*self.dy/self.Ix; C[2] = -C[1]
+        if self.Iy > 0: C[3] = 1e3*self.dx/self.Iy; C[4] = -C[3]
+        return C
+
+    @cached_property
+    def plastic_tension_coeffs(self) -> np.ndarray:
+        """
+        Pernos del lado traccionado al mismo esfuerzo; la compresión se toma en la
+        línea de pernos opuesta más alejada (brazo conservador, sin ancho de placa).
+        """
+        C = np.zeros((5, self.n))
+        if self.n == 0: return C
+        C[0] = 1.0/self.n
+        for row, d, sgn in ((1, self.dy, 1.0), (2, self.dy, -1.0), (3, self.dx, 1.0), (4, self.dx, -1.0)):
+            dd = sgn*d
+            t = dd > 1e-9
+            if t.any():
+                z = dd[t].mean() - dd.min()
+                if z > 0: C[row, t] = 1e3/(z*t.sum())
+        return C
+
+    @cached_property
+    def phiNsa(self) -> np.ndarray:
+        return np.array([steel_tension_capacity(g, D) for g, D in zip(self.grade, self.diameter)], dtype=float)
+
+    @cached_property
+    def phiVsa(self) -> np.ndarray:
+        return np.array([steel_shear_capacity(g, D) for g, D in zip(self.grade, self.diameter)], dtype=float)
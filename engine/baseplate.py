@@ -1,4 +1,7 @@
 import math
+import numpy as np
+from .instrument import timed
+
 def contact_pressures(N_kN: float, Mx_kNm: float, My_kNm: float, B_mm: float, L_mm: float):
     if B_mm<=0 or L_mm<=0: return {'A':0,'sigma_max':0,'sigma_min':0,'Mx':0,'My':0}
     A = B_mm*L_mm
@@ -6,7 +9,7 @@ def contact_pressures(N_kN: float, Mx_kNm: float, My_kNm: float, B_mm: float, L_
     Iy = (L_mm*B_mm**3)/12.0
     MxN = (Mx_kNm or 0.0)*1e6
     MyN = (My_kNm or 0.0)*1e6
-    sigma0 = (N_kN or 0.0)*1e3 / A
+    sigma0 = (N_kN or 0.0)*1e3 / A / 1e3  # kN/mm2, igual que los términos de flexión
     sx = abs(MxN*(L_mm/2)/Ix)/1e3 if Ix>0 else 0.0
     sy = abs(MyN*(B_mm/2)/Iy)/1e3 if Iy>0 else 0.0
     smax = sigma0 + sx + sy
@@ -27,19 +30,141 @@ def plate_t_local(press, bf, tf, tw, B, L, fy_plate, use_stiff, h_stiff, t_stiff
     t_req_max = max(t1,t2,t_min_mm)
     return t_req_max, [{'strip':'flange (B)','m_mm':m1,'q':q,'t_req':t1}, {'strip':'web (L)','m_mm':m2,'q':q,'t_req':t2}]
 
-def plate_t_full_section(N_kN, Mx_kNm, My_kNm, B, L, fy_plate, bearing_fc_MPa, t_min_mm=10.0):
+def plate_t_full_section(N_kN, Mx_kNm, My_kNm, B, L, fy_plate, bearing_fc_MPa, t_min_mm=10.0, group=None, n_mod=8.0):
     if B<=0 or L<=0: return t_min_mm, {'a_mm':0,'q_max':0}
-    A = B*L
-    qmean = (N_kN*1e3)/A if A>0 else 0
-    q_max = min(qmean*3.0, bearing_fc_MPa/1000.0)  # simplificado
+    # presión máxima con zona comprimida real (eje neutro) en lugar de 3× la media
+    sol = bearing_solver(N_kN, Mx_kNm, My_kNm, B, L, group, n_mod)
+    q_max = min(float(np.nan_to_num(sol['sigma_max'][0])), bearing_fc_MPa/1000.0)  # kN/mm2
+    info = {'q_max':q_max, 'A_comp_mm2':float(sol['A_comp'][0]), 'converged':bool(sol['converged'][0])}
     phi = 0.9
-    if q_max<=0: return max(t_min_mm,10.0), {'a_mm':0,'q_max':q_max}
+    if q_max<=0: return max(t_min_mm,10.0), {'a_mm':0, **info}
     m = 0.3*min(B,L)  # brazo efectivo simple
     Mu = q_max*m**2/2.0
     t = ((6e3*Mu)/(phi*fy_plate))**0.5
     t = max(t, t_min_mm)
-    return t, {'a_mm':m,'q_max':q_max}
+    return t, {'a_mm':m, **info}
+
+# --- Versiones vectorizadas (arrays de casos; misma formulación que las escalares) ---
+def contact_pressures_vec(N_kN, Mx_kNm, My_kNm, B_mm: float, L_mm: float):
+    N = np.asarray(N_kN, dtype=float)
+    if B_mm<=0 or L_mm<=0:
+        z = np.zeros_like(N)
+        return {'A':0,'sigma_max':z,'sigma_min':z.copy()}
+    A = B_mm*L_mm
+    Ix = (B_mm*L_mm**3)/12.0
+    Iy = (L_mm*B_mm**3)/12.0
+    sigma0 = np.nan_to_num(N) / A  # kN/mm2
+    sx = np.abs(np.nan_to_num(np.asarray(Mx_kNm, dtype=float))*1e6*(L_mm/2)/Ix)/1e3
+    sy = np.abs(np.nan_to_num(np.asarray(My_kNm, dtype=float))*1e6*(B_mm/2)/Iy)/1e3
+    return {'A':A,'sigma_max':sigma0 + sx + sy,'sigma_min':sigma0 - sx - sy,'Ix':Ix,'Iy':Iy}
+
+def plate_t_local_vec(sigma_max, bf, B, L, fy_plate, use_stiff, t_min_mm=10.0):
+    q = np.maximum(np.asarray(sigma_max, dtype=float), 0.0)
+    rfac = 0.7 if use_stiff else 1.0
+    m1 = max(0.0, (B - bf)/2.0) * rfac
+    m2 = max(0.0, (L - (0.8*bf))/2.0) * rfac
+    phi = 0.9
+    # t ∝ m·sqrt(q): el voladizo mayor gobierna en todas las filas
+    m = max(m1, m2)
+    t = np.sqrt((6e3*q*m**2/2.0)/(phi*fy_plate)) if m>0 else np.zeros_like(q)
+    return np.maximum(t, t_min_mm)
+
+def plate_t_full_section_vec(N_kN, Mx_kNm, My_kNm, B, L, fy_plate, bearing_fc_MPa, t_min_mm=10.0, group=None, n_mod=8.0, sol=None):
+    N = np.nan_to_num(np.asarray(N_kN, dtype=float))
+    if B<=0 or L<=0: return np.full_like(N, t_min_mm)
+    if sol is None: sol = bearing_solver(N, Mx_kNm, My_kNm, B, L, group, n_mod)
+    q_max = np.minimum(np.nan_to_num(sol['sigma_max']), bearing_fc_MPa/1000.0)
+    phi = 0.9
+    m = 0.3*min(B,L)
+    t = np.sqrt((6e3*np.maximum(q_max,0.0)*m**2/2.0)/(phi*fy_plate))
+    t = np.maximum(t, t_min_mm)
+    return np.where(q_max>0, t, max(t_min_mm,10.0))
+
+
+# --- Eje neutro biaxial: hormigón sólo compresión + anclajes sólo tracción ---
+@timed()
+def bearing_solver(N_kN, Mx_kNm, My_kNm, B_mm: float, L_mm: float, group=None, n_mod: float=8.0,
+                   grid: int=24, max_iter: int=40, tol: float=1e-6, chunk: int=8192):
+    """
+    Placa rígida sobre hormigón (sólo compresión) con anclajes (sólo tracción,
+    área transformada n_mod·A_t), vectorizado sobre casos.
+    Convenio: N compresión +; Mx > 0 tracciona el lado +y, My > 0 el lado +x
+    (como anchors.distribute). Incógnitas del plano de tensiones
+    u(x,y) = a − b·y − c·x (MPa), con arranque en la solución lineal.
+    Equilibrio = gradiente de una función convexa -> Newton amortiguado.
+    Devuelve sigma_max (kN/mm2), A_comp (mm2), T (casos × pernos, kN) y converged.
+    """
+    from .steel.bolts import thread_area
+    N = np.atleast_1d(np.nan_to_num(np.asarray(N_kN, dtype=float)))
+    Mx = np.broadcast_to(np.nan_to_num(np.asarray(Mx_kNm, dtype=float)), N.shape).ravel()
+    My = np.broadcast_to(np.nan_to_num(np.asarray(My_kNm, dtype=float)), N.shape).ravel()
+    N = N.ravel(); m = N.size
+    na = group.n if group is not None else 0
+    out = {'sigma_max': np.full(m, np.nan), 'A_comp': np.zeros(m), 'T': np.zeros((m, na)), 'converged': np.zeros(m, bool)}
+    if B_mm<=0 or L_mm<=0 or m==0: return out
+
+    A = B_mm*L_mm; Ix = B_mm*L_mm**3/12.0; Iy = L_mm*B_mm**3/12.0
+    xs = (np.arange(grid)+0.5)*B_mm/grid - B_mm/2
+    ys = (np.arange(grid)+0.5)*L_mm/grid - L_mm/2
+    X, Y = (g.ravel() for g in np.meshgrid(xs, ys))
+    dA = A/grid**2
+    Phi = np.column_stack([np.ones_like(X), -Y, -X])                 # celdas (G,3)
+    PP = (Phi[:,:,None]*Phi[:,None,:]).reshape(-1,9)*dA
+    corners = np.array([[1.0, -sy*L_mm/2, -sx*B_mm/2] for sx in (-1,1) for sy in (-1,1)])
+    if na:
+        k = n_mod*np.array([thread_area(D) for D in group.diameter])  # mm2 transformados
+        Pa = np.column_stack([np.ones(na), -group.y, -group.x])
+        PPa = (Pa[:,:,None]*Pa[:,None,:]).reshape(-1,9)*k[:,None]
+    rscale = np.array([A, Ix/(L_mm/2), Iy/(B_mm/2)])                 # 1 MPa repartido en la placa
+    eye = np.eye(3)
+
+    def state(P, F):
+        u = P @ Phi.T
+        s = np.maximum(u, 0.0)
+        R = (s @ Phi)*dA - F
+        obj = 0.5*(s**2).sum(axis=1)*dA - (P*F).sum(axis=1)
+        ta = None
+        if na:
+            ta = k*np.maximum(-(P @ Pa.T), 0.0)
+            R -= ta @ Pa
+            obj += 0.5*(ta**2/k).sum(axis=1)
+        return u, R, obj, ta
 
+    for a in range(0, m, chunk):
+        sl = slice(a, min(a+chunk, m))
+        F = np.column_stack([N[sl]*1e3, Mx[sl]*1e6, My[sl]*1e6])     # N, N·mm
+        P = np.column_stack([F[:,0]/A, F[:,1]/Ix, F[:,2]/Iy])        # solución lineal (contacto total)
+        u, R, obj, ta = state(P, F)
+        done = np.zeros(len(P), bool)
+        for _ in range(max_iter):
+            done |= np.all(np.abs(R) <= tol*rscale, axis=1)
+            act = ~done
+            if not act.any(): break
+            J = ((u[act] > 0) @ PP)
+            if na: J = J + ((ta[act] > 0) @ PPa)
+            J = J.reshape(-1,3,3)
+            J += eye*(1e-12*np.trace(J, axis1=1, axis2=2)[:,None,None] + 1e-30)
+            d = np.linalg.solve(J, R[act][:,:,None])[:,:,0]
+            # búsqueda lineal por caso: aceptar el primer paso que baje la energía
+            step = np.ones(act.sum()); acc = np.zeros(act.sum(), bool)
+            Pa_, Fa = P[act], F[act]
+            newP = Pa_.copy()
+            for _ in range(12):
+                trial = Pa_ - step[:,None]*d
+                _, _, o, _ = state(trial, Fa)
+                ok = ~acc & (o <= obj[act] + 1e-12*np.abs(obj[act]))
+                newP[ok] = trial[ok]; acc |= ok
+                if acc.all(): break
+                step[~acc] *= 0.5
+            P[act] = newP
+            u, R, obj, ta = state(P, F)
+        done |= np.all(np.abs(R) <= tol*rscale, axis=1)
+        smax = np.maximum((P @ corners.T).max(axis=1), 0.0)/1e3
+        out['sigma_max'][sl] = np.where(done, smax, np.nan)
+        out['A_comp'][sl] = (u > 0).sum(axis=1)*dA
+        if na: out['T'][sl] = np.where(done[:,None], ta/1e3, np.nan)
+        out['converged'][sl] = done
+    return out
 
 # import math
 # from typing import Dict
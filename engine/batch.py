@@ -0,0 +1,223 @@
+"""
+Diseño por lotes sin Streamlit:
+
+    python -m engine.batch proyecto.json modelo_r3/ otra.xlsx -o resultados --format parquet csv --pdf --jobs 4
+
+Entradas: el JSON de 'Save project' (página 01) y uno o más archivos SAP2000
+(o carpetas con .csv/.xls/.xlsx/.xlsm). Por archivo escribe <nombre>_results,
+<nombre>_by_joint, <nombre>_governing.json y opcionalmente <nombre>.pdf (resumen)
+y <nombre>_joints.pdf (--joint-report: una sección por Joint).
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+from collections import Counter
+import numpy as np
+import pandas as pd
+from .cache import read_sap_table_cached
+from .io_sap import read_sap_table, key_codes
+from .design import design_params, design_table, governing_by_mechanism, governing_by_joint
+from .steps import read_sap_concurrent
+from .parallel import iter_design_parallel, joint_blocks, BLOCK_ROWS
+from .export import export_table, export_bundle, FORMATS
+from .revision import case_hashes, design_incremental
+from .session import value_hash
+from .utils import load_project_json
+
+SAP_EXT = ('.csv', '.xls', '.xlsx', '.xlsm')
+
+class Progress:
+    """Barra de progreso de texto en stderr (sin dependencias)."""
+    def __init__(self, label: str, enabled: bool=True, width: int=30):
+        self.label, self.enabled, self.width = label, enabled and sys.stderr.isatty(), width
+        self.t0 = time.perf_counter()
+
+    def __call__(self, done: int, total: int):
+        if not self.enabled or not total: return
+        k = int(self.width*done/total)
+        sys.stderr.write(f"\r{self.label} [{'#'*k}{'.'*(self.width-k)}] {done}/{total} {time.perf_counter()-self.t0:.1f}s")
+        if done >= total: sys.stderr.write('\n')
+        sys.stderr.flush()
+
+def expand_inputs(paths: list) -> list:
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(f for f in glob.glob(os.path.join(p, '*')) if f.lower().endswith(SAP_EXT))
+        else:
+            out.append(p)
+    return out
+
+def output_names(files: list) -> list:
+    """Nombre base de las salidas por archivo: el stem si es único en el lote; si no, stem_ext (x.csv y x.xlsx
+    -> x_csv, x_xlsx) y, si aún choca (mismo archivo en otra carpeta), sufijo _2, _3…"""
+    stems = [os.path.splitext(os.path.basename(f))[0] for f in files]
+    count, used, out = Counter(s.lower() for s in stems), set(), []
+    for f, stem in zip(files, stems):
+        name = stem if count[stem.lower()] == 1 else f"{stem}_{os.path.splitext(f)[1].lstrip('.').lower()}"
+        k, cand = 1, name
+        while cand.lower() in used: k += 1; cand = f'{name}_{k}'
+        used.add(cand.lower()); out.append(cand)
+    return out
+
+def load_project(path: str) -> dict:
+    if path.lower().endswith('.bpz'):  # proyecto completo: sólo se usan las entradas (las tablas no se leen)
+        from .project import open_project
+        return open_project(path)
+    with open(path, 'rb') as f:
+        state = load_project_json(f.read())
+    if not state: raise ValueError(f'{path}: JSON de proyecto vacío o inválido.')
+    return state
+
+def project_params(state: dict) -> dict:
+    return design_params(state.get('geom',{}), state.get('mat',{}), state.get('anchors',{}),
+                         state.get('ass',{}), state.get('cfg',{}))
+
+def read_reactions(path: str, cache: bool=True) -> pd.DataFrame:
+    with open(path, 'rb') as f:
+        if cache: return read_sap_table_cached(f)
+        return read_sap_table(f)
+
+def run_design(df: pd.DataFrame, p: dict, classes=None, prune: bool=False, jobs: int=1, progress=None) -> pd.DataFrame:
+    """design_table por bloques de Joints (jobs = 1) o en un pool de procesos (jobs > 1)."""
+    if jobs > 1:
+        parts = [blk for _, blk in iter_design_parallel(df, p, classes=classes, workers=jobs, prune=prune, progress=progress)]
+    else:
+        if classes and 'ULS_SLS' in df.columns:
+            df = df.loc[df['ULS_SLS'].isin(classes)]
+        codes = key_codes(df['Joint']) if 'Joint' in df.columns else np.zeros(len(df), dtype=int)
+        order = np.argsort(codes, kind='stable')
+        df = df.iloc[order]
+        blocks = joint_blocks(codes[order], BLOCK_ROWS)
+        parts, info = [], {'rows_in': 0, 'rows_kept': 0, 'rows_removed': 0}
+        for i, (a, b) in enumerate(blocks):
+            r = design_table(df.iloc[a:b], p, prune=prune)
+            for k,v in r.attrs.get('prune', {}).items(): info[k] += v
+            parts.append(r)
+            if progress: progress(i + 1, len(blocks))
+        if parts and prune: parts[0].attrs['prune'] = info
+    if not parts: return pd.DataFrame()
+    res = pd.concat(parts)
+    if 'prune' in parts[0].attrs: res.attrs['prune'] = parts[0].attrs['prune']
+    return res
+
+def write_table(df: pd.DataFrame, base: str, fmt: str, sheet: str='Results') -> list:
+    """Escribe base.<fmt> por bloques; en xlsx reparte en varias hojas si supera el límite de filas."""
+    return [export_table(df, f'{base}.{fmt}', fmt, index=True, sheet=sheet)['path']]
+
+def report_project(state: dict, by_joint: pd.DataFrame) -> dict:
+    geom, anc = state.get('geom',{}), state.get('anchors',{})
+    return {'code': state.get('cfg',{}).get('code','AISC/ACI (US)'), 'units': state.get('cfg',{}).get('units','SI'),
+               'B': geom.get('B',0.0), 'L': geom.get('L',0.0), 't': geom.get('t',0.0) or float(by_joint['t_req_mm'].max() if len(by_joint) else 0.0),
+               'd': geom.get('d',0.0), 'bf': geom.get('bf',0.0),
+               'D': anc.get('D_mm',0.0), 'hef': anc.get('hef_mm',0.0), 'grade': anc.get('grade','')}
+
+def write_pdf(state: dict, governing: dict, by_joint: pd.DataFrame, path: str):
+    from .report import build_pdf
+    from .plot_plan import render_plan_svg
+    project, anc = report_project(state, by_joint), state.get('anchors',{})
+    svg = render_plan_svg(project['B'], project['L'], anc.get('bolts',[]), project['d'], project['bf'])
+    pdf = build_pdf(project, {'plan_svg': svg}, {'governing': governing, 'sheets': {'Governing by joint': by_joint.reset_index()}})
+    with open(path, 'wb') as f: f.write(pdf)
+    return [path]
+
+def write_joint_report(state: dict, res: pd.DataFrame, by_joint: pd.DataFrame, path: str, jobs: int=1, progress=None):
+    from .report import build_report, joint_sections
+    from .plot_plan import render_plan_svg
+    project, anc = report_project(state, by_joint), state.get('anchors',{})
+    svg = render_plan_svg(project['B'], project['L'], anc.get('bolts',[]), project['d'], project['bf'])
+    build_report(project, joint_sections(res, plan_svg=svg), path, workers=jobs, progress=progress, total=len(by_joint))
+    return [path]
+
+def previous_run(base: str, key: str):
+    """(resultados, hashes) de la corrida anterior en la carpeta de salida, si usó los mismos parámetros."""
+    try:
+        with open(f'{base}_governing.json', encoding='utf-8') as f:
+            if json.load(f).get('params_hash') != key: return None
+        return pd.read_parquet(f'{base}_results.parquet'), pd.read_parquet(f'{base}_hashes.parquet')['hash']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def process_file(path: str, state: dict, p: dict, args, stem: str=None) -> dict:
+    t0 = time.perf_counter()
+    stem = stem or os.path.splitext(os.path.basename(path))[0]
+    base = os.path.join(args.out, stem)
+    df = read_sap_concurrent(path) if args.reduce == 'concurrent' else read_reactions(path, cache=not args.no_cache)
+    classes = None if args.classes == ['All'] else args.classes
+    design = lambda sub: run_design(sub, p, classes, prune=args.prune, jobs=args.jobs,
+                                    progress=Progress(stem, not args.quiet))
+    key = value_hash(p, classes, args.prune, args.reduce)
+    hashes = case_hashes(df) if args.incremental else None
+    prev = previous_run(base, key) if args.incremental else None
+    res = design_incremental(df, prev[0], prev[1], design, hashes=hashes) if prev else design(df)
+    gov = governing_by_mechanism(res)
+    by_joint = governing_by_joint(res)
+    files = []
+    if args.zip:
+        files.append(export_bundle({f'{stem}_results': res, f'{stem}_by_joint': by_joint}, f'{base}.zip', args.format, index=True)['path'])
+    else:
+        for fmt in args.format:
+            files += write_table(res, f'{base}_results', fmt)
+            files += write_table(by_joint, f'{base}_by_joint', fmt, sheet='By_Joint')
+    with open(f'{base}_governing.json', 'w', encoding='utf-8') as f:
+        json.dump({'file': path, 'source_units': df.attrs.get('source_units'), 'rows': len(res),
+                   'prune': res.attrs.get('prune'), 'revision': res.attrs.get('revision'), 'params_hash': key,
+                   'governing': gov}, f, indent=2)
+    files.append(f'{base}_governing.json')
+    if args.incremental:
+        hashes.to_frame().to_parquet(f'{base}_hashes.parquet'); files.append(f'{base}_hashes.parquet')
+        if args.zip or 'parquet' not in args.format: files += write_table(res, f'{base}_results', 'parquet')
+    if args.pdf: files += write_pdf(state, gov, by_joint, f'{base}.pdf')
+    if args.joint_report:
+        files += write_joint_report(state, res, by_joint, f'{base}_joints.pdf', args.jobs,
+                                    Progress(f'{stem} pdf', not args.quiet))
+    util = float(res['util_max'].max()) if len(res) else 0.0
+    return {'file': path, 'rows': len(res), 'util_max': util, 'time_s': time.perf_counter() - t0, 'outputs': files,
+            'revision': res.attrs.get('revision')}
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog='python -m engine.batch', description='Diseño por lotes de placas base desde exportaciones SAP2000.')
+    ap.add_argument('project', help='JSON de proyecto (página 01, Save project)')
+    ap.add_argument('sap', nargs='+', help='archivos SAP2000 (.csv/.xls/.xlsx/.xlsm) o carpetas')
+    ap.add_argument('-o', '--out', default='results', help='carpeta de salida (default: results)')
+    ap.add_argument('-f', '--format', nargs='+', choices=FORMATS, default=['parquet'], help='formatos de tabla')
+    ap.add_argument('--zip', action='store_true', help='tablas en un solo <nombre>.zip en vez de archivos sueltos')
+    ap.add_argument('--pdf', action='store_true', help='genera un PDF por archivo')
+    ap.add_argument('--joint-report', action='store_true', help='PDF con una sección por Joint (usa --jobs procesos)')
+    ap.add_argument('-j', '--jobs', type=int, default=1, help='procesos en paralelo (default: 1)')
+    ap.add_argument('--classes', nargs='+', default=['ULS'], help="clases ULS_SLS a diseñar (ULS, SLS, UNKNOWN o All)")
+    ap.add_argument('--prune', action='store_true',
+                    help='descarta antes los casos dominados (sólo compensa si los chequeos cuestan más que la poda)')
+    ap.add_argument('--reduce', choices=('none', 'concurrent'), default='none',
+                    help='concurrent: reduce pasos multi-step/tiempo-historia a la envolvente concurrente leyendo por bloques')
+    ap.add_argument('--no-cache', action='store_true', help='no usa la caché Parquet de lecturas SAP')
+    ap.add_argument('--incremental', action='store_true',
+                    help='compara con la corrida anterior en --out (hash por Joint/OutputCase) y rediseña sólo los Joints que cambiaron')
+    ap.add_argument('-q', '--quiet', action='store_true', help='sin barra de progreso')
+    return ap
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    state = load_project(args.project)
+    p = project_params(state)
+    os.makedirs(args.out, exist_ok=True)
+    files = expand_inputs(args.sap)
+    if not files:
+        print('No hay archivos SAP de entrada.', file=sys.stderr); return 2
+    status = 0
+    for path, stem in zip(files, output_names(files)):
+        try:
+            r = process_file(path, state, p, args, stem)
+        except Exception as e:
+            print(f'ERROR {path}: {e}', file=sys.stderr); status = 1
+            continue
+        rv = r['revision']
+        inc = f", {rv['joints_redesign']}/{rv['joints_total']} Joints rediseñados" if rv else ''
+        print(f"{r['file']}: {r['rows']} filas{inc}, util_max={r['util_max']:.3f}, {r['time_s']:.1f}s -> {', '.join(r['outputs'])}")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+import io
+import os
+import sys
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .io_sap import read_sap_table, to_category, PARSER_VERSION, SAP_NUM
+from .instrument import timed
+
+CACHE_DIR = os.environ.get('BASEPLATE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'baseplate_i3'))
+CACHE_MAX_BYTES = int(os.environ.get('BASEPLATE_CACHE_MAX_MB', '2048')) * 1024**2
+# caché compartida entre sesiones (memoria del proceso y, si se indica carpeta, disco)
+SHARED_MAX_BYTES = int(os.environ.get('BASEPLATE_SHARED_CACHE_MB', '512')) * 1024**2
+SHARED_DISK_DIR = os.environ.get('BASEPLATE_SHARED_CACHE_DIR') or None
+SHARED_DISK_MAX_BYTES = int(os.environ.get('BASEPLATE_SHARED_CACHE_DISK_MB', '4096')) * 1024**2
+
+def content_hash(data: bytes, *extra) -> str:
+    h = hashlib.sha256(data)
+    for e in extra: h.update(b'\0' + str(e).encode('utf-8'))
+    return h.hexdigest()
+
+def normalize_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Forma tipada de la tabla SAP para guardar en Parquet:
+    F1..M3 float64, Joint/OutputCase/ULS_SLS categóricas, resto de object -> str.
+    """
+    df = df.copy()
+    for c in df.columns:
+        if c in SAP_NUM:
+            df[c] = pd.to_numeric(df[c], errors='coerce').astype('float64')
+        elif c in ('Joint','OutputCase','ULS_SLS'):
+            df[c] = to_category(df[c])
+        elif df[c].dtype == 'object':
+            df[c] = df[c].astype(str)
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+class TableCache:
+    """
+    Caché en disco de DataFrames (un Parquet por clave) con expulsión LRU
+    por tamaño total. La fecha de modificación del archivo hace de 'último uso'.
+    """
+    EXT = '.parquet'
+    ERRORS = (FileNotFoundError, OSError, ValueError)
+
+    def __init__(self, root: str=CACHE_DIR, max_bytes: int=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f'{key}{self.EXT}')
+
+    def _load(self, path: str):
+        return pd.read_parquet(path, memory_map=True)
+
+    def _dump(self, df, path: str):
+        df.to_parquet(path, index=False)
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            df = self._load(path)
+        except self.ERRORS:
+            self.stats['misses'] += 1
+            return None
+        os.utime(path)  # marca de uso reciente
+        self.stats['hits'] += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame):
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self._dump(df, tmp)
+        os.replace(tmp, path)  # atómico: otro proceso nunca ve un archivo a medias
+        self.stats['writes'] += 1
+        self._evict()
+
+    def _entries(self):
+        out = []
+        for f in os.listdir(self.root):
+            if f.endswith(self.EXT):
+                st = os.stat(os.path.join(self.root, f))
+                out.append((st.st_mtime, st.st_size, f))
+        return sorted(out)
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(e[1] for e in entries)
+        for _, size, f in entries[:-1]:  # nunca expulsar la entrada recién escrita
+            if total <= self.max_bytes: break
+            try:
+                os.remove(os.path.join(self.root, f))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        for _, _, f in self._entries():
+            os.remove(os.path.join(self.root, f))
+
+    def info(self) -> dict:
+        entries = self._entries()
+        n = self.stats['hits'] + self.stats['misses']
+        return {**self.stats, 'hit_rate': (self.stats['hits']/n if n else 0.0),
+                'entries': len(entries), 'bytes': sum(e[1] for e in entries), 'max_bytes': self.max_bytes}
+
+class PickleCache(TableCache):
+    """Igual que TableCache para cualquier objeto serializable con pickle (resultados, imágenes)."""
+    EXT = '.pkl'
+    ERRORS = TableCache.ERRORS + (EOFError, pickle.UnpicklingError, AttributeError, ImportError)
+
+    def _load(self, path: str):
+        with open(path, 'rb') as f: return pickle.load(f)
+
+    def _dump(self, obj, path: str):
+        with open(path, 'wb') as f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# --- Caché compartida del proceso ---
+def nbytes(v) -> int:
+    """Tamaño aproximado en memoria (DataFrame, arrays, bytes, contenedores)."""
+    if isinstance(v, pd.DataFrame): return int(v.memory_usage(index=True, deep=False).sum())
+    if isinstance(v, pd.Series): return int(v.memory_usage(index=True, deep=False))
+    if isinstance(v, np.ndarray): return int(v.nbytes)
+    if isinstance(v, (bytes, bytearray, str)): return len(v)
+    if isinstance(v, dict): return sum(nbytes(x) for x in v.values()) + 64*len(v)
+    if isinstance(v, (list, tuple)): return sum(nbytes(x) for x in v) + 8*len(v)
+    return sys.getsizeof(v)
+
+def enable_copy_on_write():
+    """
+    Para el servidor de Streamlit (app/app.py y páginas que leen shared_cache()): los
+    DataFrame de la caché se entregan como copias superficiales, que sólo son independientes
+    con copy-on-write. pandas >= 3 siempre lo usa; en 2.x se activa aquí, para todo el proceso.
+    """
+    if int(pd.__version__.split('.')[0]) < 3: pd.set_option('mode.copy_on_write', True)
+
+def _freeze(v, copy: bool=False):
+    """
+    Valor que se comparte entre sesiones: arrays de sólo lectura. Con copy=True se congela
+    una copia (los arrays escribibles del llamante no cambian; DataFrame: copia superficial).
+    """
+    if isinstance(v, np.ndarray):
+        if copy and v.flags.writeable: v = v.copy()
+        v.flags.writeable = False
+    elif isinstance(v, (pd.DataFrame, pd.Series)):
+        if copy: v = v.copy(deep=False)
+    elif isinstance(v, dict):
+        if copy: return {k: _freeze(x, True) for k, x in v.items()}
+        for x in v.values(): _freeze(x)
+    elif isinstance(v, (list, tuple)):
+        if copy: return (list if isinstance(v, list) else tuple)(_freeze(x, True) for x in v)
+        for x in v: _freeze(x)
+    return v
+
+def _share(v):
+    """Lo que recibe cada sesión: DataFrame/Series como copia superficial (añadir o asignar columnas no toca
+    la de la caché; con copy-on-write los datos se copian sólo al escribir); arrays tal cual (sólo lectura)."""
+    if isinstance(v, (pd.DataFrame, pd.Series)): return v.copy(deep=False)
+    if isinstance(v, dict): return {k: _share(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)): return (list if isinstance(v, list) else tuple)(_share(x) for x in v)
+    return v
+
+_MISSING = object()
+
+class SharedCache:
+    """
+    Caché LRU del proceso para todas las sesiones de Streamlit, por espacio de nombres
+    ('sap', 'plan', 'stage', 'design'...) y clave = hash del contenido de las entradas.
+    Límite por bytes (nbytes), acceso con lock, métricas por espacio y, opcional, un
+    segundo nivel en disco (PickleCache) compartido con otros procesos. get_or_compute
+    agrupa las peticiones simultáneas de la misma clave: el trabajo se hace una vez.
+    """
+    def __init__(self, max_bytes: int=SHARED_MAX_BYTES, disk_dir: str=SHARED_DISK_DIR,
+                 disk_max_bytes: int=SHARED_DISK_MAX_BYTES, disk_namespaces=None):
+        self.max_bytes = max_bytes
+        self._d = OrderedDict()  # (ns, key) -> (valor, bytes)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._inflight = {}
+        self._stats = {}
+        self.disk = PickleCache(disk_dir, disk_max_bytes) if disk_dir else None
+        self.disk_namespaces = disk_namespaces  # None = todos
+
+    def _st(self, ns: str) -> dict:
+        s = self._stats.get(ns)
+        if s is None:
+            s = self._stats[ns] = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'puts': 0, 'evictions': 0, 'waits': 0}
+        return s
+
+    def _on_disk(self, ns: str) -> bool:
+        return self.disk is not None and (self.disk_namespaces is None or ns in self.disk_namespaces)
+
+    def _insert(self, ns: str, key: str, value, size: int):
+        k = (ns, key)
+        if k in self._d: self._bytes -= self._d.pop(k)[1]
+        self._d[k] = (value, size); self._bytes += size
+        while self._bytes > self.max_bytes and len(self._d) > 1:
+            (ons, _), (_, osz) = self._d.popitem(last=False)
+            self._bytes -= osz; self._st(ons)['evictions'] += 1
+
+    def get(self, ns: str, key: str, default=None):
+        with self._lock:
+            hit = self._d.get((ns, key))
+            if hit is not None:
+                self._d.move_to_end((ns, key)); self._st(ns)['hits'] += 1
+                return _share(hit[0])
+        if self._on_disk(ns):
+            v = self.disk.get(f'{ns}-{key}')
+            if v is not None:
+                size = nbytes(v)
+                with self._lock:
+                    self._st(ns)['disk_hits'] += 1
+                    if size <= self.max_bytes: self._insert(ns, key, _freeze(v), size)
+                return _share(v)
+        with self._lock: self._st(ns)['misses'] += 1
+        return default
+
+    def put(self, ns: str, key: str, value, copy: bool=True):
+        """Guarda una copia congelada de `value` (copy=False: congela el propio valor, sin copiar arrays)."""
+        size = nbytes(value)
+        value = _freeze(value, copy)
+        with self._lock:
+            self._st(ns)['puts'] += 1
+            if size <= self.max_bytes: self._insert(ns, key, value, size)  # más grande que todo el límite: sólo disco
+        if self._on_disk(ns):
+            try:
+                self.disk.put(f'{ns}-{key}', value)
+            except (OSError, pickle.PicklingError, TypeError, AttributeError):
+                pass
+        return value
+
+    def get_or_compute(self, ns: str, key: str, fn):
+        v = self.get(ns, key, _MISSING)
+        if v is not _MISSING: return v
+        with self._lock:
+            ev = self._inflight.get((ns, key))
+            owner = ev is None
+            if owner: ev = self._inflight[(ns, key)] = threading.Event()
+            else: self._st(ns)['waits'] += 1
+        if not owner:  # otra sesión lo está calculando: se espera su resultado
+            ev.wait()
+            with self._lock: hit = self._d.get((ns, key))
+            return _share(hit[0]) if hit is not None else fn()
+        try:
+            return _share(self.put(ns, key, fn(), copy=False))  # resultado nuevo: se congela sin copiar
+        finally:
+            with self._lock: self._inflight.pop((ns, key), None)
+            ev.set()
+
+    def clear(self, ns: str=None):
+        with self._lock:
+            for k in [k for k in self._d if ns is None or k[0] == ns]:
+                self._bytes -= self._d.pop(k)[1]
+        if self.disk is not None and ns is None: self.disk.clear()
+
+    def info(self) -> dict:
+        """Por espacio: aciertos (memoria/disco), fallos, hit_rate, entradas y bytes; más el total.
+        Las esperas a un cálculo en curso (waits) cuentan como fallo en get pero como acierto en hit_rate."""
+        with self._lock:
+            out = {}
+            for ns, s in self._stats.items():
+                n = s['hits'] + s['disk_hits'] + s['misses']
+                ent = [sz for (k, _), (_, sz) in self._d.items() if k == ns]
+                out[ns] = {**s, 'hit_rate': (s['hits'] + s['disk_hits'] + s['waits'])/n if n else 0.0, 'entries': len(ent), 'bytes': sum(ent)}
+            out['total'] = {'entries': len(self._d), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                            'disk': self.disk.info() if self.disk is not None else None}
+            return out
+
+_default_cache = None
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_cache() -> SharedCache:
+    global _shared
+    with _shared_lock:
+        if _shared is None: _shared = SharedCache()
+        return _shared
+
+def cached(ns: str):
+    """Decorador: memoiza en shared_cache() por hash del contenido de los argumentos."""
+    import functools
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            from .session import value_hash
+            return shared_cache().get_or_compute(ns, value_hash(fn.__qualname__, args, kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+    return deco
+
+def default_cache() -> TableCache:
+    global _default_cache
+    if _default_cache is None: _default_cache = TableCache()
+    return _default_cache
+
+@timed()
+def read_sap_table_cached(file_obj, cache: TableCache=None) -> pd.DataFrame:
+    """
+    read_sap_table con caché por hash del contenido + versión del parser.
+    Una reapertura del mismo archivo es una lectura Parquet (memory-mapped), o nada
+    si el DataFrame sigue en la caché compartida del proceso.
+    """
+    cache = cache or default_cache()
+    name = getattr(file_obj, 'name', 'uploaded')
+    data = file_obj.read() if hasattr(file_obj, 'read') else bytes(file_obj)
+    key = content_hash(data, os.path.splitext(str(name).lower())[1], PARSER_VERSION)
+    def parse():
+        df = cache.get(key)
+        if df is None:
+            buf = io.BytesIO(data); buf.name = name
+            df = normalize_table(read_sap_table(buf))
+            cache.put(key, df)
+        return df
+    # mismo archivo subido por otra sesión: el DataFrame ya está en memoria (ni Parquet)
+    return shared_cache().get_or_compute('sap', key, parse)
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+from .io_sap import SAP_NUM, to_category, classify_cases
+from .design import design_table
+from .instrument import timed
+
+# Filas combinadas que la página 03 genera en memoria: aviso y límite (BASEPLATE_COMBO_MAX_ROWS)
+COMBO_WARN_ROWS = 1_000_000
+COMBO_MAX_ROWS = int(os.environ.get('BASEPLATE_COMBO_MAX_ROWS', '5000000'))
+COMBO_ROW_BYTES = 8*len(SAP_NUM) + 16  # F1..M3 + códigos de Joint/OutputCase/ULS_SLS, aprox.
+
+# --- Plantillas de combinaciones (factores por tipo de carga) ---
+# Tipos laterales: cada caso asignado es una dirección alternativa (±), no se suman.
+LATERAL_TYPES = ('W','E')
+
+# ASCE 7-22 §2.3.1 (LRFD). Las alternativas "Lr o S" van como combinaciones separadas.
+ASCE7_LRFD = [
+    ('1.4D',            {'D':1.4}),
+    ('1.2D+1.6L+0.5Lr', {'D':1.2,'L':1.6,'Lr':0.5}),
+    ('1.2D+1.6L+0.5S',  {'D':1.2,'L':1.6,'S':0.5}),
+    ('1.2D+1.6Lr+L',    {'D':1.2,'Lr':1.6,'L':1.0}),
+    ('1.2D+1.6S+L',     {'D':1.2,'S':1.6,'L':1.0}),
+    ('1.2D+1.6Lr+0.5W', {'D':1.2,'Lr':1.6,'W':0.5}),
+    ('1.2D+1.6S+0.5W',  {'D':1.2,'S':1.6,'W':0.5}),
+    ('1.2D+W+L+0.5Lr',  {'D':1.2,'W':1.0,'L':1.0,'Lr':0.5}),
+    ('1.2D+W+L+0.5S',   {'D':1.2,'W':1.0,'L':1.0,'S':0.5}),
+    ('0.9D+W',          {'D':0.9,'W':1.0}),
+    ('1.2D+E+L+0.2S',   {'D':1.2,'E':1.0,'L':1.0,'S':0.2}),
+    ('0.9D+E',          {'D':0.9,'E':1.0}),
+]
+
+# EN 1990 STR, ec. 6.10 (ψ0: Q 0.7, S 0.5, W 0.6) y sísmica 6.12b (ψ2,Q = 0.3)
+EN1990_STR = [
+    ('1.35G',            {'G':1.35}),
+    ('1.35G+1.5Q',       {'G':1.35,'Q':1.5}),
+    ('1.35G+1.5Q+0.75S', {'G':1.35,'Q':1.5,'S':0.75}),
+    ('1.35G+1.5Q+0.9W',  {'G':1.35,'Q':1.5,'W':0.9}),
+    ('1.35G+1.5S+1.05Q', {'G':1.35,'S':1.5,'Q':1.05}),
+    ('1.35G+1.5W+1.05Q', {'G':1.35,'W':1.5,'Q':1.05}),
+    ('1.0G+1.5W',        {'G':1.0,'W':1.5}),
+    ('G+E+0.3Q',         {'G':1.0,'E':1.0,'Q':0.3}),
+]
+
+TEMPLATES = {'ASCE 7 LRFD': ASCE7_LRFD, 'EN 1990 STR': EN1990_STR}
+
+def template_factors(template, case_types: dict) -> pd.DataFrame:
+    """
+    Tabla de factores (combinaciones × casos) a partir de una plantilla y del
+    mapeo tipo -> casos, p.ej. {'D':['DEAD','SDL'], 'L':['LIVE'], 'W':['WX','WY']}.
+    Gravitatorias: se suman todos los casos del tipo. Laterales: un caso por
+    combinación y con ambos signos. Combinaciones repetidas se eliminan.
+    """
+    if isinstance(template, str): template = TEMPLATES[template]
+    cases = [c for cs in case_types.values() for c in cs]
+    rows, names = [], []
+    for label, fac in template:
+        base = {}
+        lateral = [t for t in fac if t in LATERAL_TYPES]
+        for t,f in fac.items():
+            if t in lateral: continue
+            for c in case_types.get(t, []): base[c] = base.get(c, 0.0) + f
+        variants = [({}, '')]
+        for t in lateral:
+            alts = [({c: s*fac[t]}, f"{'+' if s>0 else '-'}{c}") for c in case_types.get(t, []) for s in (1.0,-1.0)]
+            if alts: variants = [({**v, **a}, tag + ' ' + atag) for v,tag in variants for a,atag in alts]
+        for v,tag in variants:
+            rows.append({**base, **v}); names.append(f'{label}{tag}'.strip())
+    if not rows: return pd.DataFrame(columns=cases, dtype=float)
+    F = pd.DataFrame(rows, columns=cases).fillna(0.0)
+    keep = ((F != 0).any(axis=1) & ~F.duplicated()).to_numpy()
+    F = F.loc[keep].reset_index(drop=True)
+    F.index = [f'ULS{i+1:03d} {n}' for i,n in enumerate(np.asarray(names, dtype=object)[keep])]
+    return F
+
+def read_factor_table(file_obj) -> pd.DataFrame:
+    """CSV con una fila por combinación: primera columna = nombre, resto = factor por caso."""
+    F = pd.read_csv(file_obj, index_col=0)
+    F.index = F.index.astype(str)
+    return F.apply(pd.to_numeric, errors='coerce').fillna(0.0)
+
+def reactions_cube(df: pd.DataFrame, cases: list):
+    """
+    Pivota las reacciones de los casos básicos a un array joints × casos × 6 (F1..M3).
+    Un (Joint, caso) sin fila aporta cero; un caso sin ninguna fila en el archivo
+    (p.ej. errata en la tabla de factores) es ValueError.
+    """
+    oc = to_category(df['OutputCase'])
+    sub = df.loc[oc.isin(cases)]
+    jc = to_category(sub['Joint']).remove_unused_categories()
+    jcodes, joints = np.asarray(jc.codes), jc.categories
+    oc = to_category(sub['OutputCase'])  # por categoría: get_indexer sólo sobre los nombres únicos
+    found = set(oc.categories[np.unique(np.asarray(oc.codes))].astype(str)) if len(sub) else set()
+    missing = [str(c) for c in cases if str(c) not in found]
+    if missing:
+        raise ValueError(f'Casos de la tabla de factores sin reacciones en el archivo: {", ".join(missing)}')
+    kcodes = pd.Index(cases).get_indexer(oc.categories)[oc.codes]
+    if len(sub) and pd.Series(jcodes*len(cases) + kcodes).duplicated().any():
+        raise ValueError('Varias filas por Joint/caso básico (multi-step): reducir antes de combinar.')
+    R = np.zeros((len(joints), len(cases), len(SAP_NUM)))
+    vals = np.column_stack([pd.to_numeric(sub[c], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+                            if c in sub.columns else np.zeros(len(sub)) for c in SAP_NUM])
+    R[jcodes, kcodes] = vals
+    return joints, R
+
+def combination_rows(df: pd.DataFrame, factors: pd.DataFrame) -> int:
+    """Filas que generaría iter_combinations (Joints con algún caso básico × combinaciones), sin construirlas."""
+    sub = df['Joint'].loc[to_category(df['OutputCase']).isin([str(c) for c in factors.columns])]
+    return int(sub.nunique()) * len(factors)
+
+def iter_combinations(df: pd.DataFrame, factors: pd.DataFrame, joint_block: int=256):
+    """
+    Genera las combinaciones factorizadas por bloques de joints con un único
+    producto matricial por bloque: (combos × casos) @ (joints × casos × 6).
+    Cada bloque tiene el formato de read_sap_table (Joint, OutputCase, F1..M3, ULS_SLS).
+    """
+    cases = [str(c) for c in factors.columns]
+    F = factors.to_numpy(dtype=float)
+    names = to_category(np.asarray(factors.index, dtype=object))
+    uls = classify_cases(names)
+    joints, R = reactions_cube(df, cases)
+    nc = len(names)
+    # mismas categorías en todos los bloques: pd.concat conserva las categóricas
+    for a in range(0, len(joints), joint_block):
+        blk = F @ R[a:a+joint_block]  # (b, combos, 6)
+        b = blk.shape[0]
+        out = {'Joint': pd.Categorical.from_codes(np.repeat(np.arange(a, a+b), nc), categories=joints),
+               'OutputCase': pd.Categorical.from_codes(np.tile(names.codes, b), categories=names.categories)}
+        flat = blk.reshape(b*nc, len(SAP_NUM))
+        out.update({c: flat[:,i] for i,c in enumerate(SAP_NUM)})
+        out['ULS_SLS'] = pd.Categorical.from_codes(np.tile(uls.codes, b), categories=uls.categories)
+        yield pd.DataFrame(out)
+
+@timed()
+def design_combinations(df: pd.DataFrame, factors: pd.DataFrame, p: dict, preset: str='Preset A (default)',
+                        flips=(), joint_block: int=256) -> pd.DataFrame:
+    """Combina y diseña bloque a bloque (ver design.design_table); sólo se guarda el resultado."""
+    parts = [design_table(blk, p, preset, flips) for blk in iter_combinations(df, factors, joint_block)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
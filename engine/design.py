@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from .baseplate import contact_pressures_vec, plate_t_full_section_vec, bearing_solver
+from .steel.welds import fillet_strength, required_fillet_size_vec
+from .steel.bolts import steel_interaction
+from .concrete.aci318_25 import tension_breakout_group, pullout, shear_breakout, pryout_from_tension
+from .anchors.distribute import tension_distribution_arr, shear_distribution_arr
+from .anchors.group import AnchorGroup
+from .utils.axes import apply_preset, flip_signs
+from .prune import prune_rows, prune_info
+from .io_sap import key_codes
+from .instrument import timed
+
+LOAD_COLS = ['N','Vx','Vy','Mx','My']
+
+# mecanismo -> columna de la tabla de resultados (gobierna el máximo)
+MECHANISMS = {
+    'plate_t': 't_req_mm',
+    'bearing': 'util_bearing',
+    'weld': 'weld_mm',
+    'anchors_steel': 'util_steel',
+    'concrete_breakout_N': 'util_Ncb',
+    'concrete_pullout': 'util_Np',
+    'concrete_breakout_V': 'util_Vcb',
+    'concrete_pryout': 'util_Vcp',
+}
+
+CHUNK_ROWS = 250_000
+
+def design_params(geom: dict, mat: dict, anc: dict, ass: dict, cfg: dict) -> dict:
+    """
+    Reúne los datos de las páginas 02/04/06/01 (mismos valores por defecto que 05)
+    y precalcula todo lo que no depende de la carga: capacidades, pernos, etc.
+    """
+    fc = mat.get('fc',28.0)
+    D_mm = anc.get('D_mm',24.0); grade = anc.get('grade','F1554 Gr.55')
+    hef = anc.get('hef_mm',400.0); c_edge = anc.get('c_edge_mm',150.0)
+    bolts = anc.get('bolts', [])
+    return {
+        'B': geom.get('B',0.0), 'L': geom.get('L',0.0), 't_min': geom.get('t_min',10.0),
+        'd': geom.get('d',0.0), 'bf': geom.get('bf',0.0),
+        'fy_plate': mat.get('fy_plate',250.0),
+        'plate_method': ass.get('plate_method','Local (DG1-like)'),
+        'bearing_fc': ass.get('bearing_fc',0.7*fc),
+        'shear_mode': ass.get('shear_mode','ELASTIC'),
+        'tension_mode': ass.get('tension_mode','ELASTIC'), 'n_mod': ass.get('n_mod',8.0),
+        'interact': ass.get('interact','Linear'),
+        'seismic_on': cfg.get('seismic_on', False), 'omega0': cfg.get('omega0',2.5),
+        'FEXX': mat.get('FEXX',483.0),
+        'group': AnchorGroup.from_bolts(bolts, D_mm, grade),
+        **stage_capacities(fc, hef, c_edge, D_mm, bolts),
+    }
+
+def loads_from_table(df: pd.DataFrame, preset: str='Preset A (default)', flips=()) -> dict:
+    """
+    F1..M2 de read_sap_table -> arrays N,Vx,Vy,Mx,My (float64, copias propias).
+    Convenio único de la app: N compresión + (reacción F3 de SAP hacia arriba), el mismo
+    de contact_pressures y bearing_solver; la tracción de anclajes sale de anchor_tension.
+    """
+    col = lambda k: np.array(pd.to_numeric(df[k], errors='coerce'), dtype=float) if k in df.columns else np.zeros(len(df))
+    N,Vx,Vy,Mx,My = apply_preset(preset, col('F1'), col('F2'), col('F3'), col('M1'), col('M2'))
+    N,Vx,Vy,Mx,My = flip_signs(N,Vx,Vy,Mx,My, flips)
+    return dict(zip(LOAD_COLS, (N,Vx,Vy,Mx,My)))
+
+def anchor_tension(N):
+    """Tracción axial que toman los anclajes (modos ELASTIC/PLASTIC): max(−N, 0) con N compresión +."""
+    return np.maximum(-np.nan_to_num(np.asarray(N, dtype=float)), 0.0)
+
+# --- Etapas de la cadena de chequeos: check_loads las encadena y session.STAGES las memoiza ---
+def stage_demand(loads: dict, seismic_on: bool, omega0: float) -> dict:
+    """Arrays N..My de igual longitud (escalares -> 1 caso); cortante × Ω0 si sísmico."""
+    om = omega0 if seismic_on else 1.0
+    N, Vx, Vy, Mx, My = (np.atleast_1d(np.nan_to_num(np.asarray(loads.get(k, 0.0), dtype=float))).reshape(-1)
+                         for k in LOAD_COLS)
+    N, Vx, Vy, Mx, My = np.broadcast_arrays(N, Vx, Vy, Mx, My)
+    return {'N': N, 'Vx': Vx*om, 'Vy': Vy*om, 'Mx': Mx, 'My': My}
+
+def stage_solver(dem, B, L, grp, n_mod, plate_method, tension_mode):
+    """Eje neutro (bearing_solver) sólo si algún chequeo lo necesita."""
+    if plate_method.startswith('Local') and not tension_mode.startswith('BEARING'): return None
+    return bearing_solver(dem['N'], dem['Mx'], dem['My'], B, L, grp, n_mod)
+
+def stage_plate(pr, sol, dem, B, L, bf, t_min, fy, fc, plate_method, bearing_fc):
+    """Espesor de placa (local DG1 o sección completa) y aprovechamiento del aplastamiento."""
+    bfc = bearing_fc if bearing_fc is not None else 0.7*fc
+    out = {}
+    if plate_method.startswith('Local'):
+        q = np.maximum(pr['sigma_max'], 0.0)
+        m1 = max(0.0, (B - bf)/2.0); m2 = max(0.0, (L - 0.8*bf)/2.0)
+        t = lambda m: np.sqrt(6e3*q*m**2/2.0/(0.9*fy)) if m > 0 else np.zeros_like(q)
+        out.update(sigma=pr['sigma_max'], q=q, m1=m1, m2=m2, t1=t(m1), t2=t(m2))
+        out['t_req'] = np.maximum(np.maximum(out['t1'], out['t2']), t_min)
+    else:
+        out.update(sigma=sol['sigma_max'], q=np.minimum(np.nan_to_num(sol['sigma_max']), bfc/1000.0),
+                   a_mm=0.3*min(B, L), A_comp=sol['A_comp'], converged=sol['converged'])
+        out['t_req'] = plate_t_full_section_vec(dem['N'], dem['Mx'], dem['My'], B, L, fy, bfc, t_min, sol=sol)
+    # levantamiento (sigma < 0): sin aplastamiento; placa inestable (sin solución de equilibrio) -> no cumple
+    out['util_bearing'] = np.nan_to_num(np.maximum(out['sigma'], 0.0)/max(bfc/1000.0, 1e-12), nan=np.inf)
+    return out
+
+def stage_weld(dem, d, bf, FEXX):
+    phi_w, Rn_mm = fillet_strength(FEXX)
+    return required_fillet_size_vec(dem['Vx'], dem['Vy'], d, bf, phi_w, Rn_mm)
+
+def stage_tension(dem, grp, sol, tension_mode):
+    """Tracción por perno (casos × pernos)."""
+    if tension_mode.startswith('BEARING'): return np.nan_to_num(sol['T'], nan=np.inf)
+    return tension_distribution_arr(anchor_tension(dem['N']), dem['Mx'], dem['My'], grp, tension_mode)
+
+def stage_shear(dem, grp, shear_mode):
+    return np.maximum(np.abs(shear_distribution_arr(dem['Vy'], grp, shear_mode)),
+                      np.abs(shear_distribution_arr(dem['Vx'], grp, shear_mode)))
+
+def stage_steel(Nb, Vb, grp, interact):
+    util = steel_interaction(Nb, Vb, grp.phiNsa, grp.phiVsa, interact) if grp.n else np.zeros_like(Nb)
+    return {'util': util, 'util_steel': util.max(axis=1) if grp.n else np.zeros(len(Nb))}
+
+def stage_capacities(fc, hef, c_edge, D_mm, bolts):
+    """Capacidades de hormigón del grupo (no dependen de la carga)."""
+    Ncb = tension_breakout_group(fc, hef, c_edge, max(1, len(bolts)))
+    return {'Ncb': Ncb, 'Np': pullout(fc, D_mm), 'Vcb': shear_breakout(fc, hef, c_edge), 'Vcp': pryout_from_tension(Ncb)}
+
+def stage_concrete(Nb, dem, cap):
+    N_group = Nb.sum(axis=1) if Nb.shape[1] else np.zeros(len(Nb))
+    N_bolt = Nb.max(axis=1) if Nb.shape[1] else np.zeros(len(Nb))
+    V = np.hypot(dem['Vx'], dem['Vy'])
+    return {'util_Ncb': N_group/max(cap['Ncb'],1e-9), 'util_Np': N_bolt/max(cap['Np'],1e-9),
+            'util_Vcb': V/max(cap['Vcb'],1e-9), 'util_Vcp': V/max(cap['Vcp'],1e-9)}
+
+def stage_summary(plate, weld, steel, conc):
+    out = {'t_req_mm': plate['t_req'], 'util_bearing': plate['util_bearing'], 'weld_mm': weld,
+           'util_steel': steel['util_steel'], **conc}
+    out['util_max'] = np.max(np.column_stack([out[k] for k in ('util_bearing','util_steel','util_Ncb','util_Np','util_Vcb','util_Vcp')]), axis=1)
+    return out
+
+@timed()
+def check_loads(N, Vx, Vy, Mx, My, p: dict) -> dict:
+    """
+    Cadena de chequeos de la página 05 sobre arrays de casos (las mismas etapas que
+    session.DesignSession). Devuelve un dict de arrays (una entrada por caso).
+    """
+    dem = stage_demand(dict(zip(LOAD_COLS, (N, Vx, Vy, Mx, My))), p['seismic_on'], p['omega0'])
+    grp = p['group']
+    sol = stage_solver(dem, p['B'], p['L'], grp, p['n_mod'], p['plate_method'], p['tension_mode'])
+    pr = contact_pressures_vec(dem['N'], dem['Mx'], dem['My'], p['B'], p['L']) if p['plate_method'].startswith('Local') else None
+    plate = stage_plate(pr, sol, dem, p['B'], p['L'], p['bf'], p['t_min'], p['fy_plate'], None, p['plate_method'], p['bearing_fc'])
+    Nb = stage_tension(dem, grp, sol, p['tension_mode'])
+    steel = stage_steel(Nb, stage_shear(dem, grp, p['shear_mode']), grp, p['interact'])
+    return stage_summary(plate, stage_weld(dem, p['d'], p['bf'], p['FEXX']), steel, stage_concrete(Nb, dem, p))
+
+@timed()
+def design_table(df: pd.DataFrame, p: dict, preset: str='Preset A (default)', flips=(),
+                 classes=None, chunk_rows: int=CHUNK_ROWS, prune: bool=False) -> pd.DataFrame:
+    """
+    Diseño por lotes de todas las filas Joint × OutputCase de read_sap_table.
+    classes: p.ej. ['ULS'] para filtrar por la columna ULS_SLS (None = todas).
+    prune: descarta antes de chequear los casos dominados por Joint (ver prune.prune_rows;
+    sin efecto si el grupo de pernos no es simétrico); el resumen queda en res.attrs['prune'].
+    """
+    if classes and 'ULS_SLS' in df.columns:
+        df = df.loc[df['ULS_SLS'].isin(classes)]
+    loads = loads_from_table(df, preset, flips)
+    info = None
+    if prune:
+        keep = prune_rows(loads, p, key_codes(df['Joint']) if 'Joint' in df.columns else None)
+        info = prune_info(keep)
+        df = df.loc[keep]
+        loads = {k: v[keep] for k,v in loads.items()}
+    n = len(df)
+    parts = {}
+    for a in range(0, max(n,1), chunk_rows):
+        sl = slice(a, min(a+chunk_rows, n))
+        res = check_loads(*(loads[k][sl] for k in LOAD_COLS), p)
+        for k,v in res.items(): parts.setdefault(k, []).append(v)
+    cols = {}
+    for k in ('Joint','OutputCase','ULS_SLS'):
+        if k in df.columns: cols[k] = df[k].array  # categóricas se conservan
+    cols.update(loads)
+    cols.update({k: np.concatenate(v) if v else np.zeros(0) for k,v in parts.items()})
+    res = pd.DataFrame(cols, index=df.index)
+    if info: res.attrs['prune'] = info
+    return res
+
+def governing_by_mechanism(res: pd.DataFrame) -> dict:
+    gov = {}
+    if res.empty: return gov
+    for mech, col in MECHANISMS.items():
+        i = int(np.argmax(res[col].to_numpy()))
+        r = res.iloc[i]
+        gov[mech] = {'Joint': str(r.get('Joint','')), 'OutputCase': str(r.get('OutputCase','')), col: float(r[col])}
+    return gov
+
+def governing_by_joint(res: pd.DataFrame) -> pd.DataFrame:
+    """Una fila por Joint: valor y OutputCase gobernante de cada mecanismo."""
+    if res.empty or 'Joint' not in res.columns: return pd.DataFrame()
+    codes, joints = pd.factorize(res['Joint'], sort=True)
+    cases = res['OutputCase'].to_numpy() if 'OutputCase' in res.columns else np.full(len(res), '')
+    out = {}
+    for mech, col in MECHANISMS.items():
+        vals = np.nan_to_num(res[col].to_numpy(dtype=float), nan=-np.inf)
+        order = np.lexsort((vals, codes))
+        last = order[np.r_[codes[order][1:] != codes[order][:-1], True]]  # máximo de cada Joint
+        out[col] = vals[last]
+        out[f'{mech}_case'] = cases[last]
+    return pd.DataFrame(out, index=pd.Index(joints, name='Joint'))
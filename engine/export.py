@@ -0,0 +1,144 @@
+"""
+Exportación de tablas grandes por bloques: nunca hay más de un bloque en memoria.
+
+    export_table(res, 'out/results.xlsx')                 # DataFrame o iterable de DataFrames
+    export_bundle({'results': res, 'by_joint': bj}, 'out/results.zip', formats=('csv', 'parquet'))
+
+CSV y Parquet se escriben directamente al archivo (Parquet: un row group por bloque);
+XLSX con openpyxl en modo write-only, con una hoja nueva (<hoja>_2, <hoja>_3...)
+cada XLSX_MAX_ROWS filas.
+"""
+import os
+import zipfile
+import tempfile
+import pandas as pd
+from .instrument import timed
+
+EXPORT_CHUNK_ROWS = 100_000
+XLSX_MAX_ROWS = 1_048_575  # filas de datos por hoja (más el encabezado)
+FORMATS = ('parquet', 'csv', 'xlsx')
+
+def iter_chunks(source, chunk_rows: int=EXPORT_CHUNK_ROWS):
+    """Bloques de un DataFrame (cortes iloc) o de un iterable de DataFrames (tal cual)."""
+    if isinstance(source, pd.DataFrame):
+        for a in range(0, len(source), chunk_rows): yield source.iloc[a:a+chunk_rows]
+        if not len(source): yield source
+    else:
+        yield from source
+
+# --- Escritores: write(bloque) ... close() ---
+class CsvWriter:
+    def __init__(self, path: str, index: bool=False):
+        self.path, self.index, self.rows = path, index, 0
+        self._f = open(path, 'w', encoding='utf-8', newline='')
+
+    def write(self, chunk: pd.DataFrame):
+        chunk.to_csv(self._f, index=self.index, header=self._f.tell() == 0)
+        self.rows += len(chunk)
+
+    def close(self):
+        self._f.close()
+
+class ParquetWriter:
+    """El esquema lo fija el primer bloque; las categóricas se guardan como diccionario con índices int32."""
+    def __init__(self, path: str, index: bool=False):
+        self.path, self.index, self.rows = path, index, 0
+        self._w = self._schema = None
+
+    def write(self, chunk: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._w is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=self.index)
+            fields = [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type), f.nullable)
+                      if pa.types.is_dictionary(f.type) else f for f in schema]
+            self._schema = pa.schema(fields, metadata=schema.metadata)
+            self._w = pq.ParquetWriter(self.path, self._schema)
+        self._w.write_table(pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=self.index))
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._w is None:  # tabla vacía sin bloques: archivo válido sin columnas
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table({}), self.path)
+        else:
+            self._w.close()
+
+class XlsxWriter:
+    """openpyxl write-only: las filas van a disco al añadirlas; memoria constante."""
+    def __init__(self, path: str, index: bool=False, sheet: str='Results', max_rows: int=None):
+        from openpyxl import Workbook
+        self.path, self.index, self.sheet, self.rows = path, index, sheet[:31], 0
+        self.max_rows = max_rows or XLSX_MAX_ROWS  # se lee al crear el escritor
+        self._wb = Workbook(write_only=True)
+        self._ws, self._n, self._head, self.sheets = None, 0, None, []
+
+    def _new_sheet(self):
+        name = self.sheet if not self.sheets else f'{self.sheet[:27]}_{len(self.sheets)+1}'
+        self._ws = self._wb.create_sheet(name); self.sheets.append(name)
+        self._ws.append(self._head); self._n = 0
+
+    def write(self, chunk: pd.DataFrame):
+        if self.index: chunk = chunk.reset_index()
+        if self._head is None:
+            self._head = [str(c) for c in chunk.columns]; self._new_sheet()
+        vals = chunk.to_numpy(dtype=object)
+        vals[pd.isna(vals)] = None                    # Excel no tiene NaN: celda vacía
+        a = 0
+        while a < len(vals):
+            if self._n >= self.max_rows: self._new_sheet()
+            b = min(len(vals), a + self.max_rows - self._n)
+            for row in vals[a:b].tolist(): self._ws.append(row)
+            self._n += b - a; a = b
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._ws is None: self._head = []; self._new_sheet()
+        self._wb.save(self.path)
+
+WRITERS = {'csv': CsvWriter, 'parquet': ParquetWriter, 'xlsx': XlsxWriter}
+
+def table_format(path: str) -> str:
+    fmt = os.path.splitext(path)[1].lower().lstrip('.')
+    if fmt not in WRITERS: raise ValueError(f'Formato no soportado: {fmt}')
+    return fmt
+
+@timed()
+def export_table(source, path: str, fmt: str=None, chunk_rows: int=EXPORT_CHUNK_ROWS, index: bool=False,
+                 sheet: str='Results', progress=None) -> dict:
+    """
+    Escribe `source` (DataFrame o iterable de bloques) en `path` bloque a bloque.
+    Devuelve {'path', 'format', 'rows'} y, en xlsx, 'sheets'.
+    """
+    fmt = fmt or table_format(path)
+    if fmt not in WRITERS: raise ValueError(f'Formato no soportado: {fmt}')
+    w = WRITERS[fmt](path, index=index, **({'sheet': sheet} if fmt == 'xlsx' else {}))
+    try:
+        for chunk in iter_chunks(source, chunk_rows):
+            w.write(chunk)
+            if progress: progress(w.rows)
+    finally:
+        w.close()
+    out = {'path': path, 'format': fmt, 'rows': w.rows}
+    if fmt == 'xlsx': out['sheets'] = w.sheets
+    return out
+
+@timed()
+def export_bundle(tables: dict, path: str, formats=('csv',), chunk_rows: int=EXPORT_CHUNK_ROWS, index: bool=False,
+                  progress=None) -> dict:
+    """
+    ZIP con cada tabla en cada formato ({nombre}.{fmt}). Cada archivo se escribe en una
+    carpeta temporal y se copia al ZIP por bloques, así que tampoco se carga entero.
+    Las tablas pueden ser iterables de un solo uso si sólo se pide un formato.
+    """
+    manifest = {}
+    with tempfile.TemporaryDirectory() as tmp, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for name, source in tables.items():
+            for fmt in formats:
+                part = os.path.join(tmp, f'{name}.{fmt}')
+                r = export_table(source, part, fmt, chunk_rows, index, sheet=name, progress=progress)
+                zf.write(part, f'{name}.{fmt}', compress_type=zipfile.ZIP_STORED if fmt == 'xlsx' else zipfile.ZIP_DEFLATED)
+                os.remove(part)
+                manifest[f'{name}.{fmt}'] = {k: v for k, v in r.items() if k != 'path'}
+    return {'path': path, 'files': manifest}
@@ -0,0 +1,162 @@
+"""
+Instrumentación de funciones del motor: tiempo, número de llamadas y pico de memoria.
+
+    @timed()                    # nombre = módulo.función
+    def read_sap_table(...): ...
+
+    with span('page05.batch'): ...
+
+Desactivada por defecto: el decorador sólo consulta un flag y llama a la función.
+Se activa con enable() o con BASEPLATE_PROFILE=1; BASEPLATE_PROFILE_MEMORY=1 añade
+picos de tracemalloc y BASEPLATE_PROFILE_JSONL=<ruta> escribe una línea JSON por llamada.
+Los ajustes son del proceso (todas las sesiones): el panel de Streamlit sólo los cambia
+con BASEPLATE_PROFILE_ADMIN=1 y el JSONL sólo puede ir a BASEPLATE_PROFILE_JSONL.
+"""
+import os
+import json
+import time
+import threading
+import functools
+import tracemalloc
+
+_on = os.environ.get('BASEPLATE_PROFILE', '') not in ('', '0')
+_memory = False
+JSONL_PATH = os.environ.get('BASEPLATE_PROFILE_JSONL') or None
+PROFILE_ADMIN = os.environ.get('BASEPLATE_PROFILE_ADMIN', '') not in ('', '0')
+_jsonl = JSONL_PATH
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+
+def enable(memory: bool=None, jsonl: str=None):
+    """Activa el registro; memory=True arranca tracemalloc (más lento); jsonl='' lo apaga."""
+    global _on, _memory, _jsonl
+    _on = True
+    if memory is not None:
+        _memory = memory
+        if memory and not tracemalloc.is_tracing(): tracemalloc.start()
+        if not memory and tracemalloc.is_tracing(): tracemalloc.stop()
+    if jsonl is not None: _jsonl = jsonl or None
+
+def disable():
+    global _on, _memory
+    _on = False
+    if _memory and tracemalloc.is_tracing(): tracemalloc.stop()
+    _memory = False
+
+def enabled() -> bool:
+    return _on
+
+def settings() -> dict:
+    return {'enabled': _on, 'memory': _memory, 'jsonl': _jsonl}
+
+class _Span:
+    __slots__ = ('name', 't0', 'cur', 'seen')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if _memory and tracemalloc.is_tracing():
+            stack = _local.__dict__.setdefault('stack', [])
+            # el pico lo comparten las llamadas anidadas: el padre guarda el máximo visto
+            if stack: stack[-1].seen = max(stack[-1].seen, tracemalloc.get_traced_memory()[1])
+            self.cur = tracemalloc.get_traced_memory()[0]; self.seen = 0
+            tracemalloc.reset_peak()
+            stack.append(self)
+        else:
+            self.cur = None
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        peak = None
+        if self.cur is not None and tracemalloc.is_tracing():
+            stack = _local.stack
+            p = max(tracemalloc.get_traced_memory()[1], self.seen)
+            peak = max(p - self.cur, 0)/1024**2
+            stack.pop()
+            if stack: stack[-1].seen = max(stack[-1].seen, p)
+        _record(self.name, dt, peak)
+        return False
+
+class _Null:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL = _Null()
+
+def span(name: str):
+    """Context manager; sin coste (objeto compartido) cuando está desactivado."""
+    return _Span(name) if _on else _NULL
+
+def timed(name: str=None):
+    """Decorador de registro por función; desactivado = un flag y la llamada original."""
+    def deco(fn):
+        label = name or f"{fn.__module__.replace('engine.', '')}.{fn.__qualname__}"
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _on: return fn(*args, **kwargs)
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def _record(name: str, dt: float, peak_mb):
+    with _lock:
+        s = _stats.get(name)
+        if s is None: s = _stats[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'peak_mb': None}
+        s['calls'] += 1; s['total_s'] += dt; s['max_s'] = max(s['max_s'], dt)
+        if peak_mb is not None: s['peak_mb'] = max(s['peak_mb'] or 0.0, peak_mb)
+        path = _jsonl
+    if path:
+        line = {'ts': time.time(), 'pid': os.getpid(), 'name': name, 'wall_s': dt}
+        if peak_mb is not None: line['peak_mb'] = peak_mb
+        try:
+            with open(path, 'a', encoding='utf-8') as f: f.write(json.dumps(line) + '\n')
+        except OSError:
+            pass
+
+def stats() -> list:
+    """Una fila por función: llamadas, tiempo total/medio/máximo y pico (MB), de mayor a menor tiempo."""
+    with _lock:
+        rows = [{'name': k, **v, 'mean_s': v['total_s']/v['calls']} for k, v in _stats.items()]
+    return sorted(rows, key=lambda r: -r['total_s'])
+
+def reset():
+    with _lock: _stats.clear()
+
+if _on and os.environ.get('BASEPLATE_PROFILE_MEMORY', '') not in ('', '0'): enable(memory=True)
+
+def sidebar_panel():
+    """
+    Panel lateral de Streamlit con los registros (se llama al final de cada página
+    para incluir las llamadas de esa ejecución). Streamlit se importa sólo aquí.
+    Sólo lectura salvo BASEPLATE_PROFILE_ADMIN=1; los cambios se aplican al
+    pulsar (on_change), no en cada rerun, para no pisar los de otra sesión.
+    """
+    import streamlit as st
+    import pandas as pd
+    with st.sidebar.expander('⏱ Engine profiling', expanded=_on):
+        if PROFILE_ADMIN:
+            def apply():
+                ss = st.session_state
+                if ss['__prof_on__']: enable(memory=ss['__prof_mem__'], jsonl=JSONL_PATH if ss.get('__prof_jsonl__') else '')
+                else: disable()
+            st.checkbox('Record engine calls', value=_on, key='__prof_on__', on_change=apply,
+                        help='Server-wide: applies to every session.')
+            st.checkbox('Peak memory (tracemalloc, slower)', value=_memory, key='__prof_mem__', on_change=apply)
+            if JSONL_PATH:
+                st.checkbox(f'Write JSON lines to {JSONL_PATH}', value=_jsonl is not None, key='__prof_jsonl__', on_change=apply)
+        else:
+            st.caption(f"Recording {'on' if _on else 'off'}" + (' · peak memory' if _memory else '')
+                       + (' · JSON lines' if _jsonl else '') + ' (server setting; BASEPLATE_PROFILE_ADMIN=1 to change).')
+        rows = stats()
+        if rows:
+            df = pd.DataFrame(rows)[['name','calls','total_s','mean_s','max_s','peak_mb']]
+            st.dataframe(df.round(4), hide_index=True)
+        elif _on:
+            st.caption('No engine calls recorded yet.')
+        if PROFILE_ADMIN and st.button('Reset timings', key='__prof_reset__'): reset()
@@ -1,6 +1,16 @@
 import io
+import os
+import re
+import csv
+import zipfile
+import itertools
+import numpy as np
 import pandas as pd
 from .utils import classify_case
+from .instrument import timed
+
+# Subir cuando cambie la salida normalizada de read_sap_table (invalida cachés)
+PARSER_VERSION = '4'
 
 # --- helpers internos ---
 def _strip_cols(df: pd.DataFrame) -> pd.DataFrame:
@@ -25,79 +35,247 @@ def _find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
             return norm[key]
     return None
 
-def _header_units_data_split(df_raw: pd.DataFrame) -> pd.DataFrame:
+def _is_title_row(row_vals: list[str]) -> bool:
+    has_joint = any(v.upper() == 'JOINT' for v in row_vals)
+    has_case  = any(v.upper() in ('OUTPUTCASE','CASE','LOADCASE','LOAD CASE','COMBINATION','COMBO') for v in row_vals)
+    return has_joint and has_case
+
+# --- Unidades: fila de unidades SAP -> factores a kN y kN·m ---
+FORCE_KN = {'kn': 1.0, 'n': 1e-3, 'mn': 1e3, 'kgf': 9.80665e-3, 'tonf': 9.80665, 'tf': 9.80665,
+            'kip': 4.4482216152605, 'kips': 4.4482216152605, 'lb': 4.4482216152605e-3, 'lbf': 4.4482216152605e-3}
+LENGTH_M = {'m': 1.0, 'cm': 1e-2, 'mm': 1e-3, 'in': 0.0254, 'ft': 0.3048}
+
+def unit_factor(unit: str, moment: bool=False) -> float | None:
+    """Factor a kN (fuerza) o a kN·m (momento 'fuerza-longitud', p.ej. 'Kip-ft'); None si no se reconoce."""
+    u = str(unit).strip().lower().replace(' ', '')
+    if not moment: return FORCE_KN.get(u)
+    m = re.fullmatch(r'([a-z]+)[-·*.]([a-z]+)', u)
+    if not m or m[1] not in FORCE_KN or m[2] not in LENGTH_M: return None
+    return FORCE_KN[m[1]]*LENGTH_M[m[2]]
+
+def _num_col(title) -> str | None:
+    t = str(title).strip().lower().replace(' ','').replace('_','')
+    return next((c for c in ('F1','F2','F3','M1','M2','M3') if c.lower() == t), None)
+
+def _is_units_row(titles: list, vals: list) -> bool:
+    """La fila de unidades no tiene números en F1..M3 (p.ej. 'KN', 'KN-m') y no está vacía."""
+    cells = [str(v).strip() for t,v in zip(titles, vals) if _num_col(t) and v is not None]
+    cells = [v for v in cells if v and v.lower() != 'nan']
+    return bool(cells) and not any(_is_number(v) for v in cells)
+
+def unit_factors(titles: list, units: list) -> dict:
+    """F1..M3 -> (unidad de origen, factor a kN / kN·m) según la fila de unidades."""
+    out = {}
+    for t, u in zip(titles, units):
+        col = _num_col(t)
+        if col is None or u is None or str(u).strip().lower() in ('', 'nan'): continue
+        f = unit_factor(u, moment=col.startswith('M'))
+        if f is None: raise ValueError(f"Unidad no reconocida en la columna {t}: '{u}' (se esperan p.ej. KN, Kip, N / KN-m, Kip-ft, N-mm).")
+        out[col] = (str(u).strip(), f)
+    return out
+
+def _scale(a: np.ndarray, f: float) -> np.ndarray:
+    """Conversión en el propio array (sin copias)."""
+    if f != 1.0: np.multiply(a, f, out=a)
+    return a
+
+def _header_units_data_split(df_raw: pd.DataFrame):
     """
     Detecta patrón SAP2000 Joint Reactions:
       fila i   -> títulos (contiene 'Joint' y 'OutputCase' / 'Case' / 'LoadCase')
-      fila i+1 -> unidades
+      fila i+1 -> unidades (si la hay)
       fila i+2.. -> datos
+    Devuelve (datos, unit_factors) o (None, {}).
     """
     max_scan = min(10, len(df_raw))
     header_row = None
     for i in range(max_scan):
-        row_vals = df_raw.iloc[i].astype(str).str.strip().tolist()
-        has_joint = any(v.upper() == 'JOINT' for v in row_vals)
-        has_case  = any(v.upper() in ('OUTPUTCASE','CASE','LOADCASE','LOAD CASE','COMBINATION','COMBO') for v in row_vals)
-        if has_joint and has_case:
+        if _is_title_row(df_raw.iloc[i].astype(str).str.strip().tolist()):
             header_row = i
             break
     if header_row is None:
         # no se detectó patrón: devolvemos tal cual (ya se manejará más abajo)
-        return None
+        return None, {}
 
     # títulos y unidades
     titles = df_raw.iloc[header_row].astype(str).str.strip().tolist()
+    units = df_raw.iloc[header_row+1].tolist() if header_row+1 < len(df_raw) else []
+    has_units = _is_units_row(titles, units)
     # datos: todo lo que venga después de la fila de unidades
-    data_df = df_raw.iloc[header_row+2:].reset_index(drop=True).copy()
+    data_df = df_raw.iloc[header_row+(2 if has_units else 1):].reset_index(drop=True).copy()
 
     # Asignar encabezados
     data_df.columns = titles
     data_df = _strip_cols(data_df)
     data_df = _drop_unnamed(data_df)
-    return data_df
-
-def read_sap_table(file_obj):
-    """
-    Lector robusto de SAP2000 'Joint Reactions':
-    - Soporta XLS/XLSX/CSV con 3 filas: títulos, unidades, datos.
-    - Limpia columnas 'Unnamed', convierte F1,F2,F3,M1,M2,M3 a numérico.
-    - Crea 'OutputCase' si no existe y clasifica ULS/SLS en 'ULS_SLS'.
-    """
-    # Cargar bytes en memoria (Streamlit file_uploader)
-    name = getattr(file_obj, 'name', 'uploaded').lower()
-    buf  = io.BytesIO(file_obj.read()) if hasattr(file_obj, 'read') else io.BytesIO(file_obj)
+    return data_df, (unit_factors(titles, units) if has_units else {})
 
+def _read_with_pandas(buf, name: str, sheet_name=0):
+    """(tabla sin convertir, unit_factors) con pandas (XLS, CSV y respaldo de XLSX)."""
+    is_excel = name.endswith(('.xls','.xlsx','.xlsm'))
     # 1) Intento: leer siempre sin header para poder detectar patrón títulos/unidades
     try:
-        if name.endswith(('.xls','.xlsx')):
-            df_raw = pd.read_excel(buf, header=None, sheet_name=0)
+        if is_excel:
+            df_raw = pd.read_excel(buf, header=None, sheet_name=sheet_name)
         else:
             buf.seek(0)
             df_raw = pd.read_csv(buf, header=None)
     except Exception:
         # fallback: intentar con header por defecto
         buf.seek(0)
-        if name.endswith(('.xls','.xlsx')):
-            df_raw = pd.read_excel(buf, sheet_name=0)
+        if is_excel:
+            df_raw = pd.read_excel(buf, sheet_name=sheet_name)
         else:
             df_raw = pd.read_csv(buf)
 
     # 2) Detectar patrón SAP (títulos/unidades/datos)
-    df = _header_units_data_split(df_raw)
+    df, units = _header_units_data_split(df_raw)
     if df is None:
         # No se encontró patrón (p.ej. CSV ya “plano” con header en la 1ª fila)
         # Reintentar leyendo con header en la primera fila
         buf.seek(0)
         try:
-            if name.endswith(('.xls','.xlsx')):
-                df = pd.read_excel(buf, sheet_name=0)
+            if is_excel:
+                df = pd.read_excel(buf, sheet_name=sheet_name)
             else:
                 df = pd.read_csv(buf)
         except Exception:
             # Como último recurso, toma primera fila como cabecera y descarta la de unidades si la encuentra
             df = df_raw.copy()
             df.columns = df.iloc[0]
-            df = df.iloc[2:].reset_index(drop=True)
+            df = df.iloc[1:].reset_index(drop=True)
+        # cabecera en la 1ª fila: la siguiente puede ser la de unidades
+        if len(df) and _is_units_row(list(df.columns), df.iloc[0].tolist()):
+            units = unit_factors(list(df.columns), df.iloc[0].tolist())
+            df = df.iloc[1:].reset_index(drop=True)
+    return df, units
+
+# --- Joint/OutputCase categóricas e índice (Joint, OutputCase) -> filas ---
+def to_category(values) -> pd.Categorical:
+    """
+    Texto sin espacios extremos como categórica (categorías ordenadas).
+    El paso a texto se hace sobre los valores únicos, no fila a fila; NaN queda como faltante.
+    """
+    codes, uniq = pd.factorize(np.asarray(values, dtype=object) if isinstance(values, (list, tuple)) else values)
+    c2, cats = pd.factorize(pd.Index(np.asarray(uniq, dtype=object)).astype(str).str.strip(), sort=True)
+    codes = np.where(codes >= 0, np.asarray(c2)[np.maximum(codes, 0)], -1) if len(c2) else np.full(len(codes), -1)
+    return pd.Categorical.from_codes(codes, categories=cats)
+
+def key_codes(values) -> np.ndarray:
+    """Códigos enteros de una columna clave (gratis si ya es categórica)."""
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        return np.asarray(pd.Categorical(values).codes)
+    return pd.factorize(np.asarray(values))[0]
+
+def classify_cases(values) -> pd.Categorical:
+    """classify_case sobre las categorías (nombres únicos); un nombre faltante se clasifica como 'nan'."""
+    cat = pd.Categorical(values) if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype) else to_category(values)
+    labels = [classify_case(c) for c in cat.categories] + [classify_case('nan')]
+    lc, lu = pd.factorize(np.asarray(labels, dtype=object))
+    return pd.Categorical.from_codes(lc[np.where(cat.codes >= 0, cat.codes, len(labels) - 1)], categories=lu)
+
+class CaseIndex:
+    """
+    Índice (Joint, OutputCase) -> filas de una tabla SAP, construido una vez por tabla.
+    Las filas de cada par son el tramo order[a:b] (pares en orden de aparición); si la
+    tabla ya viene agrupada (exportación SAP, combinaciones) order es la identidad y
+    rows() devuelve un slice.
+        idx = CaseIndex(df); df.iloc[idx.rows('12', 'ULS01')]
+    """
+    def __init__(self, df: pd.DataFrame, joint: str='Joint', case: str='OutputCase'):
+        (jk, jn), (ck, cn) = (self._appearance(df[c]) for c in (joint, case))
+        self.n = len(df)
+        self._j = {v: i for i, v in enumerate(jn) if v is not None}
+        self._c = {v: i for i, v in enumerate(cn) if v is not None}
+        self._jn, self._cn = jn, cn
+        self.joints, self.cases = sorted(self._j), sorted(self._c)
+        self._nc = max(len(cn), 1)
+        ok = (jk != (jn.index(None) if None in jn else -1)) & (ck != (cn.index(None) if None in cn else -1))
+        key = np.where(ok, jk.astype(np.int64)*self._nc + ck, -1)
+        self.order = np.argsort(key, kind='stable')
+        sk = key[self.order]
+        cut = np.flatnonzero(sk[1:] != sk[:-1]) + 1
+        if len(sk):
+            starts, ends = np.r_[0, cut].astype(int), np.r_[cut, len(sk)].astype(int)
+        else:  # tabla vacía: ningún grupo
+            starts = ends = np.zeros(0, dtype=int)
+        valid = sk[starts] >= 0
+        self.keys, self.starts, self.ends = sk[starts][valid], starts[valid], ends[valid]
+        self._slice = dict(zip(self.keys.tolist(), zip(self.starts.tolist(), self.ends.tolist())))
+        self.contiguous = bool((self.order == np.arange(self.n)).all())
+
+    @staticmethod
+    def _appearance(col):
+        """Códigos por orden de aparición y su nombre (None = faltante)."""
+        cat = pd.Categorical(col) if isinstance(col.dtype, pd.CategoricalDtype) else to_category(col)
+        k, u = pd.factorize(np.asarray(cat.codes))
+        return k, [str(cat.categories[c]) if c >= 0 else None for c in u]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _take(self, a: int, b: int, sort: bool=False):
+        if self.contiguous: return slice(a, b)
+        return np.sort(self.order[a:b]) if sort else self.order[a:b]
+
+    def rows(self, joint, case):
+        """Posiciones (iloc) de las filas del par, en el orden de la tabla; vacío si no existe."""
+        j, c = self._j.get(str(joint)), self._c.get(str(case))
+        a, b = self._slice.get(j*self._nc + c, (0, 0)) if j is not None and c is not None else (0, 0)
+        return self._take(a, b)
+
+    def joint_rows(self, joint):
+        """Posiciones de todas las filas de un Joint (sus pares son consecutivos en order)."""
+        j = self._j.get(str(joint))
+        if j is None: return self._take(0, 0)
+        i0, i1 = np.searchsorted(self.keys, [j*self._nc, (j + 1)*self._nc])
+        return self._take(int(self.starts[i0]), int(self.ends[i1-1]), sort=True) if i1 > i0 else self._take(0, 0)
+
+    def cases_of(self, joint) -> list:
+        """OutputCases presentes en un Joint (ordenados)."""
+        j = self._j.get(str(joint))
+        if j is None: return []
+        k = self.keys[(self.keys >= j*self._nc) & (self.keys < (j + 1)*self._nc)]
+        return sorted(self._cn[i] for i in (k % self._nc).tolist())
+
+    def groups(self):
+        """(joint, case, filas) por par, en orden de aparición."""
+        for k, a, b in zip(self.keys.tolist(), self.starts.tolist(), self.ends.tolist()):
+            yield self._jn[k // self._nc], self._cn[k % self._nc], self._take(a, b)
+
+@timed()
+def read_sap_table(file_obj, sheet: str=None, sheet_pattern: str=None):
+    """
+    Lector robusto de SAP2000 'Joint Reactions':
+    - Soporta XLS/XLSX/XLSM/CSV con 3 filas: títulos, unidades, datos.
+    - Excel: hoja 'Joint Reactions' (o `sheet`, o todas las que casen con `sheet_pattern`).
+    - Limpia columnas 'Unnamed', convierte F1,F2,F3,M1,M2,M3 a numérico.
+    - Pasa F1..F3 a kN y M1..M3 a kN·m según la fila de unidades; las de origen quedan en
+      df.attrs['source_units'] ({} = sin fila de unidades: se asume kN, kN·m).
+    - Crea 'OutputCase' si no existe y clasifica ULS/SLS en 'ULS_SLS'.
+    """
+    # Cargar bytes en memoria (Streamlit file_uploader)
+    name = getattr(file_obj, 'name', 'uploaded').lower()
+    buf  = io.BytesIO(file_obj.read()) if hasattr(file_obj, 'read') else io.BytesIO(file_obj)
+
+    # 1-2) Leer y detectar títulos/unidades (XLSX/XLSM: una sola pasada read-only con openpyxl)
+    df, units, source = None, {}, {}
+    if name.endswith(('.xlsx','.xlsm')):
+        from openpyxl.utils.exceptions import InvalidFileException
+        try:
+            df = read_sap_excel(buf, sheet=sheet, sheet_pattern=sheet_pattern)
+        except (zipfile.BadZipFile, InvalidFileException):
+            df = None  # openpyxl no puede con el archivo: se intenta con pandas
+        if df is None and (sheet is not None or sheet_pattern is not None):
+            raise ValueError(f"{name}: la hoja elegida no tiene la tabla SAP (títulos Joint/OutputCase/F1..M3).")
+        if df is not None: source = dict(df.attrs.get('source_units', {}))  # ya convertida por bloques
+    if df is None:
+        sheet_name = 0
+        if name.endswith('.xls') and (sheet is not None or sheet_pattern is not None):
+            sheet_name = _pick_sheets(pd.ExcelFile(buf).sheet_names, sheet, sheet_pattern)[0]
+        buf.seek(0)
+        df, units = _read_with_pandas(buf, name, sheet_name)
+        source = {k: u for k,(u,_) in units.items()}
 
     df = _strip_cols(df)
     df = _drop_unnamed(df)
@@ -108,8 +286,11 @@ def read_sap_table(file_obj):
         df['OutputCase'] = ''
         out_col = 'OutputCase'
 
-    # 4) Clasificación ULS/SLS
-    df['ULS_SLS'] = df[out_col].astype(str).map(classify_case)
+    # 4) Joint/OutputCase categóricas; la clasificación ULS/SLS se hace por categoría, no por fila
+    joint_col = _find_col(df, ['Joint'])
+    for c in {joint_col, out_col} - {None}:
+        df[c] = to_category(df[c])
+    df['ULS_SLS'] = classify_cases(df[out_col])
 
     # 5) Renombrar/convertir numéricos conocidos
     rename = {}
@@ -123,16 +304,216 @@ def read_sap_table(file_obj):
 
     for col in ('F1','F2','F3','M1','M2','M3'):
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            a = pd.to_numeric(df[col].to_numpy(), errors='coerce')
+            if col in units: a = _scale(a if a.dtype.kind == 'f' and a.flags.writeable else a.astype(float), units[col][1])
+            df[col] = a
 
     # 6) Limpieza de filas vacías (por si sobran separadores)
     if out_col in df.columns:
         mask_all_nan = df.drop(columns=[out_col]).isna().all(axis=1)
-        df = df.loc[~(mask_all_nan & (df[out_col].astype(str).str.strip()==''))].reset_index(drop=True)
+        df = df.loc[~(mask_all_nan & df[out_col].isin(['']))].reset_index(drop=True)
 
+    df.attrs['source_units'] = source
     return df
 
 
+
+# --- Lectura en streaming (CSV grandes: time-history / multi-step) ---
+SAP_KEYS = ['Joint','OutputCase','StepType']
+SAP_NUM  = ['F1','F2','F3','M1','M2','M3']
+CASE_ALIASES = ['OutputCase','Output Case','Case','LoadCase','Load Case','Combination','Combo']
+STREAM_CHUNK_ROWS = 500_000
+
+def _norm(v) -> str:
+    return str(v).strip().lower().replace(' ','').replace('_','')
+
+def _sniff_csv(file_obj, max_lines: int=10, peek_bytes: int=65536):
+    """
+    Lee sólo las primeras líneas: fila de títulos, si hay fila de unidades
+    y el separador. Devuelve (fila_títulos, títulos, n_filas_a_saltar, sep, unit_factors).
+    """
+    head = file_obj.read(peek_bytes)
+    file_obj.seek(0)
+    if isinstance(head, bytes): head = head.decode('utf-8', errors='ignore')
+    lines = head.splitlines()[:max_lines]
+    sep = ';' if lines and lines[0].count(';') > lines[0].count(',') else ','
+    rows = list(csv.reader(lines, delimiter=sep))
+    for i,r in enumerate(rows):
+        vals = [v.strip() for v in r]
+        if _is_title_row(vals):
+            nxt = rows[i+1] if i+1 < len(rows) else []
+            has_units = _is_units_row(vals, nxt)
+            return i, vals, i + (2 if has_units else 1), sep, (unit_factors(vals, nxt) if has_units else {})
+    vals = [v.strip() for v in rows[0]] if rows else []
+    return 0, vals, 1, sep, {}
+
+def _is_number(v: str) -> bool:
+    try:
+        float(v); return True
+    except ValueError:
+        return False
+
+def _open_binary(file_obj):
+    if isinstance(file_obj, (str, os.PathLike)): return open(file_obj, 'rb'), True
+    if isinstance(file_obj, (bytes, bytearray)): return io.BytesIO(file_obj), True
+    return file_obj, False
+
+def iter_sap_csv_chunks(file_obj, chunksize: int=STREAM_CHUNK_ROWS):
+    """
+    Itera un CSV 'Joint Reactions' en bloques de `chunksize` filas con sólo las
+    columnas necesarias (Joint, OutputCase, StepType, StepNum, F1..M3) ya tipadas y en kN / kN·m
+    (unidades de origen en chunk.attrs['source_units']).
+    No copia el archivo a memoria: acepta ruta, bytes o file-like binario.
+    """
+    fh, own = _open_binary(file_obj)
+    try:
+        _, titles, skip, sep, units = _sniff_csv(fh)
+        norm = {_norm(t): j for j,t in enumerate(titles)}
+        pick = {}
+        for canon, cands in (('Joint',['Joint']), ('OutputCase',CASE_ALIASES), ('StepType',['StepType']), ('StepNum',['StepNum'])) + tuple((k,[k]) for k in SAP_NUM):
+            j = next((norm[_norm(c)] for c in cands if _norm(c) in norm), None)
+            if j is not None: pick[j] = canon
+        usecols = sorted(pick)
+        reader = pd.read_csv(fh, sep=sep, header=None, skiprows=skip, usecols=usecols,
+                             names=list(range(len(titles))), dtype={j: str for j,c in pick.items() if c in SAP_KEYS},
+                             chunksize=chunksize, skip_blank_lines=True)
+        for chunk in reader:
+            chunk = chunk.rename(columns=pick)
+            for col in SAP_NUM:
+                if col not in chunk.columns: continue
+                a = chunk[col].to_numpy(); new = a.dtype.kind != 'f'
+                if new: a = pd.to_numeric(a, errors='coerce').astype(float, copy=False)
+                if col in units:
+                    f = units[col][1]; a = _scale(a, f) if new else a*f; new = True
+                if new: chunk[col] = a
+            if 'StepNum' in chunk.columns and chunk['StepNum'].dtype.kind != 'f':
+                chunk['StepNum'] = pd.to_numeric(chunk['StepNum'], errors='coerce')
+            if 'OutputCase' not in chunk.columns: chunk['OutputCase'] = ''
+            chunk.attrs['source_units'] = {k: u for k,(u,_) in units.items()}
+            yield chunk
+    finally:
+        if own: fh.close()
+
+@timed()
+def read_sap_csv_envelope(file_obj, chunksize: int=STREAM_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Reduce un CSV arbitrariamente grande a la envolvente por Joint/OutputCase
+    (filas StepType 'Max' y 'Min', como las envolventes de SAP2000).
+    La memoria depende del nº de grupos, no del tamaño del archivo.
+    """
+    hi = lo = None; source = {}
+    for chunk in iter_sap_csv_chunks(file_obj, chunksize):
+        source = chunk.attrs.get('source_units', {})
+        num = [c for c in SAP_NUM if c in chunk.columns]
+        g = chunk.groupby(['Joint','OutputCase'], sort=False, dropna=False)[num]
+        c_hi, c_lo = g.max(), g.min()
+        hi = c_hi if hi is None else pd.concat([hi, c_hi]).groupby(level=[0,1], sort=False, dropna=False).max()
+        lo = c_lo if lo is None else pd.concat([lo, c_lo]).groupby(level=[0,1], sort=False, dropna=False).min()
+    if hi is None:
+        return pd.DataFrame(columns=['Joint','OutputCase','StepType',*SAP_NUM,'ULS_SLS'])
+    env = pd.concat([hi.assign(StepType='Max'), lo.assign(StepType='Min')]).reset_index()
+    env = env.sort_values(['Joint','OutputCase','StepType'], kind='stable').reset_index(drop=True)
+    env = env[['Joint','OutputCase','StepType', *[c for c in SAP_NUM if c in env.columns]]]
+    env['Joint'] = to_category(env['Joint']); env['OutputCase'] = to_category(env['OutputCase'])
+    env['ULS_SLS'] = classify_cases(env['OutputCase'])
+    env.attrs['source_units'] = source
+    return env
+
+
+# --- Excel en streaming (openpyxl read-only, un solo open del libro) ---
+SAP_SHEET = 'Joint Reactions'
+EXCEL_BLOCK_ROWS = 65536
+
+def _to_float(v) -> float:
+    if isinstance(v, (int, float)): return float(v)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def _pick_sheets(names: list[str], sheet: str=None, sheet_pattern: str=None) -> list[str]:
+    """Hojas a leer; ValueError si `sheet`/`sheet_pattern` no coincide con ninguna (nunca se cae a otra hoja)."""
+    if sheet is not None:
+        hit = [n for n in names if n == sheet] or [n for n in names if n.strip().lower() == sheet.strip().lower()]
+        if not hit: raise ValueError(f"No existe la hoja '{sheet}' (hojas: {', '.join(names)}).")
+        return hit[:1]
+    if sheet_pattern is not None:
+        hit = [n for n in names if re.search(sheet_pattern, n, flags=re.IGNORECASE)]
+        if not hit: raise ValueError(f"Ninguna hoja casa con '{sheet_pattern}' (hojas: {', '.join(names)}).")
+        return hit
+    exact = [n for n in names if n.strip().lower() == SAP_SHEET.lower()]
+    return exact or names[:1]
+
+def iter_sap_excel_blocks(file_obj, sheet: str=None, sheet_pattern: str=None, block_rows: int=EXCEL_BLOCK_ROWS):
+    """
+    Recorre las hojas elegidas con openpyxl read-only/values-only y entrega
+    (hoja, títulos, unidades, bloque) donde bloque = {columna: np.ndarray} con F1..M3
+    en float64 ya en kN / kN·m y el resto como object; unidades = {col: unidad de origen}.
+    Las filas nunca pasan por un DataFrame.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        for sname in _pick_sheets(wb.sheetnames, sheet, sheet_pattern):
+            rows = wb[sname].iter_rows(values_only=True)
+            # títulos en las primeras 10 filas; la siguiente puede ser de unidades
+            titles = None
+            for _ in range(10):
+                r = next(rows, None)
+                if r is None: break
+                vals = ['' if v is None else str(v).strip() for v in r]
+                if _is_title_row(vals):
+                    titles = vals; break
+            if titles is None: continue
+            cols = [(j,t) for j,t in enumerate(titles) if t and not t.lower().startswith('unnamed')]
+            numj = [(j,t) for j,t in cols if t in SAP_NUM]
+            objj = [(j,t) for j,t in cols if t not in SAP_NUM]
+            first = next(rows, None)
+            units = unit_factors(titles, list(first)) if first is not None and _is_units_row(titles, list(first)) else {}
+            if first is not None and not units:
+                rows = itertools.chain([first], rows)  # no había fila de unidades
+            src = {t: u for t,(u,_) in units.items()}
+            num = {t: np.empty(block_rows) for _,t in numj}
+            obj = {t: np.empty(block_rows, dtype=object) for _,t in objj}
+
+            def out(n):  # copia del bloque, convertida en el sitio
+                blk = {**{t: a[:n].copy() for t,a in obj.items()}, **{t: a[:n].copy() for t,a in num.items()}}
+                for t,(_,f) in units.items():
+                    if t in blk: _scale(blk[t], f)
+                return sname, titles, src, blk
+            k = 0
+            for r in rows:
+                if r is None or all(v is None for v in r): continue
+                w = len(r)
+                for j,t in numj: num[t][k] = _to_float(r[j]) if j < w else np.nan
+                for j,t in objj: obj[t][k] = r[j] if j < w else None
+                k += 1
+                if k == block_rows:
+                    yield out(k); k = 0
+            if k:
+                yield out(k)
+    finally:
+        wb.close()
+
+@timed()
+def read_sap_excel(file_obj, sheet: str=None, sheet_pattern: str=None) -> pd.DataFrame | None:
+    """
+    Tabla SAP desde XLSX/XLSM en una sola lectura del libro, en kN / kN·m (unidades de
+    origen en df.attrs['source_units']). Con varias hojas (sheet_pattern) añade la
+    columna 'Sheet'. None si ninguna hoja tiene el patrón SAP.
+    """
+    parts, sheets, source = [], [], {}
+    for sname, _, units, block in iter_sap_excel_blocks(file_obj, sheet, sheet_pattern):
+        parts.append(pd.DataFrame(block)); sheets.append(sname)
+        for k,u in units.items(): source.setdefault(k, []).append(u)
+    if not parts: return None
+    if len(set(sheets)) > 1:
+        parts = [p.assign(Sheet=sn) for p,sn in zip(parts, sheets)]
+    df = pd.concat(parts, ignore_index=True)
+    # cada hoja se convierte con sus propias unidades; si difieren se listan todas
+    df.attrs['source_units'] = {k: ', '.join(dict.fromkeys(v)) for k,v in source.items()}
+    return df
+
 # #V3 FUNCIONA
 # # engine/io_sap.py
 # import io
@@ -0,0 +1,174 @@
+"""
+Trabajos en segundo plano para la app: lectura de archivos grandes, diseño por lotes, informes.
+
+    jid = default_manager().submit('Batch design', fn, df, stages=('Design', 'Governing'))
+    st.session_state['__job_batch__'] = jid
+    ...
+    job = poll_job('__job_batch__', 'Batch design')      # barra con etapa + botón Cancel
+    if job and job.status == 'done': st.session_state['__batch__'] = job.result
+
+fn recibe el Job como primer argumento: job.stage('Design') marca la etapa,
+job.callback() es un progress(hechas, total) para las funciones del motor y
+job.check() (también llamado por callback) lanza Cancelled si se pidió cancelar.
+Los trabajos corren en un ThreadPoolExecutor del proceso (el gestor sobrevive a
+los reruns de Streamlit); el cálculo pesado sigue usando los pools de procesos
+del motor (run_design jobs > 1, build_report).
+"""
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.environ.get('BASEPLATE_JOB_WORKERS', '2'))
+KEEP_FINISHED = 32  # trabajos terminados que se conservan para recoger el resultado
+
+class Cancelled(Exception):
+    """Cancelación pedida por el usuario (la lanza Job.check)."""
+
+class Job:
+    def __init__(self, name: str, stages=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.name, self.stages = name, list(stages)
+        self.status = 'queued'  # queued | running | done | error | cancelled
+        self.stage_name, self.done_n, self.total_n = '', 0, 0
+        self.result = self.error = None
+        self.t0 = self.t1 = None
+        self._cancel = threading.Event()
+        self.future = None
+
+    # --- llamado desde el trabajo ---
+    def check(self):
+        if self._cancel.is_set(): raise Cancelled(self.name)
+
+    def stage(self, name: str, total: int=0):
+        self.check()
+        if name not in self.stages: self.stages.append(name)
+        self.stage_name, self.done_n, self.total_n = name, 0, total
+
+    def progress(self, done: int, total: int=None):
+        self.done_n = done
+        if total is not None: self.total_n = total
+        self.check()
+
+    def callback(self, stage: str=None):
+        """progress(hechas, total) para el motor; fija la etapa si se indica."""
+        if stage: self.stage(stage)
+        return self.progress
+
+    # --- consultado desde la UI ---
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel(): self._finish('cancelled')
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'error', 'cancelled')
+
+    @property
+    def fraction(self) -> float:
+        """Avance global: etapas completas + fracción de la actual."""
+        if self.status == 'done': return 1.0
+        n = max(len(self.stages), 1)
+        k = self.stages.index(self.stage_name) if self.stage_name in self.stages else 0
+        sub = min(self.done_n/self.total_n, 1.0) if self.total_n else 0.0
+        return min((k + sub)/n, 1.0)
+
+    @property
+    def elapsed(self) -> float:
+        return ((self.t1 or time.time()) - self.t0) if self.t0 else 0.0
+
+    def text(self) -> str:
+        k = self.stages.index(self.stage_name) + 1 if self.stage_name in self.stages else 0
+        step = f' {self.done_n}/{self.total_n}' if self.total_n else ''
+        where = f'{self.stage_name} ({k}/{len(self.stages)}){step}' if self.stage_name else self.status
+        return f'{self.name}: {where} · {self.elapsed:.0f}s'
+
+    def _finish(self, status: str):
+        if not self.done: self.status, self.t1 = status, time.time()
+
+class JobManager:
+    """Pool de hilos + registro de trabajos por id (thread-safe)."""
+    def __init__(self, workers: int=JOB_WORKERS, keep: int=KEEP_FINISHED):
+        self._ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='baseplate-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.keep = keep
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status, job.t0 = 'running', time.time()
+        try:
+            job.check()
+            job.result = fn(job, *args, **kwargs)
+            job._finish('done')
+        except Cancelled:
+            job._finish('cancelled')
+        except Exception as e:  # el error se muestra en la página que recoge el trabajo
+            job.error = f'{type(e).__name__}: {e}'
+            job._finish('error')
+        finally:
+            self._prune()
+
+    def submit(self, name: str, fn, *args, stages=(), **kwargs) -> str:
+        job = Job(name, stages)
+        with self._lock: self._jobs[job.id] = job
+        job.future = self._ex.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock: return self._jobs.get(job_id) if job_id else None
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job: job.cancel()
+
+    def forget(self, job_id):
+        with self._lock: self._jobs.pop(job_id, None)
+
+    def jobs(self) -> list:
+        with self._lock: return list(self._jobs.values())
+
+    def _prune(self):
+        with self._lock:
+            done = [k for k, j in self._jobs.items() if j.done]
+            for k in done[:max(0, len(done) - self.keep)]: del self._jobs[k]
+
+_default = None
+_default_lock = threading.Lock()
+
+def default_manager() -> JobManager:
+    global _default
+    with _default_lock:
+        if _default is None: _default = JobManager()
+        return _default
+
+def poll_job(key: str, label: str=None, every: float=1.0):
+    """
+    Widget de Streamlit para el trabajo cuyo id está en st.session_state[key]: barra con
+    la etapa y botón Cancel, refrescados cada `every` s (st.fragment si existe, si no
+    rerun). Devuelve el Job una sola vez, cuando terminó (y borra la clave); None si sigue.
+    """
+    import streamlit as st
+    jm = default_manager()
+    job = jm.get(st.session_state.get(key))
+    if job is None:
+        st.session_state.pop(key, None); return None
+    if job.done:
+        del st.session_state[key]; jm.forget(job.id)
+        if job.status == 'error': st.error(f'{label or job.name} failed – {job.error}')
+        elif job.status == 'cancelled': st.warning(f'{label or job.name} cancelled.')
+        return job
+
+    def body():
+        j = jm.get(job.id)
+        if j is None or j.done: st.rerun()  # la página completa recoge el resultado
+        st.progress(j.fraction, text=j.text())
+        if st.button('Cancel', key=f'{key}__cancel'): j.cancel()
+
+    frag = getattr(st, 'fragment', None)
+    if frag is not None:
+        frag(run_every=every)(body)()
+    else:
+        body(); time.sleep(every); st.rerun()
+    return None
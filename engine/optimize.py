@@ -0,0 +1,233 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .steel.bolts import GRADES, AREA_THREAD, steel_tension_capacity, steel_shear_capacity, steel_interaction
+from .concrete.aci318_25 import pullout
+from .anchors.group import AnchorGroup
+from .anchors.distribute import shear_weights
+from .design import LOAD_COLS, design_params, check_loads, anchor_tension
+from .prune import pareto_mask, prune_mask
+from .parallel import mp_context
+from .instrument import timed
+
+RHO_STEEL = 7.85e-6  # kg/mm3
+PLATE_T = (10, 12, 16, 19, 20, 22, 25, 28, 32, 36, 40, 45, 50, 55, 60, 65, 70, 75, 80, 90, 100)
+GRIDS = ((2,2), (2,3), (3,2), (3,3), (2,4), (4,2), (3,4), (4,3), (4,4))  # (filas Y, columnas X)
+BATCH = 32
+
+def default_space(geom: dict, anc: dict) -> dict:
+    """Espacio de búsqueda por defecto alrededor de la columna (ver optimize)."""
+    bf, d = geom.get('bf',200.0), geom.get('d',300.0)
+    B0 = 5.0*math.ceil((bf + 100.0)/5.0); L0 = 5.0*math.ceil((d + 100.0)/5.0)
+    return {'B': (B0, B0 + 600.0), 'L': (L0, L0 + 600.0), 'step': 5.0, 't': PLATE_T,
+            'D': tuple(sorted(AREA_THREAD)), 'grades': tuple(GRADES), 'grids': GRIDS,
+            'edge_mm': 100.0, 'bolt_proj_mm': 150.0}
+
+def _unit_grid(rows: int, cols: int):
+    """Rejilla centrada con coordenadas en [-1, 1]; se escala con (B/2 − e, L/2 − e)."""
+    xi = np.linspace(-1.0, 1.0, cols) if cols > 1 else np.zeros(1)
+    eta = np.linspace(-1.0, 1.0, rows) if rows > 1 else np.zeros(1)
+    X, Y = np.meshgrid(xi, eta)
+    return X.ravel(), Y.ravel()
+
+def _grid_bolts(rows, cols, hx, hy, hole):
+    X, Y = _unit_grid(rows, cols)
+    return [{'id': f'B{i+1}', 'x': float(x*hx), 'y': float(y*hy), 'hole_d': hole} for i,(x,y) in enumerate(zip(X, Y))]
+
+# --- Evaluación exacta de anclajes (corre en los workers) ---
+_CTX = {}
+
+def _init_ctx(ctx: dict):
+    _CTX.clear(); _CTX.update(ctx)
+
+def _eval_batch(batch: list) -> list:
+    """
+    Para cada geometría (B, L, rejilla): tracción real por perno en todos los casos,
+    grupo (Ncb) y luego el primer D (menor masa) y grado (menor fu) que cumplen.
+    Devuelve (masa, índice de candidato, D, grado, utilizaciones) o None si no cumple.
+    """
+    c = _CTX
+    out = []
+    for k, gi, hx, hy, D_lb, D_sp, plate_kg in batch:
+        a, b, cc = c['terms'][gi]
+        Nb = np.maximum(a + b/hy + cc/hx, 0.0)       # casos × pernos
+        n = Nb.shape[1]
+        u_Ncb = float(Nb.sum(axis=1).max())/max(c['Ncb'],1e-9)
+        if u_Ncb > 1.0: out.append(None); continue
+        Vb = c['Vmax'][:,None]*c['w'][gi][None,:]
+        N_bolt = float(Nb.max())
+        hit = None
+        for D in c['D']:
+            if D < D_lb or D > D_sp: continue
+            u_Np = N_bolt/max(pullout(c['fc'], D),1e-9)
+            if u_Np > 1.0: continue
+            for g in c['grades']:
+                u_st = float(steel_interaction(Nb, Vb, steel_tension_capacity(g, D), steel_shear_capacity(g, D), c['interact']).max())
+                if u_st <= 1.0: hit = (D, g, u_st, u_Np); break
+            if hit: break
+        if hit is None: out.append(None); continue
+        D, g, u_st, u_Np = hit
+        bolts_kg = n*RHO_STEEL*math.pi*D**2/4.0*c['bolt_len']
+        out.append((plate_kg + bolts_kg, k, D, g, {'util_steel': u_st, 'util_Ncb': u_Ncb, 'util_Np': u_Np, 'bolts_kg': bolts_kg}))
+    return out
+
+@timed()
+def optimize(loads: dict, geom: dict, mat: dict, anc: dict, ass: dict, cfg: dict, space: dict=None,
+             workers: int=1, verify: int=20, progress=None) -> dict:
+    """
+    Placa + anclajes de menor masa de acero que cumple todos los casos de `loads`
+    (dict N..My como design.loads_from_table). Busca B y L (paso 5 mm), t en space['t'],
+    D en AREA_THREAD, grado en GRADES y rejillas paramétricas filas × columnas.
+      1) Poda de casos dominados (prune_mask) -> pocos casos.
+      2) Placa en forma cerrada para toda la malla B × L: σmax, aplastamiento y t
+         (fórmulas de contact_pressures / plate_t_local), una multiplicación de matrices.
+      3) Tracción del perno más cargado para toda la malla y rejilla (escala 1/(L/2−e),
+         1/(B/2−e)) -> D mínimo y cota inferior de masa por candidato.
+      4) Candidatos en orden de cota; evaluación exacta por lotes (en paralelo si
+         workers > 1), descartando los de cota ≥ mejor masa encontrada.
+      5) Verificación con design.check_loads (métodos de la página 04) de los mejores.
+    El método de placa de la búsqueda es siempre el local; la verificación usa el del proyecto.
+    """
+    t0 = time.perf_counter()
+    sp = {**default_space(geom, anc), **(space or {})}
+    p0 = design_params(geom, mat, anc, ass, cfg)
+    fc = mat.get('fc',28.0); bf = geom.get('bf',0.0); fy = mat.get('fy_plate',250.0)
+    e = float(sp['edge_mm']); t_min = geom.get('t_min',10.0)
+    omega = p0['omega0'] if p0['seismic_on'] else 1.0
+    bfc = max(p0['bearing_fc']/1000.0, 1e-12)
+
+    # 1) casos
+    N, Vx, Vy, Mx, My = (np.nan_to_num(np.asarray(loads[k], dtype=float)) for k in LOAD_COLS)
+    Vx, Vy = Vx*omega, Vy*omega
+    keep = prune_mask(N, Vx, Vy, Mx, My)
+    N, Vx, Vy, Mx, My = N[keep], Vx[keep], Vy[keep], Mx[keep], My[keep]
+    V = np.hypot(Vx, Vy)
+    u_V = max(float(V.max(initial=0.0))/max(p0['Vcb'],1e-9), float(V.max(initial=0.0))/max(p0['Vcp'],1e-9))
+    if u_V > 1.0:
+        raise ValueError(f'Cortante en el hormigón (Vcb/Vcp) no cumple (util {u_V:.2f}); no depende de placa ni pernos.')
+
+    # 2) placa: σmax(B,L) = max_k [N/(BL) + 6e3|Mx|/(BL²) + 6e3|My|/(LB²)]
+    Bs = np.arange(sp['B'][0], sp['B'][1] + 1e-9, sp['step']); Ls = np.arange(sp['L'][0], sp['L'][1] + 1e-9, sp['step'])
+    BB, LL = (a.ravel() for a in np.meshgrid(Bs, Ls, indexing='ij'))
+    P = np.column_stack([N, 6e3*np.abs(Mx), 6e3*np.abs(My)])
+    P = P[pareto_mask(P)]
+    sigma = (P @ np.vstack([1.0/(BB*LL), 1.0/(BB*LL**2), 1.0/(LL*BB**2)])).max(axis=0)
+    util_b = sigma/bfc
+    m = np.maximum(np.maximum(BB - bf, 0.0)/2.0, np.maximum(LL - 0.8*bf, 0.0)/2.0)
+    t_req = np.maximum(np.sqrt(6e3*np.maximum(sigma,0.0)*m**2/2.0/(0.9*fy)), t_min)
+    T_opts = np.asarray(sorted(sp['t']), dtype=float)
+    it = np.searchsorted(T_opts, t_req - 1e-9)
+    ok_plate = (util_b <= 1.0) & (it < len(T_opts))
+    t_sel = np.where(ok_plate, T_opts[np.minimum(it, len(T_opts)-1)], np.nan)
+    plate_kg = RHO_STEEL*BB*LL*t_sel
+
+    # 3) anclajes: cotas por rejilla
+    Nt = anchor_tension(N)  # N compresión +
+    Ds = np.asarray(sorted(sp['D']), dtype=float)
+    grades = sorted(sp['grades'], key=lambda g: GRADES.get(g, GRADES['F1554 Gr.55'])['fu'])
+    Nsa_max = np.array([max(steel_tension_capacity(g, D) for g in grades) for D in Ds])
+    Vsa_max = np.array([max(steel_shear_capacity(g, D) for g in grades) for D in Ds])
+    Np_D = np.array([pullout(fc, D) for D in Ds])
+    bolt_len = anc.get('hef_mm',400.0) + sp['bolt_proj_mm']
+    Vmax = np.maximum(np.abs(Vx), np.abs(Vy))
+    terms, ws, cand = [], [], []
+    for gi, (rows, cols) in enumerate(sp['grids']):
+        X, Y = _unit_grid(rows, cols)
+        U = AnchorGroup(ids=np.arange(X.size).astype(object), x=X, y=Y, hole_d=np.zeros(X.size),
+                        diameter=np.zeros(X.size), grade=np.full(X.size, '', dtype=object))
+        C = U.plastic_tension_coeffs if p0['tension_mode'].upper().startswith('PLASTIC') else U.elastic_tension_coeffs
+        a = Nt[:,None]*C[0][None,:]
+        b = np.maximum(Mx,0.0)[:,None]*C[1][None,:] + np.maximum(-Mx,0.0)[:,None]*C[2][None,:]
+        c = np.maximum(My,0.0)[:,None]*C[3][None,:] + np.maximum(-My,0.0)[:,None]*C[4][None,:]
+        terms.append((a, b, c)); w = shear_weights(U, p0['shear_mode']); ws.append(w)
+        hx = BB/2.0 - e if cols > 1 else np.ones_like(BB)
+        hy = LL/2.0 - e if rows > 1 else np.ones_like(LL)
+        valid = ok_plate & (hx > 0) & (hy > 0)
+        Q = np.column_stack([a.ravel(), b.ravel(), c.ravel()])
+        Q = Q[pareto_mask(Q)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            T_max = np.maximum((Q @ np.vstack([np.ones_like(hx), 1.0/hy, 1.0/hx])).max(axis=0), 0.0)
+        s = np.full_like(BB, np.inf)
+        if cols > 1: s = np.minimum(s, 2.0*hx/(cols-1))
+        if rows > 1: s = np.minimum(s, 2.0*hy/(rows-1))
+        D_sp = s/4.0  # separación mínima 4·da
+        V_b = float(Vmax.max(initial=0.0))*float(w.max())
+        # menor D que aguanta T_max (mejor grado) y pullout, y que cabe en la rejilla
+        okD = (Nsa_max[None,:] >= T_max[:,None]) & (Np_D[None,:] >= T_max[:,None]) & (Vsa_max[None,:] >= V_b) & (Ds[None,:] <= D_sp[:,None])
+        has = okD.any(axis=1) & valid
+        iD = np.argmax(okD, axis=1)
+        nb = rows*cols
+        lb = plate_kg + nb*RHO_STEEL*math.pi*Ds[iD]**2/4.0*bolt_len
+        for k in np.flatnonzero(has):
+            cand.append((float(lb[k]), gi, int(k), float(hx[k]), float(hy[k]), float(Ds[iD[k]]), float(D_sp[k])))
+    cand.sort()
+
+    # 4) evaluación exacta con acotación
+    ctx = {'terms': terms, 'w': ws, 'Vmax': Vmax, 'D': tuple(float(D) for D in Ds), 'grades': grades, 'fc': fc,
+           'interact': p0['interact'], 'Ncb': p0['Ncb'], 'bolt_len': bolt_len}
+    best = math.inf; found = []; evaluated = 0
+    def batches(pos):
+        out = []
+        while pos < len(cand) and len(out) < BATCH:
+            lb, gi, k, hx, hy, D_lb, D_sp = cand[pos]
+            if lb >= best: return out, len(cand)
+            out.append((pos, gi, hx, hy, D_lb, D_sp, float(plate_kg[k]))); pos += 1
+        return out, pos
+
+    def absorb(res):
+        nonlocal best
+        for r in res:
+            if r is None: continue
+            found.append(r); best = min(best, r[0])
+
+    pos = 0
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context(), initializer=_init_ctx, initargs=(ctx,)) as ex:
+            while pos < len(cand):
+                wave = []
+                for _ in range(2*workers):
+                    bt, pos = batches(pos)
+                    if bt: wave.append(bt)
+                if not wave: break
+                for f in [ex.submit(_eval_batch, bt) for bt in wave]: absorb(f.result())
+                evaluated += sum(len(bt) for bt in wave)
+                if progress: progress(min(pos, len(cand)), len(cand))
+    else:
+        _init_ctx(ctx)
+        while pos < len(cand):
+            bt, pos = batches(pos)
+            if not bt: break
+            absorb(_eval_batch(bt)); evaluated += len(bt)
+            if progress: progress(min(pos, len(cand)), len(cand))
+
+    stats = {'cases': int(len(N)), 'plates': int(ok_plate.sum()), 'candidates': len(cand),
+             'evaluated': evaluated, 'passing': len(found)}
+    if not found:
+        stats['time_s'] = time.perf_counter() - t0
+        return {'ok': False, 'stats': stats}
+
+    # 5) verificación con la cadena completa de la página 05
+    found.sort(key=lambda r: (r[0], r[1]))
+    arrs = dict(zip(LOAD_COLS, (N, Vx/omega, Vy/omega, Mx, My)))
+    chosen = None
+    for mass, pos_k, D, g, u in found[:max(1, verify)]:
+        _, gi, k, hx, hy, _, _ = cand[pos_k]
+        rows, cols = sp['grids'][gi]
+        t = float(t_sel[k])
+        bolts = _grid_bolts(rows, cols, hx if cols > 1 else 0.0, hy if rows > 1 else 0.0, D + 6.0)
+        p = design_params({**geom, 'B': float(BB[k]), 'L': float(LL[k])}, mat,
+                          {**anc, 'bolts': bolts, 'D_mm': D, 'grade': g}, ass, cfg)
+        r = check_loads(*(arrs[c] for c in LOAD_COLS), p)
+        ver = bool(r['t_req_mm'].max() <= t + 1e-6 and r['util_max'].max() <= 1.0 + 1e-9)
+        res = {'ok': True, 'verified': ver, 'B': float(BB[k]), 'L': float(LL[k]), 't': t,
+               'rows': rows, 'cols': cols, 'edge_mm': e, 'D_mm': D, 'grade': g, 'n_bolts': rows*cols,
+               'bolts': bolts, 'mass_kg': mass, 'plate_kg': mass - u['bolts_kg'], 'bolts_kg': u['bolts_kg'],
+               'util': {'bearing': float(r['util_bearing'].max()), **{k2: v for k2,v in u.items() if k2 != 'bolts_kg'},
+                        'util_max': float(r['util_max'].max())},
+               'weld_mm': float(r['weld_mm'].max())}
+        if chosen is None or ver: chosen = res
+        if ver: break
+    stats['time_s'] = time.perf_counter() - t0
+    chosen['stats'] = stats
+    return chosen
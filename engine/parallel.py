@@ -0,0 +1,162 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from .design import LOAD_COLS, loads_from_table, check_loads
+from .prune import prune_rows, prune_info
+from .io_sap import key_codes
+from .instrument import timed
+
+BLOCK_ROWS = 50_000
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+def mp_context():
+    """
+    Contexto de los pools de procesos. Nunca 'fork': los pools se crean desde hilos del
+    servidor (JobManager, Streamlit) y un hijo copiado con un lock tomado por otro hilo
+    (SharedCache, instrument, logging) se bloquea. BASEPLATE_MP_START lo fija a mano.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    method = os.environ.get('BASEPLATE_MP_START') or ('forkserver' if 'forkserver' in methods else 'spawn')
+    return multiprocessing.get_context(method)
+
+# --- Memoria compartida ---
+class SharedArray:
+    """
+    Array float64 en multiprocessing.shared_memory. El proceso que lo crea es
+    el dueño (close + unlink al salir); los workers sólo se adjuntan por nombre.
+    """
+    def __init__(self, arr: np.ndarray):
+        arr = np.ascontiguousarray(arr, dtype=float)
+        self.shape = arr.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self.array = np.ndarray(self.shape, dtype=float, buffer=self.shm.buf)
+        self.array[...] = arr
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.array = None
+        self.shm.close(); self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach(name: str):
+    """
+    Adjunta por nombre. Los workers comparten el resource_tracker del proceso
+    dueño, así que no hay que des-registrar: el unlink lo hace sólo el dueño.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+# --- Worker ---
+_W = {}  # estado por proceso: shm, loads (5 × filas), configuraciones
+
+def _init_worker(name: str, shape: tuple, configs: list):
+    shm = _attach(name)
+    _W.update(shm=shm, loads=np.ndarray(shape, dtype=float, buffer=shm.buf), configs=configs)
+
+def _run_task(i_cfg: int, a: int, b: int) -> dict:
+    L = _W['loads']
+    return check_loads(*(L[i, a:b] for i in range(len(LOAD_COLS))), _W['configs'][i_cfg])
+
+# --- Reparto ---
+def joint_blocks(codes: np.ndarray, block_rows: int=BLOCK_ROWS) -> list:
+    """
+    Cortes [a, b) sobre filas ordenadas por Joint, sin partir ningún Joint,
+    de ~block_rows filas (un Joint más grande que el bloque va solo).
+    """
+    n = len(codes)
+    if n == 0: return []
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    out, a = [], 0
+    for s in starts[1:]:
+        if s - a >= block_rows: out.append((a, int(s))); a = int(s)
+    out.append((a, n))
+    return out
+
+def iter_design_parallel(df: pd.DataFrame, params, preset: str='Preset A (default)', flips=(), classes=None,
+                         workers: int=None, by: str='joint', block_rows: int=BLOCK_ROWS,
+                         prune: bool=False, progress=None):
+    """
+    Diseño por lotes (mismo resultado que design.design_table) repartido en un
+    ProcessPoolExecutor. Las cargas N..My viven una sola vez en memoria compartida;
+    cada tarea es (configuración, rango de filas) y sólo viajan los resultados.
+      params: un dict de design_params o una lista (configuraciones candidatas).
+      by: 'joint' -> bloques de Joints completos × configuraciones;
+          'config' -> una tarea por configuración con todas las filas.
+    Genera (i_cfg, DataFrame del bloque) en orden determinista (orden de envío),
+    a medida que terminan. progress(hechas, total) opcional.
+    """
+    configs = [params] if isinstance(params, dict) else list(params)
+    if classes and 'ULS_SLS' in df.columns:
+        df = df.loc[df['ULS_SLS'].isin(classes)]
+    loads = loads_from_table(df, preset, flips)
+    joints = key_codes(df['Joint']) if 'Joint' in df.columns else np.zeros(len(df), dtype=int)
+    info = None
+    if prune:
+        keep = prune_rows(loads, configs, joints)  # la poda depende de Ω0: unión entre configuraciones
+        info = prune_info(keep)
+        df = df.loc[keep]; joints = joints[keep]
+        loads = {k: v[keep] for k,v in loads.items()}
+
+    # filas ordenadas por Joint -> cada Joint es un rango contiguo
+    codes, _ = pd.factorize(joints)
+    order = np.argsort(codes, kind='stable')
+    df = df.iloc[order]
+    L = np.vstack([loads[k][order] for k in LOAD_COLS]) if len(df) else np.zeros((len(LOAD_COLS), 0))
+    blocks = joint_blocks(codes[order], block_rows) if by == 'joint' else [(0, len(df))]
+    tasks = [(i, a, b) for i in range(len(configs)) for a, b in blocks]
+    ids = {k: df[k].array for k in ('Joint','OutputCase','ULS_SLS') if k in df.columns}
+
+    def frame(res, a, b):
+        cols = {k: v[a:b] for k,v in ids.items()}
+        cols.update({k: L[j, a:b] for j,k in enumerate(LOAD_COLS)})
+        cols.update(res)
+        out = pd.DataFrame(cols, index=df.index[a:b])
+        if info: out.attrs['prune'] = info
+        return out
+
+    if not tasks: return
+    with SharedArray(L) as sh, ProcessPoolExecutor(max_workers=workers or default_workers(), mp_context=mp_context(),
+                                                   initializer=_init_worker,
+                                                   initargs=(sh.name, sh.shape, configs)) as ex:
+        futs = [ex.submit(_run_task, *t) for t in tasks]
+        try:
+            for k, (f, (i, a, b)) in enumerate(zip(futs, tasks)):
+                yield i, frame(f.result(), a, b)
+                if progress: progress(k + 1, len(tasks))
+        finally:
+            for f in futs: f.cancel()
+
+@timed()
+def design_parallel(df: pd.DataFrame, params, preset: str='Preset A (default)', flips=(), classes=None,
+                    workers: int=None, by: str='joint', block_rows: int=BLOCK_ROWS, prune: bool=False,
+                    progress=None):
+    """
+    Como iter_design_parallel pero reunido: un DataFrame (filas agrupadas por Joint)
+    si params es un dict, o una lista con uno por configuración.
+    """
+    single = isinstance(params, dict)
+    configs = [params] if single else list(params)
+    parts = [[] for _ in configs]
+    for i, blk in iter_design_parallel(df, configs, preset, flips, classes, workers, by, block_rows, prune, progress):
+        parts[i].append(blk)
+    out = []
+    for ps in parts:
+        r = pd.concat(ps) if ps else pd.DataFrame()
+        if ps and 'prune' in ps[0].attrs: r.attrs['prune'] = ps[0].attrs['prune']
+        out.append(r)
+    return out[0] if single else out
@@ -1,18 +1,82 @@
 import io
-import matplotlib.pyplot as plt
+import hashlib
+from html import escape
+from .cache import shared_cache
+from .instrument import timed
 
-def render_plan_png(B, L, bolts, d_col, bf_col):
-    fig, ax = plt.subplots(figsize=(6,4))
-    ax.add_patch(plt.Rectangle((-B/2,-L/2), B, L, fill=False, lw=1.5))
-    ax.add_patch(plt.Rectangle((-bf_col/2,-d_col/2), bf_col, d_col, fill=False, ls='--', lw=1.0))
+STYLE = {'bolt_r': 6.0, 'labels': True, 'figsize': (6.0, 4.0), 'dpi': 180, 'color': '#1f77b4'}
+
+def _key(B, L, bolts, d_col, bf_col, style):
+    """Argumentos normalizados (hashables) para la caché compartida."""
+    bl = tuple((str(b.get('id','')), float(b['x']), float(b['y'])) for b in bolts)
+    st = tuple(sorted({**STYLE, **(style or {})}.items()))
+    return float(B), float(L), bl, float(d_col), float(bf_col), st
+
+def _memo(kind: str, fn, key: tuple):
+    """Planos en shared_cache() ('plan'): cada geometría se dibuja una vez por servidor."""
+    h = hashlib.sha1(repr((kind, key)).encode('utf-8')).hexdigest()
+    return shared_cache().get_or_compute('plan', h, lambda: fn(*key))
+
+def _png(B, L, bolts, d_col, bf_col, style):
+    # Figure + Agg sin pyplot: sin estado global ni gestor de figuras
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.patches import Rectangle
+    from matplotlib.collections import EllipseCollection
+    s = dict(style)
+    fig = Figure(figsize=s['figsize']); FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.add_patch(Rectangle((-B/2,-L/2), B, L, fill=False, lw=1.5))
+    ax.add_patch(Rectangle((-bf_col/2,-d_col/2), bf_col, d_col, fill=False, ls='--', lw=1.0))
     ax.axhline(0,color='k',lw=0.5); ax.axvline(0,color='k',lw=0.5)
-    for b in bolts:
-        ax.add_patch(plt.Circle((b['x'], b['y']), 6, color='tab:blue'))
-        ax.text(b['x']+8, b['y']+8, b.get('id',''), fontsize=7)
+    if bolts:
+        xy = [(x, y) for _,x,y in bolts]
+        r2 = 2*s['bolt_r']
+        ax.add_collection(EllipseCollection(r2, r2, 0.0, units='xy', offsets=xy, offset_transform=ax.transData,
+                                            facecolors=s['color'], edgecolors='none'))
+        if s['labels']:
+            for bid,x,y in bolts: ax.text(x+8, y+8, bid, fontsize=7)
     ax.set_aspect('equal', 'box')
     ax.set_xlim(-B*0.65, B*0.65); ax.set_ylim(-L*0.65, L*0.65)
     ax.set_xlabel('x (mm)'); ax.set_ylabel('y (mm)')
+    fig.subplots_adjust(left=0.12, right=0.97, bottom=0.13, top=0.97)  # fijo: tight_layout mide todo el texto
     buf = io.BytesIO()
-    plt.tight_layout(); plt.savefig(buf, format='png', dpi=180)
-    plt.close(fig); buf.seek(0)
-    return buf.read()
\ No newline at end of file
+    fig.savefig(buf, format='png', dpi=s['dpi'])
+    return buf.getvalue()
+
+def _svg(B, L, bolts, d_col, bf_col, style):
+    s = dict(style)
+    W, H = 1.3*max(B, 1.0), 1.3*max(L, 1.0)
+    px = s['figsize'][0]*100.0
+    k = W/px                                   # mm por píxel: grosores y textos en px de pantalla
+    f = lambda v: f'{v:.3f}'.rstrip('0').rstrip('.')
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{px:.0f}" height="{px*H/W:.0f}" '
+           f'viewBox="{f(-W/2)} {f(-H/2)} {f(W)} {f(H)}" font-family="Helvetica, Arial, sans-serif">',
+           '<g transform="scale(1,-1)" fill="none" stroke="black">',
+           f'<line x1="{f(-W/2)}" y1="0" x2="{f(W/2)}" y2="0" stroke-width="{f(0.5*k)}"/>',
+           f'<line x1="0" y1="{f(-H/2)}" x2="0" y2="{f(H/2)}" stroke-width="{f(0.5*k)}"/>',
+           f'<rect x="{f(-B/2)}" y="{f(-L/2)}" width="{f(B)}" height="{f(L)}" stroke-width="{f(1.5*k)}"/>',
+           f'<rect x="{f(-bf_col/2)}" y="{f(-d_col/2)}" width="{f(bf_col)}" height="{f(d_col)}" '
+           f'stroke-width="{f(k)}" stroke-dasharray="{f(4*k)} {f(2*k)}"/>']
+    out += [f'<circle cx="{f(x)}" cy="{f(y)}" r="{f(s["bolt_r"])}" fill="{s["color"]}" stroke="none"/>' for _,x,y in bolts]
+    out.append('</g>')
+    if s['labels']:
+        out += [f'<text x="{f(x+8)}" y="{f(-y-8)}" font-size="{f(9*k)}">{escape(bid)}</text>' for bid,x,y in bolts]
+    out.append('</svg>')
+    return '\n'.join(out)
+
+@timed()
+def render_plan_png(B, L, bolts, d_col, bf_col, style: dict=None) -> bytes:
+    """Planta de la placa en PNG; memoizada (LRU compartida) por geometría, pernos y estilo."""
+    return _memo('png', _png, _key(B, L, bolts, d_col, bf_col, style))
+
+@timed()
+def render_plan_svg(B, L, bolts, d_col, bf_col, style: dict=None) -> str:
+    """Misma planta como SVG de texto (sin matplotlib): para la UI y como vectorial en el PDF."""
+    return _memo('svg', _svg, _key(B, L, bolts, d_col, bf_col, style))
+
+def plan_cache_info() -> dict:
+    return shared_cache().info().get('plan', {})
+
+def clear_plan_cache():
+    shared_cache().clear('plan')
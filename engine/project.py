@@ -0,0 +1,242 @@
+"""
+Proyecto binario (.bpz): ZIP con manifiesto JSON, tablas Parquet y blobs (imágenes).
+
+    save_project(st.session_state, 'obra.bpz')
+    st.session_state.update(open_project('obra.bpz'))    # sólo lee el manifiesto
+
+Las entradas JSON (cfg, geom, mat, anchors...) van al manifiesto; los DataFrames
+(tabla SAP normalizada, resultados) a tables/*.parquet y los bytes a blobs/. Los
+miembros se guardan sin comprimir en el ZIP (el Parquet ya lo está) para poder leerlos
+sobre un memory-map del archivo: al abrir, cada tabla queda como LazyTable y se
+lee la primera vez que una página accede a ella. El archivo (y el memory-map) se
+cierra cuando ya no queda ninguna tabla por leer; con remove=True se borra entonces.
+"""
+import io
+import os
+import json
+import mmap
+import struct
+import weakref
+import zipfile
+import pandas as pd
+from .instrument import timed
+
+PROJECT_FORMAT, PROJECT_VERSION = 'baseplate-i3-project', 1
+MANIFEST = 'project.json'
+SKIP_KEYS = ('index',)  # objetos derivados que las páginas reconstruyen (CaseIndex)
+SKIP_PREFIXES = ('FormSubmitter', '__prof', '__dl_')  # widgets cuyo valor no se puede reasignar
+TUPLE = '__tuple__'  # JSON no tiene tuplas: {'__tuple__': [...]} en el manifiesto
+
+def _jsonable(v) -> bool:
+    try:
+        json.dumps(v); return True
+    except (TypeError, ValueError):
+        return False
+
+def _tag(v):
+    if isinstance(v, tuple): return {TUPLE: [_tag(x) for x in v]}
+    if isinstance(v, list): return [_tag(x) for x in v]
+    if isinstance(v, dict): return {k: _tag(x) for k, x in v.items()}
+    return v
+
+def _untag(v):
+    if isinstance(v, dict):
+        return tuple(_untag(x) for x in v[TUPLE]) if len(v) == 1 and TUPLE in v else {k: _untag(x) for k, x in v.items()}
+    return [_untag(x) for x in v] if isinstance(v, list) else v
+
+def _member(path: tuple, ext: str) -> str:
+    name = '.'.join(str(p).strip('_') or 'x' for p in path)
+    return f"{'tables' if ext == 'parquet' else 'blobs'}/{''.join(c if c.isalnum() or c in '._-' else '_' for c in name)}.{ext}"
+
+def _to_parquet(df: pd.DataFrame) -> bytes:
+    from .cache import normalize_table
+    buf = io.BytesIO()
+    try:
+        df.to_parquet(buf)
+    except Exception:  # columnas object mixtas: forma tipada de la caché
+        buf = io.BytesIO(); normalize_table(df).to_parquet(buf)
+    return buf.getvalue()
+
+# --- Guardar ---
+@timed()
+def save_project(state: dict, target) -> dict:
+    """
+    Escribe el proyecto en `target` (ruta o archivo binario) y devuelve el manifiesto.
+    Se recorren los diccionarios anidados; lo que no es JSON, DataFrame/Series ni bytes se omite
+    (queda listado en manifest['skipped']).
+    """
+    manifest = {'format': PROJECT_FORMAT, 'version': PROJECT_VERSION, 'state': {}, 'tables': {}, 'blobs': {}, 'skipped': []}
+
+    def walk(v, path, zf):
+        if isinstance(v, LazyTable): v = v.load()
+        if isinstance(v, (pd.DataFrame, pd.Series)):  # Series (p.ej. hashes de revisión) como tabla de una columna
+            m = _member(path, 'parquet')
+            zf.writestr(zipfile.ZipInfo(m), _to_parquet(v.to_frame() if isinstance(v, pd.Series) else v))
+            attrs = {k: a for k, a in v.attrs.items() if _jsonable(a)}
+            manifest['tables'][m] = {'path': list(path), 'rows': len(v), 'attrs': attrs, 'series': isinstance(v, pd.Series),
+                                     'columns': [str(c) for c in (v.to_frame() if isinstance(v, pd.Series) else v).columns]}
+            return None
+        if isinstance(v, (bytes, bytearray)):
+            m = _member(path, 'bin')
+            zf.writestr(zipfile.ZipInfo(m), bytes(v))
+            manifest['blobs'][m] = {'path': list(path), 'bytes': len(v)}
+            return None
+        if isinstance(v, dict):
+            out = {}
+            for k, x in (v.raw_items() if isinstance(v, LazyDict) else v.items()):
+                if k in SKIP_KEYS and path: continue
+                r = walk(x, path + (k,), zf)
+                if r is not None: out[k] = r
+            return out
+        if _jsonable(v): return _tag(v)
+        manifest['skipped'].append('.'.join(map(str, path)))
+        return None
+
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for k, v in dict(state).items():
+            if str(k).startswith(SKIP_PREFIXES): continue
+            r = walk(v, (k,), zf)
+            if r is not None: manifest['state'][k] = r
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=1, default=str))
+    return manifest
+
+def project_bytes(state: dict) -> bytes:
+    buf = io.BytesIO(); save_project(state, buf)
+    return buf.getvalue()
+
+# --- Abrir (perezoso) ---
+def _close(f, mm, remove):
+    mm.close(); f.close()
+    if remove:
+        try:
+            os.remove(remove)
+        except OSError:
+            pass
+
+class ProjectFile:
+    """
+    Archivo .bpz abierto con memory-map; los miembros se leen por desplazamiento sin descomprimir.
+    Se cierra con close() o al dejar de estar referenciado (remove=True: borra el archivo, p.ej. temporal).
+    """
+    def __init__(self, path: str, remove: bool=False):
+        self.path = path
+        self._f = open(path, 'rb')
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._fin = weakref.finalize(self, _close, self._f, self._mm, path if remove else None)
+        with zipfile.ZipFile(self._f) as zf:
+            self._info = {i.filename: i for i in zf.infolist()}
+            self.manifest = json.loads(zf.read(MANIFEST))
+        if self.manifest.get('format') != PROJECT_FORMAT:
+            self.close(); raise ValueError(f'{path}: no es un proyecto {PROJECT_FORMAT}')
+
+    def close(self):
+        self._fin()
+
+    def _span(self, name: str) -> memoryview:
+        i = self._info[name]
+        if i.compress_type != zipfile.ZIP_STORED: raise ValueError(f'{name}: miembro comprimido')
+        n, m = struct.unpack('<HH', self._mm[i.header_offset+26:i.header_offset+30])  # cabecera local
+        a = i.header_offset + 30 + n + m
+        return memoryview(self._mm)[a:a+i.file_size]
+
+    def table(self, name: str) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        t = self.manifest['tables'][name]
+        df = pq.read_table(pa.py_buffer(self._span(name))).to_pandas()
+        if t.get('series'): df = df.iloc[:, 0]
+        df.attrs.update(t.get('attrs', {}))
+        return df
+
+    def blob(self, name: str) -> bytes:
+        return bytes(self._span(name))
+
+class LazyTable:
+    """Marcador de una tabla aún no leída."""
+    __slots__ = ('pf', 'name', 'rows', '_df')
+
+    def __init__(self, pf: ProjectFile, name: str):
+        self.pf, self.name, self._df = pf, name, None
+        self.rows = pf.manifest['tables'][name]['rows']
+
+    def load(self) -> pd.DataFrame:
+        if self._df is None:
+            self._df = self.pf.table(self.name); self.pf = None  # sin referencias pendientes el archivo se cierra
+        return self._df
+
+    def __len__(self):
+        return self.rows
+
+    def __repr__(self):
+        return f'LazyTable({self.name!r}, rows={self.rows})'
+
+class LazyDict(dict):
+    """
+    dict que lee sus LazyTable al primer acceso: ['k'], .get, .items, .values, .pop,
+    .setdefault, .copy y también {**d} / dict(d) (definir __iter__ obliga a CPython a
+    copiar con __getitem__ en vez de leer la tabla hash).
+    """
+    def __getitem__(self, k):
+        v = dict.__getitem__(self, k)
+        if isinstance(v, LazyTable):
+            v = v.load(); dict.__setitem__(self, k, v)
+        return v
+
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def get(self, k, default=None):
+        return self[k] if k in self else default
+
+    def pop(self, k, *default):
+        if k not in self:
+            if default: return default[0]
+            raise KeyError(k)
+        v = self[k]; dict.__delitem__(self, k)
+        return v
+
+    def popitem(self):
+        k = next(reversed(dict.keys(self)))
+        return k, self.pop(k)
+
+    def setdefault(self, k, default=None):
+        if k not in self: dict.__setitem__(self, k, default)
+        return self[k]
+
+    def copy(self):
+        return LazyDict(self.raw_items())
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def raw_items(self):
+        return dict.items(self)
+
+@timed()
+def open_project(path: str, lazy: bool=True, remove: bool=False) -> dict:
+    """
+    Estado de sesión del proyecto. Con lazy=True sólo se lee el manifiesto; las tablas
+    anidadas en diccionarios quedan como LazyTable (las de primer nivel se leen ya).
+    remove=True: el archivo se borra al cerrarse (leída la última tabla o liberado el estado).
+    """
+    pf = ProjectFile(path, remove)
+    state = json.loads(json.dumps(pf.manifest['state']))  # copia: el manifiesto queda intacto
+    def put(path, v):
+        d = state
+        for k in path[:-1]: d = d.setdefault(k, {})
+        d[path[-1]] = v
+    pending = 0
+    for name, t in pf.manifest['tables'].items():
+        lz = lazy and len(t['path']) > 1
+        put(t['path'], LazyTable(pf, name) if lz else pf.table(name)); pending += lz
+    for name, b in pf.manifest['blobs'].items():
+        put(b['path'], pf.blob(name))
+    if not pending: pf.close()
+    def wrap(v):
+        if isinstance(v, dict) and not (len(v) == 1 and TUPLE in v):
+            return LazyDict({k: wrap(x) for k, x in v.items()})
+        return _untag(v)
+    return {k: wrap(v) for k, v in state.items()}
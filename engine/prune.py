@@ -0,0 +1,76 @@
+import itertools
+import numpy as np
+import pandas as pd
+from .instrument import timed
+
+# Direcciones para candidatos de envolvente convexa: ±ejes y todas las diagonales (±1,…,±1)
+_DIRS = np.vstack([np.eye(5), -np.eye(5), np.array(list(itertools.product((1.0,-1.0), repeat=5)))])
+
+def pareto_mask(X: np.ndarray) -> np.ndarray:
+    """
+    Filas no dominadas de X (maximizando todas las columnas).
+    El punto de mayor suma entre los restantes nunca está dominado: se toma,
+    se eliminan los que domina y se repite (coste ~ n × tamaño del frente).
+    """
+    keep = np.zeros(len(X), dtype=bool)
+    rem = np.argsort(-X.sum(axis=1), kind='stable')
+    while rem.size:
+        i = rem[0]; keep[i] = True
+        rest = rem[1:]
+        Y = X[rest]
+        dom = np.all(X[i] >= Y, axis=1) & np.any(X[i] > Y, axis=1)
+        rem = rest[~dom]
+    return keep
+
+def _hull_candidates(P: np.ndarray) -> np.ndarray:
+    """Índices de puntos extremos (vértices de la envolvente convexa) en direcciones fijas."""
+    scale = np.abs(P).max(axis=0)
+    scale[scale == 0] = 1.0
+    return np.unique(np.argmax((P/scale) @ _DIRS.T, axis=0))
+
+@timed()
+def prune_mask(N, Vx, Vy, Mx, My, joints=None) -> np.ndarray:
+    """
+    Máscara de filas que pueden gobernar, por Joint. Se conserva la fila si:
+      - no está dominada en (N, |Vx|, |Vy|, |Mx|, |My|)   (compresión/aplastamiento),
+      - o no está dominada en (-N, |Vx|, |Vy|, |Mx|, |My|) (levantamiento/tracción),
+      - o es extrema de alguna componente o vértice de la envolvente convexa.
+    Todo chequeo no decreciente en alguno de los dos conjuntos de variables da
+    el mismo máximo por Joint sobre las filas conservadas que sobre todas. La tracción
+    en pernos sólo lo es si el grupo es simétrico (ver prune_rows).
+    """
+    P = np.column_stack([np.nan_to_num(np.asarray(a, dtype=float)) for a in (N, Vx, Vy, Mx, My)])
+    A = np.abs(P)
+    n = len(P)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0: return keep
+    if joints is None:
+        groups = [np.arange(n)]
+    else:
+        codes, _ = pd.factorize(np.asarray(joints))
+        order = np.argsort(codes, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+    for g in groups:
+        Xc = A[g].copy(); Xc[:,0] = P[g,0]
+        Xt = Xc.copy();   Xt[:,0] = -P[g,0]
+        k = pareto_mask(Xc) | pareto_mask(Xt)
+        k[_hull_candidates(P[g])] = True
+        keep[g[k]] = True
+    return keep
+
+def prune_info(keep: np.ndarray) -> dict:
+    return {'rows_in': int(keep.size), 'rows_kept': int(keep.sum()), 'rows_removed': int(keep.size - keep.sum())}
+
+def prune_rows(loads: dict, params, joints=None) -> np.ndarray:
+    """
+    prune_mask para los casos de design.loads_from_table con uno o varios dicts de
+    design_params (unión; el cortante lleva Ω0). Con un grupo de pernos no simétrico
+    respecto a ambos ejes la tracción depende del signo de Mx y My y deja de ser
+    monótona en |Mx|, |My|: no se poda (se conservan todas las filas).
+    """
+    keep = np.zeros(len(loads['N']), dtype=bool)
+    for p in ([params] if isinstance(params, dict) else params):
+        if not p['group'].symmetric: return np.ones(len(keep), dtype=bool)
+        om = p['omega0'] if p['seismic_on'] else 1.0
+        keep |= prune_mask(loads['N'], loads['Vx']*om, loads['Vy']*om, loads['Mx'], loads['My'], joints)
+    return keep
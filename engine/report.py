@@ -1,11 +1,78 @@
-import fitz
+"""
+Informes PDF (PyMuPDF).
+
+    build_pdf(project, images, tables) -> bytes          # informe resumen (página 07)
+    build_report(project, joint_sections(res), 'r.pdf')  # una sección por Joint, en paralelo, volcada a disco por tramos
+
+Las tablas se paginan completas (encabezado repetido en cada página). Los planos
+se insertan una sola vez por documento y se reutilizan (mismo xref) en cada sección.
+"""
+import os
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from datetime import datetime
+import fitz
+import numpy as np
+import pandas as pd
+from .design import MECHANISMS
+from .parallel import mp_context
+from .instrument import timed
+
+TOP, BOTTOM, STEP = 50, 770, 10  # márgenes y paso de línea de las tablas (pt)
+PLAN_H = 300
+SAVE_OPTS = {'garbage': 3, 'deflate': True, 'deflate_images': True, 'deflate_fonts': True}
 
 def pdf_header(page, y, title):
     page.insert_text((40,y), title, fontsize=14); y+=22
     page.insert_text((40,y), f"Date: {datetime.now():%Y-%m-%d %H:%M}", fontsize=9); y+=16
     return y
 
+# --- Tablas y planos ---
+def insert_table(doc, page, y, df: pd.DataFrame, fontsize: float=8):
+    """
+    Tabla completa como texto; al llegar al pie abre otra página y repite el
+    encabezado. Un solo insert_text por página. Devuelve (página, y) finales.
+    """
+    lines = df.to_string(index=False).split('\n') if len(df.columns) else []
+    if not lines: return page, y
+    head, body = lines[0], lines[1:] or ['']
+    i = 0
+    while True:
+        n = max(1, (BOTTOM - y)//STEP)          # filas que caben bajo el encabezado
+        page.insert_text((40,y), '\n'.join([head] + body[i:i+n]), fontsize=fontsize, lineheight=STEP/fontsize)
+        y += STEP*(1 + len(body[i:i+n])); i += n
+        if i >= len(body): return page, y
+        page = doc.new_page(); y = TOP
+
+@lru_cache(maxsize=32)
+def _svg_pdf(svg: bytes) -> bytes:
+    return fitz.open(stream=svg, filetype='svg').convert_to_pdf()
+
+class PlanSet:
+    """
+    Planos de un documento: cada SVG (vectorial) o PNG distinto se incrusta una vez
+    y las demás apariciones reutilizan el mismo objeto.
+    """
+    def __init__(self):
+        self._src, self._xref = {}, {}
+
+    def place(self, page, rect, svg=None, png=None) -> bool:
+        if svg:
+            svg = svg.encode('utf-8') if isinstance(svg, str) else svg
+            k = hashlib.sha1(svg).digest()
+            if k not in self._src: self._src[k] = fitz.open('pdf', _svg_pdf(svg))
+            page.show_pdf_page(rect, self._src[k], 0)   # el grafting por documento fuente evita duplicados
+            return True
+        if png:
+            k = hashlib.sha1(png).digest()
+            x = self._xref.get(k)
+            self._xref[k] = page.insert_image(rect, xref=x) if x else page.insert_image(rect, stream=png)
+            return True
+        return False
+
+@timed()
 def build_pdf(project: dict, images: dict, tables: dict) -> bytes:
     doc = fitz.open()
     # Page 1
@@ -15,10 +82,8 @@ def build_pdf(project: dict, images: dict, tables: dict) -> bytes:
     p.insert_text((40,y), f"Plate: B={project.get('B',0)} mm, L={project.get('L',0)} mm, t={project.get('t',0):.1f} mm", fontsize=10); y+=14
     p.insert_text((40,y), f"Column: d={project.get('d',0)} mm, bf={project.get('bf',0)} mm", fontsize=10); y+=14
     p.insert_text((40,y), f"Anchors: Ø={project.get('D',0)} mm, hef={project.get('hef',0)} mm, grade={project.get('grade','')}", fontsize=10); y+=20
-    img = images.get('plan_png')
-    if img:
-        rect = fitz.Rect(40,y, 550, y+300)
-        p.insert_image(rect, stream=img); y+=320
+    if PlanSet().place(p, fitz.Rect(40,y, 550, y+PLAN_H), images.get('plan_svg'), images.get('plan_png')):
+        y+=PLAN_H+20
     p.insert_text((40,y), 'Governing by mechanism:', fontsize=11); y+=14
     for k,v in (tables.get('governing') or {}).items():
         p.insert_text((60,y), f"- {k}: {v}", fontsize=9); y+=12
@@ -27,8 +92,119 @@ def build_pdf(project: dict, images: dict, tables: dict) -> bytes:
     for name, df in (tables.get('sheets') or {}).items():
         p = doc.new_page(); y=50
         y = pdf_header(p,y, name)
-        lines = df.to_string(index=False).split('\n')[:45]
-        for ln in lines:
-            p.insert_text((40,y), ln, fontsize=8); y+=10
-            if y>770: p = doc.new_page(); y=50
-    out = doc.tobytes(); doc.close(); return out
\ No newline at end of file
+        insert_table(doc, p, y, df)
+    out = doc.tobytes(**SAVE_OPTS); doc.close(); return out
+
+# --- Informe por Joint ---
+TABLE_COLS = ['OutputCase', 'ULS_SLS', 'N', 'Vx', 'Vy', 'Mx', 'My', *MECHANISMS.values(), 'util_max']
+
+def joint_sections(res: pd.DataFrame, plan_svg=None, plan_png=None, plans: dict=None, top: int=None):
+    """
+    Secciones del informe por Joint (generador, en el orden de governing_by_joint):
+    {'joint', 'governing': {mecanismo: (valor, caso)}, 'table': filas del Joint por util_max
+    descendente (top = sólo las primeras), 'plan_svg'/'plan_png'}. plans: {joint: svg} si
+    las placas difieren entre Joints.
+    """
+    if res.empty or 'Joint' not in res.columns: return
+    codes, joints = pd.factorize(res['Joint'], sort=True)
+    util = np.nan_to_num(res['util_max'].to_numpy(dtype=float), nan=-np.inf) if 'util_max' in res.columns else np.zeros(len(res))
+    order = np.lexsort((-util, codes))
+    bounds = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1, len(order)]
+    cols = [c for c in TABLE_COLS if c in res.columns]
+    for k, j in enumerate(joints):
+        rows = res.iloc[order[bounds[k]:bounds[k+1]]][cols]
+        gov = {}
+        for mech, col in MECHANISMS.items():
+            if col not in rows.columns: continue
+            v = rows[col].to_numpy(dtype=float)
+            i = int(np.nanargmax(v)) if np.isfinite(v).any() else 0
+            gov[mech] = (float(v[i]), str(rows['OutputCase'].iloc[i]) if 'OutputCase' in rows.columns else '')
+        yield {'joint': str(j), 'governing': gov, 'table': rows.iloc[:top] if top else rows,
+               'plan_svg': (plans or {}).get(j, plan_svg), 'plan_png': plan_png}
+
+def _section_pdf(project: dict, sec: dict):
+    """
+    PDF de una sección (en un proceso worker). El plano no se dibuja aquí: se
+    devuelve su rectángulo y lo coloca build_report, así cada plano se incrusta una vez.
+    """
+    doc = fitz.open(); p = doc.new_page(); y = TOP
+    y = pdf_header(p, y, f"Joint {sec['joint']}")
+    p.insert_text((40,y), f"Plate: B={project.get('B',0)} mm, L={project.get('L',0)} mm, t={project.get('t',0):.1f} mm | "
+                          f"Anchors: Ø={project.get('D',0)} mm, hef={project.get('hef',0)} mm", fontsize=9); y+=16
+    rect = None
+    if sec.get('plan'):
+        rect = (40, y, 550, y+PLAN_H); y+=PLAN_H+20
+    p.insert_text((40,y), 'Governing by mechanism:', fontsize=11); y+=14
+    for k,(v,case) in sec.get('governing',{}).items():
+        p.insert_text((60,y), f"- {k}: {v:.3f} ({case})", fontsize=9); y+=12
+    y+=8
+    table = sec.get('table')
+    if table is not None and len(table):
+        p.insert_text((40,y), f"Load cases ({len(table)}):", fontsize=11); y+=14
+        insert_table(doc, p, y, table.round(3))
+    out = doc.tobytes(deflate=True); doc.close()
+    return out, rect
+
+def _sections(project, sections, workers):
+    """(sección, bytes, rect) en orden; con workers > 1 hay como mucho 2×workers secciones en vuelo."""
+    strip = lambda s: {**{k: v for k, v in s.items() if k not in ('plan_svg', 'plan_png')},
+                       'plan': bool(s.get('plan_svg') or s.get('plan_png'))}
+    if workers <= 1:
+        for s in sections: yield (s, *_section_pdf(project, strip(s)))
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context()) as ex:
+        window = deque()
+        try:
+            for s in sections:
+                window.append((s, ex.submit(_section_pdf, project, strip(s))))
+                if len(window) >= 2*workers:
+                    s0, f = window.popleft(); yield (s0, *f.result())
+            while window:
+                s0, f = window.popleft(); yield (s0, *f.result())
+        finally:
+            for _, f in window: f.cancel()
+
+FLUSH_SECTIONS = 64  # secciones entre volcados a disco en build_report
+
+def _flush(doc):
+    """Guardado incremental y reapertura: lo ya escrito deja de estar en memoria (los planos siguen compartidos)."""
+    shown, name = dict(doc.ShownPages), doc.name
+    doc.saveIncr(); doc.close()
+    doc = fitz.open(name); doc.ShownPages.update(shown)
+    return doc
+
+@timed()
+def build_report(project: dict, sections, path: str, workers: int=None, progress=None, total: int=None,
+                 flush: int=FLUSH_SECTIONS) -> str:
+    """
+    Informe con una sección por Joint escrito en `path`. Las secciones se generan en
+    procesos worker y se unen con insert_pdf a medida que llegan; cada `flush` secciones
+    el documento se guarda de forma incremental en disco y se reabre, así la memoria
+    queda acotada por la ventana en vuelo más `flush` secciones. Los planos repetidos
+    se incrustan una vez en todo el archivo.
+    """
+    from .parallel import default_workers
+    workers = default_workers() if workers is None else max(1, int(workers))
+    tmp = f'{path}.part'
+    doc = fitz.open(); plans = PlanSet()
+    p = doc.new_page(); y = TOP  # portada
+    y = pdf_header(p, y, project.get('title', 'Base Plate & Anchor Bolts – Report by joint'))
+    p.insert_text((40,y), f"Code: {project.get('code','AISC/ACI (US)')} | Units: {project.get('units','SI')}", fontsize=10); y+=20
+    doc.save(tmp, **SAVE_OPTS); doc.close(); doc = fitz.open(tmp)
+    toc, k = [], 0
+    try:
+        for k, (sec, pdf, rect) in enumerate(_sections(project, sections, workers), 1):
+            start = doc.page_count
+            with fitz.open('pdf', pdf) as part: doc.insert_pdf(part)
+            if rect: plans.place(doc[start], fitz.Rect(rect), sec.get('plan_svg'), sec.get('plan_png'))
+            toc.append([1, f"Joint {sec['joint']}", start + 1])
+            if progress: progress(k, total or k)
+            if k % max(1, flush) == 0: doc = _flush(doc)
+        doc[0].insert_text((40,y), f"{k} joints – one section per joint (see bookmarks).", fontsize=10)
+        doc.set_toc(toc)
+        doc.saveIncr()
+    except BaseException:
+        doc.close(); os.remove(tmp); raise
+    doc.close()
+    os.replace(tmp, path)
+    return path
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Revisiones de un modelo: qué pares (Joint, OutputCase) cambiaron entre dos exportaciones
+SAP y rediseño sólo de los Joints afectados.
+
+    h0 = case_hashes(df_old); h1 = case_hashes(df_new)
+    d = diff_hashes(h0, h1)            # added / removed / changed / joints
+    res = design_incremental(df_new, res_old, h0, lambda sub: design_table(sub, p), hashes=h1)
+
+El hash de cada par combina los de sus filas (F1..M3 y, si existen, StepType/StepNum)
+sin depender del orden; sólo se compara contra el de la revisión anterior, así que no
+hace falta guardar la tabla anterior completa.
+"""
+import numpy as np
+import pandas as pd
+from .io_sap import SAP_NUM
+from .instrument import timed
+
+HASH_EXTRA = ('StepType', 'StepNum')
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+@timed()
+def case_hashes(df: pd.DataFrame, decimals: int=None) -> pd.Series:
+    """
+    Hash uint64 por (Joint, OutputCase) sobre F1..M3 (+ StepType, StepNum).
+    decimals: redondeo previo para ignorar ruido de impresión entre exportaciones.
+    """
+    if df.empty or 'Joint' not in df.columns:
+        return pd.Series([], dtype='uint64', index=pd.MultiIndex.from_arrays([[], []], names=['Joint', 'OutputCase']))
+    vals = {c: df[c].to_numpy(dtype=float) for c in SAP_NUM if c in df.columns}
+    if decimals is not None: vals = {c: np.round(v, decimals) for c, v in vals.items()}
+    cols = pd.DataFrame(vals, index=pd.RangeIndex(len(df)))
+    for c in HASH_EXTRA:
+        if c in df.columns: cols[c] = df[c].astype(str).to_numpy()
+    h = pd.util.hash_pandas_object(cols, index=False).to_numpy()
+    jc, ju = pd.factorize(df['Joint'])
+    cc, cu = pd.factorize(df['OutputCase'] if 'OutputCase' in df.columns else pd.Series(np.zeros(len(df))))
+    g, gu = pd.factorize(jc.astype(np.int64)*max(len(cu), 1) + cc)
+    order = np.argsort(g, kind='stable')
+    starts = np.r_[0, np.flatnonzero(np.diff(g[order])) + 1]
+    with np.errstate(over='ignore'):  # suma módulo 2**64: independiente del orden de las filas
+        gh = np.add.reduceat(h[order], starts) + np.diff(np.r_[starts, len(g)]).astype(np.uint64)*_MIX
+    first = order[starts]
+    idx = pd.MultiIndex.from_arrays([df['Joint'].to_numpy()[first].astype(str),
+                                     (df['OutputCase'].to_numpy()[first].astype(str) if 'OutputCase' in df.columns
+                                      else np.full(len(first), ''))], names=['Joint', 'OutputCase'])
+    return pd.Series(gh, index=idx, name='hash')
+
+def diff_hashes(old: pd.Series, new: pd.Series) -> dict:
+    """
+    Pares añadidos, eliminados y modificados; 'joints' = Joints a rediseñar (con algún
+    par añadido o modificado, o con pares eliminados que siguen en la tabla nueva).
+    """
+    both = old.index.intersection(new.index)
+    changed = both[old.reindex(both).to_numpy() != new.reindex(both).to_numpy()]
+    added, removed = new.index.difference(old.index), old.index.difference(new.index)
+    jnew = set(new.index.get_level_values(0))
+    redo = (set(changed.get_level_values(0)) | set(added.get_level_values(0))
+            | (set(removed.get_level_values(0)) & jnew))
+    return {'added': added, 'removed': removed, 'changed': changed, 'unchanged': len(both) - len(changed),
+            'joints': sorted(redo), 'joints_removed': sorted(set(old.index.get_level_values(0)) - jnew),
+            'joints_total': len(jnew)}
+
+def diff_summary(d: dict) -> dict:
+    """Conteos del diff (JSON)."""
+    return {'added': len(d['added']), 'removed': len(d['removed']), 'changed': len(d['changed']),
+            'unchanged': d['unchanged'], 'joints_redesign': len(d['joints']),
+            'joints_removed': len(d['joints_removed']), 'joints_total': d['joints_total']}
+
+def diff_table(d: dict) -> pd.DataFrame:
+    """Una fila por par añadido/eliminado/modificado: Joint, OutputCase, status."""
+    parts = [pd.DataFrame({'Joint': ix.get_level_values(0), 'OutputCase': ix.get_level_values(1), 'status': s})
+             for s in ('added', 'removed', 'changed') for ix in [d[s]] if len(ix)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['Joint', 'OutputCase', 'status'])
+
+@timed()
+def design_incremental(df: pd.DataFrame, prev_res: pd.DataFrame, prev_hashes: pd.Series, design,
+                       hashes: pd.Series=None) -> pd.DataFrame:
+    """
+    Resultados de `df` rediseñando sólo los Joints que cambiaron respecto a la revisión
+    anterior (prev_res, prev_hashes) y reutilizando prev_res para el resto. `design(sub_df)`
+    es el diseño completo (design_table, run_design...) con los MISMOS parámetros que
+    prev_res: el llamador debe comprobarlo. El prune es por Joint, así que el resultado
+    coincide con el de design(df). Las filas reutilizadas conservan su índice anterior.
+    res.attrs['revision'] = conteos del diff; el resto de attrs (p.ej. 'prune') es el de design(sub_df).
+    """
+    hashes = case_hashes(df) if hashes is None else hashes
+    d = diff_hashes(prev_hashes, hashes)
+    redo = d['joints']
+    jstr = df['Joint'].astype(str)
+    fresh = design(df.loc[jstr.isin(redo).to_numpy()]) if redo else prev_res.iloc[:0]
+    keep_j = set(hashes.index.get_level_values(0)) - set(redo)
+    reused = prev_res.loc[prev_res['Joint'].astype(str).isin(keep_j).to_numpy()]
+    res = pd.concat([reused, fresh]) if len(reused) and len(fresh) else (fresh if len(fresh) else reused).copy()
+    # orden de Joints de la tabla nueva (estable dentro de cada Joint)
+    rank = {j: i for i, j in enumerate(pd.unique(jstr))}
+    order = np.argsort(res['Joint'].astype(str).map(rank).to_numpy(), kind='stable')
+    res = res.iloc[order]
+    for c in ('Joint', 'OutputCase', 'ULS_SLS'):
+        if c in res.columns and c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype):
+            res[c] = pd.Categorical(res[c].astype(str), categories=df[c].cat.categories)
+    res.attrs = {**fresh.attrs, 'revision': {**diff_summary(d), 'rows_designed': len(fresh), 'rows_reused': len(reused)}}
+    return res
@@ -0,0 +1,141 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .baseplate import contact_pressures_vec
+from .anchors.group import AnchorGroup
+from .design import (stage_demand, stage_solver, stage_plate, stage_weld, stage_tension, stage_shear, stage_steel,
+                     stage_capacities, stage_concrete, stage_summary)
+from .cache import shared_cache
+from .instrument import span
+
+_MISS = object()
+
+# Valores por defecto de las páginas (los mismos que design.design_params)
+DEFAULTS = {
+    'geom': {'B': 0.0, 'L': 0.0, 't_min': 10.0, 'd': 0.0, 'bf': 0.0},
+    'mat':  {'fc': 28.0, 'fy_plate': 250.0, 'FEXX': 483.0},
+    'anc':  {'bolts': [], 'D_mm': 24.0, 'grade': 'F1554 Gr.55', 'hef_mm': 400.0, 'c_edge_mm': 150.0},
+    'ass':  {'plate_method': 'Local (DG1-like)', 'bearing_fc': None, 'shear_mode': 'ELASTIC',
+             'tension_mode': 'ELASTIC', 'n_mod': 8.0, 'interact': 'Linear'},
+    'cfg':  {'seismic_on': False, 'omega0': 2.5},
+}
+
+def _feed(h, v):
+    if isinstance(v, np.ndarray):
+        h.update(f'nd{v.dtype}{v.shape}'.encode()); h.update(np.ascontiguousarray(v).tobytes())
+    elif isinstance(v, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(getattr(v, 'columns', [v.name]))).encode())
+        h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+    elif isinstance(v, dict):
+        h.update(b'{')
+        for k in sorted(v, key=str): h.update(str(k).encode() + b':'); _feed(h, v[k])
+        h.update(b'}')
+    elif isinstance(v, (list, tuple)):
+        h.update(b'[')
+        for x in v: _feed(h, x)
+        h.update(b']')
+    else:
+        h.update(repr(v).encode())
+    h.update(b';')
+
+def value_hash(*vals) -> str:
+    h = hashlib.sha256()
+    for v in vals: _feed(h, v)
+    return h.hexdigest()[:24]
+
+# --- Etapas: nombre -> (dependencias, función de design). Dependencia = otra etapa o 'entrada.clave' ---
+STAGES = {
+    'demand':     (('loads', 'cfg.seismic_on', 'cfg.omega0'), stage_demand),
+    'group':      (('anc.bolts', 'anc.D_mm', 'anc.grade'), AnchorGroup.from_bolts),
+    'solver':     (('demand', 'geom.B', 'geom.L', 'group', 'ass.n_mod', 'ass.plate_method', 'ass.tension_mode'), stage_solver),
+    'pressures':  (('demand.N', 'demand.Mx', 'demand.My', 'geom.B', 'geom.L'), contact_pressures_vec),
+    'plate':      (('pressures', 'solver', 'demand', 'geom.B', 'geom.L', 'geom.bf', 'geom.t_min', 'mat.fy_plate', 'mat.fc',
+                    'ass.plate_method', 'ass.bearing_fc'), stage_plate),
+    'weld':       (('demand', 'geom.d', 'geom.bf', 'mat.FEXX'), stage_weld),
+    'tension':    (('demand', 'group', 'solver', 'ass.tension_mode'), stage_tension),
+    'shear':      (('demand', 'group', 'ass.shear_mode'), stage_shear),
+    'steel':      (('tension', 'shear', 'group', 'ass.interact'), stage_steel),
+    'capacities': (('mat.fc', 'anc.hef_mm', 'anc.c_edge_mm', 'anc.D_mm', 'anc.bolts'), stage_capacities),
+    'concrete':   (('tension', 'demand', 'capacities'), stage_concrete),
+    'summary':    (('plate', 'weld', 'steel', 'concrete'), stage_summary),
+}
+
+class DesignSession:
+    """
+    Cadena de chequeos de la página 05 como grafo de etapas con memoización.
+    Entradas: loads (dict N..My, escalares o arrays de casos), geom, mat, anc, ass, cfg.
+    La clave de cada etapa es el hash de sus entradas directas + las claves de sus
+    etapas previas, así que al editar un valor sólo se recalculan las etapas aguas abajo.
+    Con shared=True las etapas se buscan también en shared_cache() ('stage'): otra
+    sesión con las mismas entradas ya las calculó (sus arrays quedan de sólo lectura).
+        ds = DesignSession(); ds.update(geom=geom, mat=mat, ...); ds.get('summary')
+    """
+    def __init__(self, stages: dict=STAGES, keep: int=4, shared: bool=True):
+        self.stages = stages
+        self.keep = keep  # resultados guardados por etapa (volver a un valor previo es inmediato)
+        self.shared = shared
+        self.inputs, self._ihash = {}, {}
+        self._memo = {name: OrderedDict() for name in stages}
+        self.stats = {name: {'runs': 0, 'hits': 0, 'shared': 0} for name in stages}
+        self.last_run = []  # etapas recalculadas desde el último update
+
+    def update(self, **inputs):
+        """Fija entradas; sólo se vuelven a hashear las entradas indicadas."""
+        self.last_run = []
+        for k, v in inputs.items():
+            self.inputs[k] = v
+            for h in [h for h in self._ihash if h == k or h.startswith(k + '.')]: del self._ihash[h]
+        return self
+
+    def _input(self, dep: str):
+        root, _, key = dep.partition('.')
+        src = self.inputs.get(root, {})
+        if not key: return src
+        return src.get(key, DEFAULTS.get(root, {}).get(key)) if isinstance(src, dict) else None
+
+    def _dep_key(self, dep: str, seen: dict) -> str:
+        root = dep.partition('.')[0]
+        if root in self.stages: return self._key(root, seen) + dep[len(root):]
+        if dep not in self._ihash: self._ihash[dep] = value_hash(self._input(dep))
+        return self._ihash[dep]
+
+    def _key(self, name: str, seen: dict) -> str:
+        if name not in seen:
+            deps, _ = self.stages[name]
+            seen[name] = value_hash(name, [self._dep_key(d, seen) for d in deps])
+        return seen[name]
+
+    def _value(self, dep: str):
+        root, _, key = dep.partition('.')
+        if root in self.stages:
+            v = self.get(root)
+            return v[key] if key else v
+        return self._input(dep)
+
+    def get(self, name: str):
+        key = self._key(name, {})
+        memo = self._memo[name]
+        if key in memo:
+            memo.move_to_end(key); self.stats[name]['hits'] += 1
+            return memo[key]
+        deps, fn = self.stages[name]
+        val = shared_cache().get('stage', key, _MISS) if self.shared else _MISS
+        if val is _MISS:
+            args = [self._value(d) for d in deps]
+            with span(f'session.{name}'):
+                val = fn(*args)
+            if self.shared: val = shared_cache().put('stage', key, val, copy=False)  # resultado nuevo: se congela sin copiar
+            self.stats[name]['runs'] += 1
+        else:
+            self.stats[name]['shared'] += 1
+        memo[key] = val
+        while len(memo) > self.keep: memo.popitem(last=False)
+        self.last_run.append(name)
+        return val
+
+    def results(self) -> dict:
+        return self.get('summary')
+
+    def clear(self):
+        for m in self._memo.values(): m.clear()
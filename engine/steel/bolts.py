@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 GRADES = {
   'F1554 Gr.36': {'fy': 248, 'fu': 400},
@@ -26,4 +27,11 @@ def steel_tension_capacity(grade: str, D_mm: float):
 def steel_shear_capacity(grade: str, D_mm: float):
     fu = GRADES.get(grade, GRADES['F1554 Gr.55'])['fu']
     A_t = thread_area(D_mm); phi = 0.65
-    return phi * 0.6 * fu * A_t / 1000.0
\ No newline at end of file
+    return phi * 0.6 * fu * A_t / 1000.0
+
+def steel_interaction(Nb, Vb, Nsa: float, Vsa: float, interact: str='Linear'):
+    """Interacción N–V del acero; Nb/Vb y capacidades escalares o arrays (kN)."""
+    rn = Nb/np.maximum(Nsa,1e-9); rv = Vb/np.maximum(Vsa,1e-9)
+    if interact.startswith('Linear'): return rn + rv
+    if '1.5' in interact: return rn**1.5 + rv**1.5
+    return rn**2 + rv**2
\ No newline at end of file
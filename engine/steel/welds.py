@@ -1,4 +1,6 @@
 import math
+import numpy as np
+
 def fillet_strength(FEXX_MPa: float=483.0):
     Rn_per_mm = 0.6*FEXX_MPa*0.707/1000.0
     phi = 0.75
@@ -9,4 +11,11 @@ def required_fillet_size(Vx: float, Vy: float, Mx: float, My: float, d: float, b
     Lw = 2.0*(d+bf)
     v = V/max(1.0,Lw)
     v *= 1.2  # factor simplicado
-    return math.ceil(v/max(phi*Rn_per_mm,1e-6))
\ No newline at end of file
+    return math.ceil(v/max(phi*Rn_per_mm,1e-6))
+
+def required_fillet_size_vec(Vx, Vy, d: float, bf: float, phi: float, Rn_per_mm: float):
+    V = np.hypot(np.nan_to_num(np.asarray(Vx, dtype=float)), np.nan_to_num(np.asarray(Vy, dtype=float)))
+    Lw = 2.0*(d+bf)
+    v = V/max(1.0,Lw)
+    v *= 1.2  # factor simplicado
+    return np.ceil(v/max(phi*Rn_per_mm,1e-6))
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Reducción de historias multi-step (tiempo-historia, cargas móviles) a envolventes concurrentes.
+
+Por Joint/OutputCase y por conductor (F1..M3 máx. y mín., cortante V = hypot(F1,F2) y
+momento M = hypot(M1,M2) máximos) se guarda la fila completa del paso en que ocurre el
+extremo, así cada fila de salida es un estado de cargas físico (no mezcla pasos).
+
+    env = ConcurrentEnvelope()
+    for chunk in iter_sap_csv_chunks(f): env.update(chunk)
+    df = env.result()   # mismo formato que read_sap_table; StepType = conductor
+
+Las filas StepType 'Max'/'Min' de SAP son envolventes por componente (cada valor de
+un paso distinto): no son candidatas si el Joint/OutputCase tiene filas de pasos. Si
+sólo hay envolventes, se usan pero se etiquetan como no concurrentes
+(df.attrs['non_concurrent'] = nº de grupos).
+"""
+import numpy as np
+import pandas as pd
+from .io_sap import SAP_NUM, CASE_ALIASES, STREAM_CHUNK_ROWS, iter_sap_csv_chunks, iter_sap_excel_blocks, to_category, classify_cases
+from .instrument import timed
+
+DRIVERS = tuple([f'{c} Max' for c in SAP_NUM] + [f'{c} Min' for c in SAP_NUM] + ['V Max', 'M Max'])
+_K, _C = len(DRIVERS), len(SAP_NUM)
+ENVELOPE_STEPS = ('max', 'min')
+NON_CONCURRENT = ' (envelope, not concurrent)'
+
+def _scores(X: np.ndarray) -> np.ndarray:
+    """Valor a maximizar por conductor (n × K): +X, -X, |V|, |M|; NaN -> -inf."""
+    S = np.empty((len(X), _K))
+    S[:, :_C] = X; np.negative(X, out=S[:, _C:2*_C])
+    np.hypot(X[:,0], X[:,1], out=S[:, 2*_C]); np.hypot(X[:,3], X[:,4], out=S[:, 2*_C+1])
+    S[np.isnan(S)] = -np.inf
+    return S
+
+def _canon(chunk: pd.DataFrame) -> pd.DataFrame:
+    if 'OutputCase' in chunk.columns: return chunk
+    norm = {str(c).lower().replace(' ','').replace('_',''): c for c in chunk.columns}
+    alias = next((norm[a.lower().replace(' ','')] for a in CASE_ALIASES if a.lower().replace(' ','') in norm), None)
+    return chunk.rename(columns={alias: 'OutputCase'}) if alias else chunk.assign(OutputCase='')
+
+class ConcurrentEnvelope:
+    """
+    Acumulador de una sola pasada: la memoria depende del nº de grupos
+    Joint/OutputCase × conductores, no del nº de pasos ni de filas.
+    """
+    def __init__(self, split: bool=True):
+        self._gid, self._keys = {}, []
+        self._env = ConcurrentEnvelope(split=False) if split else None  # filas StepType Max/Min
+        self._best = np.full((0, _K), -np.inf)
+        self._rows = np.full((0, _K, _C), np.nan)
+        self._step = np.full((0, _K), np.nan)
+        self.rows_in = 0
+        self.source_units = None
+
+    def _ids(self, joints, cases) -> np.ndarray:
+        """Id global de cada grupo del bloque (el diccionario sólo ve los pares únicos)."""
+        ids = np.empty(len(joints), dtype=np.int64)
+        for i, k in enumerate(zip(joints, cases)):
+            g = self._gid.get(k)
+            if g is None: g = self._gid[k] = len(self._keys); self._keys.append(k)
+            ids[i] = g
+        cap = len(self._best)
+        if len(self._keys) > cap:
+            m = max(len(self._keys), 2*cap, 64) - cap
+            self._best = np.concatenate([self._best, np.full((m, _K), -np.inf)])
+            self._rows = np.concatenate([self._rows, np.full((m, _K, _C), np.nan)])
+            self._step = np.concatenate([self._step, np.full((m, _K), np.nan)])
+        return ids
+
+    def update(self, chunk):
+        """Añade un bloque de filas (DataFrame o {columna: array}) con Joint, OutputCase, F1..M3 y opcionalmente StepNum."""
+        if isinstance(chunk, dict): chunk = pd.DataFrame(chunk)
+        chunk = _canon(chunk)
+        n = len(chunk)
+        if self.source_units is None: self.source_units = dict(chunk.attrs.get('source_units', {}))
+        if not n: return self
+        if self._env is not None and 'StepType' in chunk.columns:
+            codes, uniq = pd.factorize(chunk['StepType'])
+            env = np.isin(codes, [i for i, u in enumerate(uniq) if str(u).strip().lower() in ENVELOPE_STEPS])
+            if env.any():
+                self._env.update(chunk.loc[env])
+                chunk = chunk.loc[~env]; n = len(chunk)
+                if not n: return self
+        self.rows_in += n
+        X = np.column_stack([pd.to_numeric(chunk[c], errors='coerce').to_numpy(dtype=float) if c in chunk.columns
+                             else np.full(n, np.nan) for c in SAP_NUM])
+        step = pd.to_numeric(chunk['StepNum'], errors='coerce').to_numpy(dtype=float) if 'StepNum' in chunk.columns else np.full(n, np.nan)
+        jc, ju = pd.factorize(chunk['Joint'] if 'Joint' in chunk.columns else np.zeros(n), use_na_sentinel=False)
+        cc, cu = pd.factorize(chunk['OutputCase'], use_na_sentinel=False)
+        local, lu = pd.factorize(jc.astype(np.int64)*len(cu) + cc)
+        gids = self._ids([str(ju[k // len(cu)]).strip() for k in lu], [str(cu[k % len(cu)]).strip() for k in lu])
+
+        # filas agrupadas por grupo local: máximo por grupo y conductor con una sola reduceat
+        order = np.argsort(local, kind='stable')
+        ls = local[order]
+        starts = np.r_[0, np.flatnonzero(ls[1:] != ls[:-1]) + 1]
+        S = _scores(X)[order]
+        mx = np.maximum.reduceat(S, starts, axis=0)
+        hit = S == np.repeat(mx, np.diff(np.r_[starts, n]), axis=0)
+        pos = np.minimum.reduceat(np.where(hit, np.arange(n)[:, None], n), starts, axis=0)  # 1er paso del extremo
+        rows = order[pos]                                                                   # (grupos × K)
+
+        g = gids[ls[starts]]
+        better = mx > self._best[g]
+        self._best[g] = np.where(better, mx, self._best[g])
+        self._rows[g] = np.where(better[..., None], X[rows], self._rows[g])
+        self._step[g] = np.where(better, step[rows], self._step[g])
+        return self
+
+    def _merged(self, G: int):
+        """
+        Por grupo: primer conductor cuyo paso coincide con el de cada conductor, y
+        etiqueta de cada fila conservada ('F3 Max / V Max'). Comparación K × K por grupo.
+        """
+        R, st = self._rows[:G], self._step[:G]
+        eq = lambda a, b: (a == b) | (np.isnan(a) & np.isnan(b))
+        same = eq(st[:, :, None], st[:, None, :])
+        for c in range(_C): same &= eq(R[:, :, None, c], R[:, None, :, c])
+        first = same.argmax(axis=2)
+        bits = np.zeros((G, _K), dtype=np.int64)
+        for k in range(_K): bits[np.arange(G), first[:, k]] |= 1 << k
+        names = {b: ' / '.join(d for k, d in enumerate(DRIVERS) if b >> k & 1) for b in np.unique(bits).tolist()}
+        return first == np.arange(_K), np.array([names[b] for b in bits.ravel().tolist()], dtype=object)
+
+    def result(self, merge: bool=True) -> pd.DataFrame:
+        """
+        Filas Joint, OutputCase, StepType (conductor), StepNum, F1..M3, ULS_SLS.
+        merge: una sola fila cuando varios conductores caen en el mismo paso ('F3 Max / V Max').
+        Los grupos que sólo tienen filas Max/Min van al final, con StepType + NON_CONCURRENT.
+        """
+        out = self._frame(merge)
+        env = self._env._frame(merge) if self._env is not None and self._env._keys else None
+        if env is not None:
+            only = [k not in self._gid for k in zip(env['Joint'].astype(str), env['OutputCase'].astype(str))]
+            env = env.loc[only]
+            if len(env):
+                env['StepType'] = env['StepType'] + NON_CONCURRENT
+                out = pd.concat([out, env], ignore_index=True)
+                for c in ('Joint', 'OutputCase'): out[c] = to_category(out[c].astype(str).to_numpy())
+                out['ULS_SLS'] = classify_cases(out['OutputCase'])
+            out.attrs['non_concurrent'] = int(env[['Joint', 'OutputCase']].drop_duplicates().shape[0])
+            out.attrs['rows_in'] = self.rows_in + self._env.rows_in
+        out.attrs['source_units'] = self.source_units or (self._env.source_units if self._env is not None else None) or {}
+        return out
+
+    def _frame(self, merge: bool) -> pd.DataFrame:
+        G = len(self._keys)
+        keys = np.asarray(self._keys, dtype=object).reshape(G, 2)
+        keep = np.isfinite(self._best[:G]).ravel()
+        labels = np.tile(np.asarray(DRIVERS, dtype=object), G)
+        if merge and G:
+            first, labels = self._merged(G)
+            keep &= first.ravel()
+        flat = self._rows[:G].reshape(G*_K, _C)[keep]
+        out = pd.DataFrame({'Joint': to_category(np.repeat(keys[:, 0], _K)[keep]),
+                            'OutputCase': to_category(np.repeat(keys[:, 1], _K)[keep]),
+                            'StepType': labels[keep], 'StepNum': self._step[:G].ravel()[keep],
+                            **{c: flat[:, i] for i, c in enumerate(SAP_NUM)}})
+        out['ULS_SLS'] = classify_cases(out['OutputCase'])
+        out.attrs['source_units'] = self.source_units or {}
+        out.attrs['rows_in'] = self.rows_in
+        return out
+
+@timed()
+def concurrent_envelope(source, merge: bool=True) -> pd.DataFrame:
+    """Envolvente concurrente de una tabla (DataFrame) o de un iterable de bloques."""
+    env = ConcurrentEnvelope()
+    for chunk in ([source] if isinstance(source, (pd.DataFrame, dict)) else source):
+        env.update(chunk)
+    return env.result(merge)
+
+def _excel_chunks(file_obj, sheet=None, sheet_pattern=None):
+    for _, _, units, block in iter_sap_excel_blocks(file_obj, sheet, sheet_pattern):
+        chunk = pd.DataFrame(block); chunk.attrs['source_units'] = units
+        yield chunk
+
+@timed()
+def read_sap_concurrent(file_obj, chunksize: int=STREAM_CHUNK_ROWS, sheet: str=None, sheet_pattern: str=None,
+                        merge: bool=True) -> pd.DataFrame:
+    """
+    Envolvente concurrente leyendo el archivo por bloques (CSV con pandas, XLSX/XLSM
+    con openpyxl read-only): la historia completa nunca está en memoria.
+    """
+    name = str(getattr(file_obj, 'name', file_obj if isinstance(file_obj, str) else '')).lower()
+    if name.endswith(('.xlsx', '.xlsm')):
+        return concurrent_envelope(_excel_chunks(file_obj, sheet, sheet_pattern), merge)
+    return concurrent_envelope(iter_sap_csv_chunks(file_obj, chunksize), merge)
@@ -0,0 +1,8 @@
+from engine.batch import output_names
+
+def test_output_names_unique_per_batch():
+    """x.csv y x.xlsx en el mismo lote no deben pisarse las salidas; un stem único se mantiene (--incremental)."""
+    names = output_names(['a/x.csv', 'a/x.xlsx', 'b/x.csv', 'y.csv'])
+    assert names == ['x_csv', 'x_xlsx', 'x_csv_2', 'y']
+    assert len({n.lower() for n in names}) == len(names)
+    assert output_names(['X_csv.csv', 'x.csv', 'x.xlsx']) == ['X_csv', 'x_csv_2', 'x_xlsx']
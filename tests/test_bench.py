@@ -0,0 +1,22 @@
+import json
+from bench import run as bench
+
+def test_run_small(tmp_path):
+    res = bench.run([1000], str(tmp_path), repeat=1, memory=False, formats=('csv',),
+                    only=['read_sap_table', 'concurrent_envelope', 'render_plan_svg'], log=lambda *a: None)
+    assert {'read_sap_table[csv]@1000', 'concurrent_envelope@1000', 'render_plan_svg'} <= res.keys()
+    assert all(r['time_s'] > 0 and r['rows'] for r in res.values())
+
+def test_main_baseline_roundtrip(tmp_path):
+    base = tmp_path / 'baseline.json'
+    args = ['--rows', '1e3', '--formats', 'csv', '--only', 'classify_cases', '--repeat', '1', '--no-memory',
+            '--workdir', str(tmp_path), '--baseline', str(base)]
+    assert bench.main(args + ['--save-baseline']) == 0
+    assert 'classify_cases@1000' in json.loads(base.read_text())['results']
+    assert bench.main(args + ['--tolerance', '100']) == 0
+
+def test_compare_ignores_noise():
+    base = {'results': {'fast': {'time_s': 0.0002}, 'slow': {'time_s': 0.5}}}
+    res = {'fast': {'time_s': 0.0012}, 'slow': {'time_s': 0.8}}
+    assert [k for k, _, _ in bench.compare(res, base, 0.25)] == ['slow']
+    assert [k for k, _, _ in bench.compare(res, base, 0.25, min_delta=0.0)] == ['fast', 'slow']
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from engine.cache import SharedCache
+
+def test_put_freezes_a_copy():
+    """put no quita la escritura a los arrays del llamante; lo que sale de la caché es de sólo lectura."""
+    c, a = SharedCache(disk_dir=None), np.arange(3.0)
+    c.put('ns', 'k', {'a': a})
+    a[0] = 9.0
+    v = c.get('ns', 'k')['a']
+    assert a.flags.writeable and not v.flags.writeable and v[0] == 0.0
+    r = c.get_or_compute('ns', 'k2', lambda: np.ones(2))
+    assert not r.flags.writeable
+
+def test_dataframes_are_not_shared_objects():
+    c = SharedCache(disk_dir=None)
+    c.get_or_compute('ns', 'df', lambda: pd.DataFrame({'F1': [1.0, 2.0]}))
+    a = c.get('ns', 'df'); a['F2'] = 0.0; a.loc[0, 'F1'] = 5.0
+    b = c.get('ns', 'df')
+    assert list(b.columns) == ['F1'] and b['F1'].tolist() == [1.0, 2.0]
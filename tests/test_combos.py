@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+from engine.combos import iter_combinations, combination_rows
+
+def _basic():
+    return pd.DataFrame({'Joint': ['1', '1', '2', '2'], 'OutputCase': ['DEAD', 'LIVE', 'DEAD', 'LIVE'],
+                         'F1': 0.0, 'F2': 0.0, 'F3': [10.0, 5.0, 20.0, 8.0], 'M1': 0.0, 'M2': 0.0, 'M3': 0.0})
+
+def test_combinations():
+    F = pd.DataFrame({'DEAD': [1.2], 'LIVE': [1.6]}, index=['ULS1'])
+    out = pd.concat(list(iter_combinations(_basic(), F)), ignore_index=True)
+    assert sorted(out['F3'].tolist()) == pytest.approx([1.2*10 + 1.6*5, 1.2*20 + 1.6*8])
+
+def test_unknown_case_is_an_error():
+    F = pd.DataFrame({'DEAD': [1.2], 'LIEV': [1.6]}, index=['ULS1'])
+    with pytest.raises(ValueError, match='LIEV'):
+        list(iter_combinations(_basic(), F))
+
+def test_combination_rows_without_building():
+    F = pd.DataFrame({'DEAD': [1.2, 0.9, 1.4], 'LIVE': [1.6, 0.0, 0.0]}, index=['ULS1', 'ULS2', 'ULS3'])
+    df = pd.concat([_basic(), pd.DataFrame({'Joint': ['3'], 'OutputCase': ['WIND'], 'F3': [1.0]})], ignore_index=True)
+    assert combination_rows(df, F) == sum(len(b) for b in iter_combinations(_basic(), F)) == 6
@@ -0,0 +1,50 @@
+import numpy as np
+from engine.design import design_params, check_loads
+
+BOLTS = [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in enumerate([(-150, -200), (150, -200), (-150, 200), (150, 200)])]
+
+def _params(mode):
+    return design_params({'B': 400.0, 'L': 500.0, 'd': 300.0, 'bf': 200.0}, {}, {'bolts': BOLTS},
+                         {'plate_method': 'Full', 'tension_mode': mode}, {})
+
+def _steel(N, mode):
+    z = np.zeros(1)
+    return check_loads(np.array([N]), z, z, z, z, _params(mode))['util_steel'][0]
+
+def test_axial_sign_same_in_every_mode():
+    """N compresión +: el levantamiento (N < 0) tracciona los pernos en todos los modos; la compresión no."""
+    for mode in ('ELASTIC', 'PLASTIC', 'BEARING'):
+        assert _steel(-100.0, mode) > 0.0, mode
+        assert _steel(100.0, mode) == 0.0, mode
+    assert np.isclose(_steel(-100.0, 'ELASTIC'), _steel(-100.0, 'BEARING'))
+
+def test_session_matches_check_loads():
+    from engine.session import DesignSession
+    geom, anc = {'B': 400.0, 'L': 500.0, 'd': 300.0, 'bf': 200.0}, {'bolts': BOLTS}
+    loads = {'N': np.array([-80.0, 150.0]), 'Vx': np.array([12.0, -4.0]), 'Vy': np.array([3.0, 9.0]),
+             'Mx': np.array([25.0, -10.0]), 'My': np.array([-6.0, 30.0])}
+    for mode in ('ELASTIC', 'BEARING'):
+        ass = {'plate_method': 'Full', 'tension_mode': mode}
+        ds = DesignSession(shared=False); ds.update(loads=loads, geom=geom, mat={}, anc=anc, ass=ass, cfg={})
+        a = ds.get('summary')
+        b = check_loads(*(loads[k] for k in ('N', 'Vx', 'Vy', 'Mx', 'My')), design_params(geom, {}, anc, ass, {}))
+        for k in b: assert np.allclose(a[k], b[k]), (mode, k)
+
+def test_design_table_matches_check_loads():
+    """design_table (por tramos, desde la tabla SAP) = check_loads fila a fila; sin aplastamiento negativo."""
+    import pandas as pd
+    from engine.design import design_table, loads_from_table, LOAD_COLS
+    rng = np.random.default_rng(1)
+    n = 40
+    df = pd.DataFrame({'Joint': np.repeat(['1', '2'], n//2), 'OutputCase': [f'C{i}' for i in range(n)],
+                       **{c: rng.normal(scale=s, size=n) for c, s in zip(('F1', 'F2', 'F3', 'M1', 'M2'), (20, 20, 300, 40, 40))}})
+    for method in ('Full section (block compression)', 'Local (DG1-like)'):
+        p = design_params({'B': 400.0, 'L': 500.0, 'd': 300.0, 'bf': 200.0}, {}, {'bolts': BOLTS},
+                          {'plate_method': method, 'tension_mode': 'ELASTIC'}, {})
+        res = design_table(df, p, chunk_rows=7)
+        L = loads_from_table(df)
+        for i in range(n):
+            row = check_loads(*(L[k][i:i+1] for k in LOAD_COLS), p)
+            for k, v in row.items():
+                assert np.allclose(res[k].iloc[i], v[0], equal_nan=True), (method, k, i)
+        assert (res['util_bearing'] >= 0).all() and (res.loc[res['N'] < 0, 'util_bearing'] == 0).any()
@@ -0,0 +1,45 @@
+import io
+import zipfile
+import numpy as np
+import pandas as pd
+from engine import export
+from engine.export import export_table, export_bundle
+
+def _table(n=25):
+    return pd.DataFrame({'Joint': pd.Categorical(np.repeat(['1', '2', '3', '4', '5'], n//5)),
+                         'OutputCase': [f'C{i}' for i in range(n)], 'util_max': np.linspace(0.0, 1.2, n)},
+                        index=pd.RangeIndex(100, 100 + n))
+
+def test_xlsx_splits_sheets(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+    monkeypatch.setattr(export, 'XLSX_MAX_ROWS', 10)
+    df = _table()
+    r = export_table(df, str(tmp_path / 'r.xlsx'), chunk_rows=7)
+    assert r['rows'] == 25 and r['sheets'] == ['Results', 'Results_2', 'Results_3']
+    wb = load_workbook(r['path'], read_only=True)
+    rows = [list(ws.iter_rows(values_only=True)) for ws in wb]
+    assert all(s[0] == ('Joint', 'OutputCase', 'util_max') for s in rows)
+    assert [len(s) - 1 for s in rows] == [10, 10, 5]
+    assert [v[1] for s in rows for v in s[1:]] == df['OutputCase'].tolist()
+    wb.close()
+
+def test_csv_parquet_roundtrip(tmp_path):
+    df = _table()
+    pq = export_table(df, str(tmp_path / 'r.parquet'), chunk_rows=7, index=True)
+    back = pd.read_parquet(pq['path'])
+    assert pq['rows'] == 25 and back['Joint'].dtype == 'category'
+    pd.testing.assert_frame_equal(back, df, check_categorical=False, check_index_type=False)
+    csv = export_table(df, str(tmp_path / 'r.csv'), chunk_rows=7)
+    back = pd.read_csv(csv['path'], dtype={'Joint': str})
+    assert csv['rows'] == 25
+    pd.testing.assert_frame_equal(back, df.reset_index(drop=True).astype({'Joint': str}))
+
+def test_bundle(tmp_path):
+    df = _table()
+    r = export_bundle({'results': df, 'by_joint': df.iloc[:5]}, str(tmp_path / 'b.zip'), formats=('csv', 'parquet'))
+    assert {k: v['rows'] for k, v in r['files'].items()} == {'results.csv': 25, 'results.parquet': 25,
+                                                           'by_joint.csv': 5, 'by_joint.parquet': 5}
+    with zipfile.ZipFile(r['path']) as zf:
+        assert sorted(zf.namelist()) == sorted(r['files'])
+        back = pd.read_parquet(io.BytesIO(zf.read('results.parquet')))
+    pd.testing.assert_frame_equal(back, df.reset_index(drop=True), check_categorical=False)
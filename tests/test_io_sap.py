@@ -0,0 +1,51 @@
+import pandas as pd
+from engine.io_sap import CaseIndex
+
+def test_case_index():
+    df = pd.DataFrame({'Joint': ['2', '1', '2', '1'], 'OutputCase': ['A', 'A', 'B', 'A'], 'F3': [1.0, 2.0, 3.0, 4.0]})
+    idx = CaseIndex(df)
+    assert len(idx) == 3 and idx.joints == ['1', '2'] and idx.cases == ['A', 'B']
+
+def test_case_index_empty():
+    idx = CaseIndex(pd.DataFrame({'Joint': pd.Series([], dtype=str), 'OutputCase': pd.Series([], dtype=str)}))
+    assert len(idx) == 0 and idx.joints == [] and idx.cases == []
+
+def _two_sheet_xlsx(path):
+    from openpyxl import Workbook
+    wb = Workbook(); ws = wb.active; ws.title = 'Other'
+    ws.append(['foo', 'bar']); ws.append([1, 2])
+    ws = wb.create_sheet('Joint Reactions')
+    ws.append(['Joint', 'OutputCase', 'CaseType', 'F1', 'F2', 'F3', 'M1', 'M2', 'M3'])
+    ws.append(['Text', 'Text', 'Text', 'KN', 'KN', 'KN', 'KN-m', 'KN-m', 'KN-m'])
+    ws.append(['1', 'ULS1', 'Combination', 1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    wb.save(path)
+    return str(path)
+
+def test_read_sap_table_unknown_sheet(tmp_path):
+    """Una hoja inexistente (o un patrón sin coincidencias) es un error, no la primera hoja del libro."""
+    import pytest
+    from engine.io_sap import read_sap_table
+    path = _two_sheet_xlsx(tmp_path / 'r.xlsx')
+    with open(path, 'rb') as f: df = read_sap_table(f)
+    assert list(df['F3']) == [3.0] and 'foo' not in df.columns
+    for kw in ({'sheet': 'Joint Reaction'}, {'sheet_pattern': 'Nope'}, {'sheet': 'Other'}):
+        with open(path, 'rb') as f, pytest.raises(ValueError):
+            read_sap_table(f, **kw)
+
+def _units_csv(force, moment):
+    return (f'Joint,OutputCase,CaseType,F1,F2,F3,M1,M2,M3\n'
+            f'Text,Text,Text,{force},{force},{force},{moment},{moment},{moment}\n'
+            '1,ULS1,Combination,1,-2,10,1,-2,3\n').encode()
+
+def test_units_to_kn_both_readers():
+    """Kip/Kip-ft y N/N-mm pasan a kN/kN·m igual en la lectura completa y en la de bloques."""
+    import numpy as np
+    from engine.io_sap import read_sap_table, iter_sap_csv_chunks
+    kip, ft = 4.4482216152605, 0.3048
+    for force, moment, f, m in (('Kip', 'Kip-ft', kip, kip*ft), ('N', 'N-mm', 1e-3, 1e-6)):
+        raw = _units_csv(force, moment)
+        src = {**{k: force for k in ('F1', 'F2', 'F3')}, **{k: moment for k in ('M1', 'M2', 'M3')}}
+        for df in (read_sap_table(raw), next(iter_sap_csv_chunks(raw))):
+            assert np.allclose(df[['F1', 'F2', 'F3']].to_numpy()[0], np.array([1.0, -2.0, 10.0])*f)
+            assert np.allclose(df[['M1', 'M2', 'M3']].to_numpy()[0], np.array([1.0, -2.0, 3.0])*m)
+            assert df.attrs['source_units'] == src
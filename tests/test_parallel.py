@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+from engine.design import design_params
+from engine.batch import run_design
+from engine.parallel import design_parallel
+
+BOLTS = [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in enumerate([(-150, -200), (150, -200), (-150, 200), (150, 200)])]
+
+def _table(nj=9, nc=7, seed=2):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Joint': np.repeat([f'J{i}' for i in range(nj)], nc), 'OutputCase': [f'ULS{i}' for i in range(nc)]*nj})
+    for c, s in zip(('F1', 'F2', 'F3', 'M1', 'M2', 'M3'), (20, 20, 200, 40, 40, 5)):
+        df[c] = rng.normal(scale=s, size=len(df))
+    return df.sample(frac=1.0, random_state=0)  # Joints intercalados: el pool reordena por Joint
+
+def test_two_workers_same_as_serial():
+    """Memoria compartida y reparto en bloques: jobs=2 da la misma tabla (valores e índice) que jobs=1."""
+    df = _table()
+    p = design_params({'B': 400.0, 'L': 500.0, 'd': 300.0, 'bf': 200.0}, {}, {'bolts': BOLTS}, {'plate_method': 'Full'}, {})
+    serial = run_design(df, p, jobs=1)
+    pd.testing.assert_frame_equal(run_design(df, p, jobs=2), serial)
+    blocks = design_parallel(df, p, workers=2, block_rows=10)  # varios bloques de Joints completos
+    pd.testing.assert_frame_equal(blocks.sort_index(), serial.sort_index())
@@ -0,0 +1,32 @@
+import gc
+import os
+import numpy as np
+import pandas as pd
+from engine.project import save_project, open_project, LazyTable
+
+def _state():
+    df = pd.DataFrame({'Joint': ['1', '2'], 'F3': [1.0, 2.0]})
+    return {'geom': {'B': 400.0}, 'sap': {'df': df, 'src': ('abc', 'Full table'), 'hashes': df['F3']},
+            'res': {'pairs': [(1, 2), (3, 4)]}}
+
+def test_roundtrip_lazy(tmp_path):
+    path = str(tmp_path / 'p.bpz')
+    save_project(_state(), path)
+    st = open_project(path)
+    assert st['sap']['src'] == ('abc', 'Full table') and st['res']['pairs'] == [(1, 2), (3, 4)]
+    # ni {**d}, ni pop, ni setdefault devuelven el marcador sin leer
+    assert isinstance({**st['sap']}['df'], pd.DataFrame)
+    assert isinstance(dict(st['sap'])['hashes'], pd.Series)
+    sap = open_project(path)['sap']
+    assert isinstance(sap.setdefault('df'), pd.DataFrame) and isinstance(sap.pop('hashes'), pd.Series)
+    assert not any(isinstance(v, LazyTable) for v in sap.copy().values())
+
+def test_temp_file_removed_when_loaded(tmp_path):
+    path = str(tmp_path / 'tmp.bpz')
+    save_project(_state(), path)
+    st = open_project(path, remove=True)
+    assert os.path.exists(path)
+    np.testing.assert_array_equal(st['sap']['df']['F3'], [1.0, 2.0]); st['sap']['hashes']
+    gc.collect()
+    assert not os.path.exists(path)
+    st = None
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from engine.design import design_params, design_table, governing_by_mechanism, MECHANISMS
+from engine.anchors.group import AnchorGroup
+
+def _params(bolts, mode='ELASTIC'):
+    return design_params({'B': 600.0, 'L': 800.0, 'd': 300.0, 'bf': 200.0}, {}, {'bolts': bolts},
+                         {'plate_method': 'Full', 'tension_mode': mode}, {})
+
+def _table(rng, n, joints=20):
+    return pd.DataFrame({'Joint': rng.integers(0, joints, n).astype(str), 'OutputCase': [f'ULS{i}' for i in range(n)],
+                         'F1': rng.normal(0, 20, n), 'F2': rng.normal(0, 20, n), 'F3': rng.normal(0, 300, n),
+                         'M1': rng.normal(0, 60, n), 'M2': rng.normal(0, 60, n), 'M3': 0.0})
+
+def _governing(res):
+    return {m: v[MECHANISMS[m]] for m, v in governing_by_mechanism(res).items()}
+
+def test_symmetry():
+    sym = [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in enumerate([(-150, -200), (150, -200), (-150, 200), (150, 200)])]
+    assert AnchorGroup.from_bolts(sym).symmetric
+    assert not AnchorGroup.from_bolts(sym[:3]).symmetric
+    assert not AnchorGroup.from_bolts([{**b, 'D': 30.0} if i == 0 else b for i, b in enumerate(sym)]).symmetric
+
+def test_asymmetric_reported_case():
+    """Grupo en T: la fila A gobierna la tracción y no debe podarse."""
+    bolts = [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in enumerate([(-100, 100), (0, 100), (100, 100), (0, -300)])]
+    N, Mx = [600.0, 0.0, -10000.0, 500.0], [150.0, -140.0, -145.0, -100.0]
+    df = pd.DataFrame({'Joint': '1', 'OutputCase': ['ULS_B', 'ULS_D', 'ULS_C', 'ULS_A'],
+                       'F1': 0.0, 'F2': 0.0, 'F3': N, 'M1': 0.0, 'M2': Mx, 'M3': 0.0})
+    p = _params(bolts)
+    full, pruned = design_table(df, p), design_table(df, p, prune=True)
+    assert pruned['util_steel'].max() == full['util_steel'].max()
+
+def test_pruned_matches_full():
+    rng = np.random.default_rng(7)
+    layouts = {'asymmetric': [{'id': f'B{i}', 'x': float(x), 'y': float(y)} for i, (x, y) in enumerate(rng.uniform(-250, 250, (5, 2)))],
+               'symmetric': [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in
+                             enumerate([(-200, -300), (0, -300), (200, -300), (-200, 300), (0, 300), (200, 300)])]}
+    df = _table(rng, 4000)
+    for name, bolts in layouts.items():
+        for mode in ('ELASTIC', 'PLASTIC', 'BEARING'):
+            p = _params(bolts, mode)
+            full, pruned = design_table(df, p), design_table(df, p, prune=True)
+            g0, g1 = _governing(full), _governing(pruned)
+            assert g0.keys() == g1.keys()
+            for m in g0: assert np.isclose(g0[m], g1[m]), (name, mode, m)
+            if name == 'symmetric': assert pruned.attrs['prune']['rows_removed'] > 0
+            else: assert pruned.attrs['prune']['rows_removed'] == 0
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import fitz
+from engine.report import build_report, joint_sections
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100"><rect x="10" y="10" width="80" height="80"/></svg>'
+
+def test_build_report_parallel_flushed(tmp_path):
+    """Dos workers y volcados a disco cada 3 secciones: una página por Joint, TOC completa y un único plano incrustado."""
+    nj, nc = 8, 5
+    rng = np.random.default_rng(0)
+    res = pd.DataFrame({'Joint': np.repeat([f'J{i}' for i in range(nj)], nc), 'OutputCase': [f'C{i}' for i in range(nc)]*nj,
+                        'N': rng.normal(size=nj*nc), 'util_max': rng.random(nj*nc)})
+    path = build_report({'B': 400, 'L': 500, 't': 20}, joint_sections(res, plan_svg=SVG), str(tmp_path / 'r.pdf'),
+                        workers=2, flush=3)
+    assert not (tmp_path / 'r.pdf.part').exists()
+    with fitz.open(path) as doc:
+        assert doc.page_count == 1 + nj
+        assert [t[1:] for t in doc.get_toc()] == [[f'Joint J{i}', i + 2] for i in range(nj)]
+        plans = [x for pn in range(1, doc.page_count) for x, name, *_ in doc.get_page_xobjects(pn) if name == 'fullpage']
+        assert len(plans) == nj and len(set(plans)) == 1
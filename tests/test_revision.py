@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from engine.design import design_params
+from engine.batch import run_design
+from engine.revision import case_hashes, design_incremental
+from engine.io_sap import to_category
+
+BOLTS = [{'id': f'B{i}', 'x': x, 'y': y} for i, (x, y) in enumerate([(-150, -200), (150, -200), (-150, 200), (150, 200)])]
+
+def _table(nj=6, nc=8, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Joint': to_category(np.repeat([f'J{i}' for i in range(nj)], nc)),
+                       'OutputCase': to_category([f'ULS{i}' for i in range(nc)]*nj)})
+    for c, s in zip(('F1', 'F2', 'F3', 'M1', 'M2', 'M3'), (20, 20, 200, 40, 40, 5)):
+        df[c] = rng.normal(scale=s, size=len(df))
+    return df
+
+def test_incremental_matches_full_design():
+    """Cambiar un Joint: sólo sus filas se rediseñan y el resultado es el de design(df); se conserva attrs['prune']."""
+    p = design_params({'B': 400.0, 'L': 500.0, 'd': 300.0, 'bf': 200.0}, {}, {'bolts': BOLTS}, {'plate_method': 'Full'}, {})
+    design = lambda sub: run_design(sub, p, prune=True)
+    df = _table()
+    prev = design(df)
+    df2 = df.copy(); j3 = (df2['Joint'] == 'J3').to_numpy()
+    df2.loc[j3, 'F3'] = df2.loc[j3, 'F3'] - 150.0
+    inc = design_incremental(df2, prev, case_hashes(df), design)
+    full = design(df2)
+    assert inc.attrs['revision']['rows_designed'] == int(j3.sum())
+    assert inc.attrs['revision']['joints_redesign'] == 1
+    assert 'prune' in inc.attrs
+    pd.testing.assert_frame_equal(inc.sort_index(), full.sort_index(), check_categorical=False)
@@ -0,0 +1,34 @@
+import pandas as pd
+from engine.steps import ConcurrentEnvelope, concurrent_envelope, NON_CONCURRENT
+
+Z = dict(F2=0.0, M1=0.0, M2=0.0, M3=0.0)
+
+def _rows():
+    return pd.DataFrame([
+        dict(Joint='1', OutputCase='TH', StepType='Max', StepNum=None, F1=10.0, F3=300.0, **Z),
+        dict(Joint='1', OutputCase='TH', StepType='Min', StepNum=None, F1=-1.0, F3=100.0, **Z),
+        dict(Joint='1', OutputCase='TH', StepType='Step', StepNum=1, F1=10.0, F3=100.0, **Z),
+        dict(Joint='1', OutputCase='TH', StepType='Step', StepNum=2, F1=-1.0, F3=300.0, **Z),
+        dict(Joint='2', OutputCase='TH', StepType='Max', StepNum=None, F1=5.0, F3=50.0, **Z),
+        dict(Joint='2', OutputCase='TH', StepType='Min', StepNum=None, F1=-5.0, F3=20.0, **Z)])
+
+def test_envelope_rows_are_not_candidates():
+    env = concurrent_envelope(_rows())
+    j1 = env.loc[env['Joint'] == '1']
+    # cada fila es un paso real: F1 = 10 nunca va con F3 = 300
+    assert set(zip(j1['F1'], j1['F3'])) == {(10.0, 100.0), (-1.0, 300.0)}
+    assert not j1['StepType'].str.endswith(NON_CONCURRENT).any()
+
+def test_envelope_only_groups_are_flagged():
+    env = concurrent_envelope(_rows())
+    j2 = env.loc[env['Joint'] == '2']
+    assert len(j2) and j2['StepType'].str.endswith(NON_CONCURRENT).all()
+    assert env.attrs['non_concurrent'] == 1 and env.attrs['rows_in'] == 6
+
+def test_chunk_order_does_not_matter():
+    df = _rows()
+    acc = ConcurrentEnvelope()
+    acc.update(df.iloc[2:4]); acc.update(df.iloc[[0, 1, 4, 5]])
+    a = acc.result().sort_values(['Joint', 'StepType']).reset_index(drop=True)
+    b = concurrent_envelope(df).sort_values(['Joint', 'StepType']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a[['StepType', 'F1', 'F3']], b[['StepType', 'F1', 'F3']])